@@ -0,0 +1,61 @@
+"""对比各输出格式（GIF / WebP / APNG / MP4）在不同编码速度下的编码耗时与输出大小
+
+用法:
+    python benchmarks/bench_formats.py --size 640x360 --frames 90 --quality 80
+
+素材为 bench_suite 中的两类合成画面：屏幕录制（大面积静止）和高速运动（整帧变化）。
+帧预先生成在内存中，只统计编码本身；GIF 使用全局调色板和内置编码器，不受速度设置影响。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import motion_frames, screen_frames
+from options import ENCODE_SPEEDS, FORMAT_EXTENSIONS, FORMAT_GIF, OUTPUT_FORMATS
+from output_formats import write_timed_frames
+from palette import PALETTE_GLOBAL, PALETTE_SAMPLE_FRAMES, build_quantizer, sample_evenly
+
+SOURCES = (('screen', screen_frames), ('motion', motion_frames))
+
+
+def encode(frames, output_path, output_format, frame_ms, quality, speed):
+    """编码一次，返回 (耗时, 输出字节数)"""
+    start = time.perf_counter()
+    quantizer = None
+    if output_format == FORMAT_GIF:
+        quantizer = build_quantizer(sample_evenly(frames, PALETTE_SAMPLE_FRAMES), PALETTE_GLOBAL)
+    write_timed_frames(((frame, frame_ms) for frame in frames), output_path, output_format,
+                       quantizer=quantizer, quality=quality, speed=speed)
+    return time.perf_counter() - start, os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='640x360', help='合成画面尺寸')
+    parser.add_argument('--frames', type=int, default=90, help='帧数')
+    parser.add_argument('--fps', type=int, default=15)
+    parser.add_argument('--quality', type=int, default=80, help='WebP、MP4 的画质')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+    frame_ms = 1000.0 / args.fps
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'素材':<8}{'格式':<6}{'速度':<10}{'编码(s)':>10}{'帧/秒':>10}{'输出(KB)':>12}")
+        for name, make_frames in SOURCES:
+            frames = list(make_frames(size, args.frames))
+            for output_format in OUTPUT_FORMATS:
+                output_path = os.path.join(work_dir, 'out' + FORMAT_EXTENSIONS[output_format])
+                speeds = ('-',) if output_format == FORMAT_GIF else ENCODE_SPEEDS
+                for speed in speeds:
+                    elapsed, output_bytes = encode(frames, output_path, output_format, frame_ms, args.quality,
+                                                   None if speed == '-' else speed)
+                    print(f"{name:<8}{output_format:<6}{speed:<10}{elapsed:>10.2f}"
+                          f"{len(frames) / elapsed:>10.1f}{output_bytes / 1024:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
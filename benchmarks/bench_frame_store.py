@@ -0,0 +1,96 @@
+"""对比中间帧的保存方式：PNG 临时文件 / 内存映射帧存储，以及多进程读取时传像素与传帧存储的开销
+
+用法:
+    python benchmarks/bench_frame_store.py --count 300 --size 1280x720 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_store import FrameStore, FrameStoreWriter
+from bench_suite import motion_frames
+
+
+def png_round_trip(frames, work_dir):
+    paths = []
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        path = os.path.join(work_dir, f'frame_{i:05d}.png')
+        Image.fromarray(frame).save(path)
+        paths.append(path)
+    written = time.perf_counter()
+    total = 0
+    for path in paths:
+        with Image.open(path) as img:
+            total += int(np.asarray(img)[::64, ::64].sum())
+    return written - start, time.perf_counter() - written, sum(os.path.getsize(p) for p in paths)
+
+
+def store_round_trip(frames, work_dir):
+    path = os.path.join(work_dir, 'frames.bin')
+    start = time.perf_counter()
+    with FrameStoreWriter(path) as writer:
+        for frame in frames:
+            writer.append(frame)
+    written = time.perf_counter()
+    store = FrameStore(path)
+    total = 0
+    for frame in store:
+        total += int(frame[::64, ::64].sum())
+    return written - start, time.perf_counter() - written, os.path.getsize(path)
+
+
+def frame_mean(frame):
+    return float(frame.mean())
+
+
+def store_mean(store, index):
+    return float(store[index].mean())
+
+
+def parallel_reads(store, workers):
+    """工作进程计算每帧的平均值：传像素数组（序列化）与只传帧存储路径"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(frame_mean, store[:workers]))  # 预热进程池
+        start = time.perf_counter()
+        list(pool.map(frame_mean, (np.array(frame) for frame in store), chunksize=4))
+        pickled = time.perf_counter() - start
+        start = time.perf_counter()
+        list(pool.map(store_mean, [store] * len(store), range(len(store)), chunksize=4))
+        mapped = time.perf_counter() - start
+    return pickled, mapped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--size', default='1280x720')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+    frames = list(motion_frames(size, args.count))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'方式':<14}{'写入(s)':>10}{'读取(s)':>10}{'帧/秒(写+读)':>16}{'磁盘(MB)':>10}")
+        for name, method in (('png', png_round_trip), ('frame-store', store_round_trip)):
+            sub_dir = os.path.join(work_dir, name)
+            os.mkdir(sub_dir)
+            write_time, read_time, disk = method(frames, sub_dir)
+            print(f"{name:<14}{write_time:>10.2f}{read_time:>10.2f}"
+                  f"{args.count / (write_time + read_time):>16.1f}{disk / 2**20:>10.1f}")
+
+        store = FrameStore(os.path.join(work_dir, 'frame-store', 'frames.bin'))
+        pickled, mapped = parallel_reads(store, args.workers)
+        print(f"\n{args.workers} 个工作进程逐帧读取：传像素 {pickled:.2f}s，传帧存储 {mapped:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
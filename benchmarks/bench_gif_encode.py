@@ -0,0 +1,72 @@
+"""多进程 GIF 编码的扩展性：不同进程数下的编码耗时，并校验输出与单进程逐字节相同
+
+用法:
+    python benchmarks/bench_gif_encode.py --size 640x360 --frames 240 --workers 1,2,4,8
+
+素材为 bench_suite 中的两类合成画面；帧预先生成在内存中，只统计量化、差分和 LZW 压缩。
+多进程时帧需要序列化传给工作进程，单核机器上只能看到这部分额外开销。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageSequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import motion_frames, screen_frames
+from gif_writer import write_timed_gif_frames
+from image_pipeline import default_worker_count
+from palette import PALETTE_GLOBAL, PALETTE_PER_FRAME, PALETTE_SAMPLE_FRAMES, build_quantizer, sample_evenly
+
+SOURCES = (('screen', screen_frames), ('motion', motion_frames))
+
+
+def encode(frames, output_path, quantizer, workers, frame_ms):
+    start = time.perf_counter()
+    write_timed_gif_frames(((frame, frame_ms) for frame in frames), output_path, quantizer=quantizer,
+                           workers=workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='640x360', help='合成画面尺寸')
+    parser.add_argument('--frames', type=int, default=240, help='帧数')
+    parser.add_argument('--fps', type=int, default=15)
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, default_worker_count()})),
+                        help='逗号分隔的进程数')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+    counts = [int(v) for v in args.workers.split(',')]
+    frame_ms = 1000.0 / args.fps
+
+    print(f"CPU 核心数 {default_worker_count()}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'素材':<8}{'调色板':<12}{'进程数':>6}{'编码(s)':>10}{'帧/秒':>10}{'加速比':>8}")
+        for name, make_frames in SOURCES:
+            frames = list(make_frames(size, args.frames))
+            for mode in (PALETTE_GLOBAL, PALETTE_PER_FRAME):
+                quantizer = build_quantizer(sample_evenly(frames, PALETTE_SAMPLE_FRAMES), mode)
+                reference = None
+                baseline = None
+                for workers in counts:
+                    output_path = os.path.join(work_dir, f'out_{workers}.gif')
+                    elapsed = encode(frames, output_path, quantizer, workers, frame_ms)
+                    with open(output_path, 'rb') as f:
+                        data = f.read()
+                    if reference is None:
+                        reference, baseline = data, elapsed
+                        # Pillow 能解码全部帧
+                        with Image.open(output_path) as image:
+                            decoded = sum(1 for _ in ImageSequence.Iterator(image))
+                        assert decoded == len(frames), (decoded, len(frames))
+                    assert data == reference, f"{workers} 个进程的输出与单进程不同"
+                    print(f"{name:<8}{mode:<12}{workers:>6}{elapsed:>10.2f}"
+                          f"{len(frames) / elapsed:>10.1f}{baseline / elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""图片并行解码/缩放的扩展性测试：从 1 个工作线程（进程）到 N 个
+
+用法:
+    python benchmarks/bench_image_parallel.py --count 200 --size 4000x3000 --resize 640x480
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_pipeline import EXECUTOR_PROCESS, EXECUTOR_THREAD, default_worker_count, load_frames
+
+
+def make_sample_images(dir_path, count, size, seed=0):
+    """生成确定性的合成 JPEG 序列（渐变 + 噪声）"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    paths = []
+    for i in range(count):
+        noise = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+        frame = (gradient + noise + i * 3) % 256
+        path = os.path.join(dir_path, f'frame_{i}.jpg')
+        Image.fromarray(frame.astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def worker_counts(max_workers):
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100, help='图片数量')
+    parser.add_argument('--size', default='4000x3000', help='源图片尺寸')
+    parser.add_argument('--resize', default='640x480', help='缩放尺寸，设为 0x0 表示不缩放')
+    parser.add_argument('--max-workers', type=int, default=default_worker_count())
+    parser.add_argument('--executor', choices=(EXECUTOR_THREAD, EXECUTOR_PROCESS, 'both'), default='both')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+    resize = tuple(int(v) for v in args.resize.split('x'))
+
+    executors = (EXECUTOR_THREAD, EXECUTOR_PROCESS) if args.executor == 'both' else (args.executor,)
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = make_sample_images(work_dir, args.count, size)
+
+        print(f"{'方式':<10}{'并行数':>8}{'耗时(s)':>10}{'图片/秒':>10}{'加速比':>8}")
+        for executor in executors:
+            baseline = None
+            for workers in worker_counts(args.max_workers):
+                start = time.perf_counter()
+                for img in load_frames(paths, resize, workers, executor):
+                    img.close()
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                print(f"{executor:<10}{workers:>8}{elapsed:>10.2f}"
+                      f"{len(paths) / elapsed:>10.1f}{baseline / elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""对比完整解码后缩放与 JPEG 降采样解码（draft）的速度、内存和画质
+
+用法:
+    python benchmarks/bench_jpeg_draft.py --count 30 --size 6000x4000 --resize 480x320
+
+每种方式在独立子进程中运行，以便分别统计峰值内存（RSS）。
+画质以完整解码 + LANCZOS 的结果为基准计算 PSNR。
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_pipeline import load_frame
+from bench_image_parallel import make_sample_images
+
+
+def peak_rss_mb():
+    # Linux 上 ru_maxrss 会跨 exec 继承父进程的峰值，优先读取 VmHWM
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 上单位是字节，Linux 上是 KB
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_mode(paths, resize, fast_downscale, result_queue):
+    start = time.perf_counter()
+    frames = []
+    for path in paths:
+        img = load_frame(path, resize, fast_downscale)
+        frames.append(np.asarray(img.convert('RGB')))
+        img.close()
+    elapsed = time.perf_counter() - start
+    result_queue.put((elapsed, peak_rss_mb(), np.stack(frames)))
+
+
+def measure(paths, resize, fast_downscale):
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=run_mode, args=(paths, resize, fast_downscale, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+    return result
+
+
+def psnr(reference, test):
+    mse = np.mean((reference.astype(np.float64) - test.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=30, help='图片数量')
+    parser.add_argument('--size', default='6000x4000', help='源图片尺寸')
+    parser.add_argument('--resize', default='480x320', help='目标尺寸')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+    resize = tuple(int(v) for v in args.resize.split('x'))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = make_sample_images(work_dir, args.count, size)
+
+        reference = None
+        print(f"{'方式':<10}{'耗时(s)':>10}{'图片/秒':>10}{'峰值RSS(MB)':>14}{'PSNR(dB)':>10}")
+        for name, fast_downscale in (('full', False), ('draft', True)):
+            elapsed, rss, frames = measure(paths, resize, fast_downscale)
+            if reference is None:
+                reference = frames
+            print(f"{name:<10}{elapsed:>10.2f}{len(paths) / elapsed:>10.1f}"
+                  f"{rss:>14.1f}{psnr(reference, frames):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""混合图片序列的归一化：方案缓存、解码线程中的并行转换，以及 Pillow 与 NumPy 透明合成的对比
+
+用法:
+    python benchmarks/bench_normalize.py --images 200 --size 640x480
+
+生成的图片依次为 RGB JPEG、RGBA PNG、带透明色的调色板 PNG、灰度 JPEG 和 CMYK JPEG，
+其中 CMYK 图片的宽度较小，不缩放时需要补边。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_pipeline import default_worker_count, load_frames
+from normalize import cached_plan, normalize_frame
+from probe import ProbeCache
+
+
+def make_mixed_images(dir_path, count, size):
+    width, height = size
+    ys, xs = np.mgrid[0:height, 0:width]
+    paths = []
+    for i in range(count):
+        rgb = np.dstack([(xs + i * 7) % 256, (ys + i * 3) % 256, np.full_like(xs, i % 256)]).astype(np.uint8)
+        image = Image.fromarray(rgb)
+        kind = i % 5
+        path = os.path.join(dir_path, f'frame_{i:05d}' + ('.png' if kind in (1, 2) else '.jpg'))
+        if kind == 0:
+            image.save(path)
+        elif kind == 1:
+            alpha = np.where((xs - width // 2) ** 2 + (ys - height // 2) ** 2 < (height // 3) ** 2, 255, 0)
+            Image.fromarray(np.dstack([rgb, alpha.astype(np.uint8)])).save(path)
+        elif kind == 2:
+            image.convert('P', palette=Image.ADAPTIVE, colors=64).save(path, transparency=0)
+        elif kind == 3:
+            image.convert('L').save(path)
+        else:
+            image.resize((width * 2 // 3, height)).convert('CMYK').save(path)
+        paths.append(path)
+    return paths
+
+
+def numpy_flatten(frame, background):
+    """NumPy 实现的透明合成（对照用）"""
+    rgba = np.asarray(frame.convert('RGBA'))
+    alpha = rgba[..., 3:].astype(np.uint16)
+    mixed = rgba[..., :3] * alpha + np.array(background, dtype=np.uint16) * (255 - alpha) + 127
+    return Image.fromarray((mixed // 255).astype(np.uint8))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=200, help='图片数量')
+    parser.add_argument('--size', default='640x480', help='图片尺寸')
+    parser.add_argument('--workers', type=int, default=default_worker_count(), help='并行解码数')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = make_mixed_images(work_dir, args.images, size)
+        cache = ProbeCache(os.path.join(work_dir, 'probe.json'))
+
+        scan = lambda: cached_plan(paths, workers=args.workers, cache=cache)
+        cold, plan = timed(scan)
+        warm, _ = timed(scan)
+        print(f"归一化方案：{plan.describe()}")
+        print(f"读取文件头 {cold * 1000:.1f} ms，命中缓存 {warm * 1000:.1f} ms\n")
+
+        print(f"{'解码':<20}{'1 线程(s)':>12}{f'{args.workers} 线程(s)':>14}")
+        for keep_alpha in (False, True):
+            target = cached_plan(paths, keep_alpha=keep_alpha, cache=cache)
+            for name, frame_plan in (('只解码', None), (f'解码+归一化 {target.mode}', target)):
+                times = [timed(lambda: sum(1 for _ in load_frames(paths, workers=workers, plan=frame_plan)))[0]
+                         for workers in (1, args.workers)]
+                print(f"{name:<20}{times[0]:>12.2f}{times[1]:>14.2f}")
+
+        # 透明合成：Pillow 以透明通道为蒙版粘贴 / NumPy 整数运算
+        frames = [frame for frame in load_frames(paths) if frame.mode == 'RGBA']
+        target = cached_plan(paths, keep_alpha=False, cache=cache)
+        pillow, _ = timed(lambda: [normalize_frame(frame, target) for frame in frames])
+        numpy, _ = timed(lambda: [numpy_flatten(frame, target.background) for frame in frames])
+        print(f"\n透明合成 {len(frames)} 帧：Pillow {pillow * 1000:.0f} ms，NumPy {numpy * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""对比逐帧调色板、全局调色板和按场景调色板的编码耗时与输出大小
+
+用法:
+    python benchmarks/bench_palette.py [视频文件] --fps 10 --images 60
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gif_core import ImagesToGifConverter, VideoToGifConverter
+from gif_writer import ENCODER_NATIVE
+from palette import PALETTE_GLOBAL, PALETTE_PER_FRAME, PALETTE_SCENE
+from bench_image_parallel import make_sample_images
+from bench_video_streaming import make_sample_video
+
+MODES = (PALETTE_PER_FRAME, PALETTE_GLOBAL, PALETTE_SCENE)
+
+
+def report(name, mode, dither, stats, output_path):
+    print(f"{name:<8}{mode:<12}{'是' if dither else '否':<6}{stats.palette_time + stats.quantize_time:>10.2f}"
+          f"{stats.encode_time:>10.2f}{stats.wall_time:>10.2f}{os.path.getsize(output_path) / 1024:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', nargs='?', help='输入视频，不指定则生成合成视频')
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--seconds', type=int, default=20, help='合成视频的时长')
+    parser.add_argument('--images', type=int, default=40, help='合成图片数量')
+    parser.add_argument('--size', default='640x480', help='合成素材尺寸')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = args.video
+        if not video_path:
+            video_path = os.path.join(work_dir, 'sample.mp4')
+            make_sample_video(video_path, args.seconds, args.size)
+        image_dir = os.path.join(work_dir, 'images')
+        os.mkdir(image_dir)
+        image_paths = make_sample_images(image_dir, args.images, size)
+
+        output_path = os.path.join(work_dir, 'out.gif')
+        print(f"{'素材':<8}{'调色板':<12}{'抖动':<6}{'量化(s)':>10}{'编码(s)':>10}{'总计(s)':>10}{'输出(KB)':>12}")
+        for mode in MODES:
+            for dither in ((False,) if mode == PALETTE_PER_FRAME else (False, True)):
+                stats = VideoToGifConverter(video_path, output_path, args.fps, 1.0, encoder=ENCODER_NATIVE,
+                                            palette_mode=mode, dither=dither).run()
+                report('video', mode, dither, stats, output_path)
+        for mode in MODES:
+            for dither in ((False,) if mode == PALETTE_PER_FRAME else (False, True)):
+                stats = ImagesToGifConverter(image_paths, output_path, 100, 0,
+                                             palette_mode=mode, dither=dither).run()
+                report('images', mode, dither, stats, output_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""对比视频帧的缩放方式：moviepy 逐帧缩放 / 解码端缩放（moviepy 的 ffmpeg 进程）/ ffmpeg 顺序解码
+
+用法:
+    python benchmarks/bench_resize.py [视频文件] --fps 10 --size 640x360 --mode fit
+
+只测量取帧和缩放（不编码 GIF），输出每种方式的帧/秒。
+不指定视频文件时会用 ffmpeg 生成一段合成测试视频。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_video_streaming import make_sample_video
+from frame_pipeline import read_video_frames, sample_video_frames
+from options import RESIZE_MODES, RESIZE_STRETCH
+from probe import video_info
+from sizing import fit_size
+
+
+def per_frame_resize(video_path, fps, size, mode):
+    """原来的方式：moviepy 逐帧转为 PIL 图像缩放后再转回数组（只支持拉伸）
+
+    与 clip.resize(newsize=...) 在 PIL 后端下的处理相同；moviepy 1.x 的 resize
+    依赖 Pillow 10 已移除的 Image.ANTIALIAS，这里直接用 LANCZOS 复现。
+    """
+    import numpy as np
+    from moviepy.editor import VideoFileClip
+    from PIL import Image
+    with VideoFileClip(video_path) as clip:
+        clip = clip.fl_image(lambda frame: np.asarray(Image.fromarray(frame).resize(size, Image.LANCZOS)))
+        return sum(1 for _ in sample_video_frames(clip, fps))
+
+
+def decoder_resize(video_path, fps, size, mode):
+    """moviepy 按时间点取帧，缩放由其 ffmpeg 解码进程完成"""
+    from moviepy.editor import VideoFileClip
+    scaled, crop = fit_size(video_info(video_path)['size'], size, mode)
+    with VideoFileClip(video_path, target_resolution=scaled[::-1], resize_algorithm='lanczos') as clip:
+        return sum(1 for _ in sample_video_frames(clip, fps, crop=crop))
+
+
+def sequential_resize(video_path, fps, size, mode):
+    """ffmpeg 顺序解码，抽帧、缩放和裁剪都在滤镜中完成"""
+    scaled, crop = fit_size(video_info(video_path)['size'], size, mode)
+    return sum(1 for _ in read_video_frames(video_path, fps, scaled, crop=crop))
+
+
+METHODS = (
+    ('per-frame', per_frame_resize),
+    ('decoder', decoder_resize),
+    ('sequential', sequential_resize),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', nargs='?', help='输入视频，不指定则生成合成视频')
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--size', default='640x360', help='目标尺寸')
+    parser.add_argument('--mode', choices=RESIZE_MODES, default=RESIZE_STRETCH, help='缩放方式')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seconds', type=int, default=10, help='合成视频的时长')
+    parser.add_argument('--source-size', default='1920x1080', help='合成视频的尺寸')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = args.video
+        if not video_path:
+            video_path = os.path.join(work_dir, 'sample.mp4')
+            make_sample_video(video_path, args.seconds, args.source_size)
+
+        print(f"{'方式':<12}{'帧数':>8}{'耗时(s)':>10}{'帧/秒':>10}")
+        for name, method in METHODS:
+            if method is per_frame_resize and args.mode != RESIZE_STRETCH:
+                print(f"{name:<12}{'（只支持拉伸）':>28}")
+                continue
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                frames = method(video_path, args.fps, size, args.mode)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{name:<12}{frames:>8}{best:>10.2f}{frames / best:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""对比图片文件夹的列出方式：三次 glob + 原来的自然排序 / 一次 os.scandir + 预编译的排序键
+
+用法:
+    python benchmarks/bench_scan.py --count 200000
+    python benchmarks/bench_scan.py --dir 已有的图片文件夹
+
+不指定 --dir 时在临时目录中生成 count 个空文件（扩展名大小写混合，另有少量非图片文件）。
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from folder_scan import FolderWatcher, list_image_files
+
+
+def old_natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+
+def old_list_image_files(dir_path):
+    """原来的实现：每种扩展名 glob 一次（区分大小写），按完整路径排序"""
+    image_files = []
+    for ext in ('.jpg', '.jpeg', '.png'):
+        image_files += glob.glob(os.path.join(dir_path, '*' + ext))
+    return sorted(image_files, key=old_natural_sort_key)
+
+
+def make_folder(dir_path, count):
+    extensions = ('.jpg', '.JPG', '.png', '.PNG', '.jpeg')
+    for i in range(count):
+        open(os.path.join(dir_path, f'capture_{i}{extensions[i % len(extensions)]}'), 'wb').close()
+    for i in range(max(1, count // 100)):
+        open(os.path.join(dir_path, f'capture_{i}.txt'), 'wb').close()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help='生成的图片文件数')
+    parser.add_argument('--dir', help='使用已有的文件夹')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        dir_path = args.dir
+        if not dir_path:
+            dir_path = work_dir
+            print(f"生成 {args.count} 个文件...")
+            make_folder(dir_path, args.count)
+
+        print(f"{'方式':<10}{'文件数':>10}{'耗时(s)':>10}")
+        for name, function in (('glob', old_list_image_files), ('scandir', list_image_files)):
+            elapsed, paths = timed(function, dir_path)
+            print(f"{name:<10}{len(paths):>10}{elapsed:>10.2f}")
+
+        # 监视模式：文件夹没有变化时的检查开销
+        watcher = FolderWatcher(dir_path, list_image_files(dir_path))
+        elapsed, _ = timed(watcher.poll)
+        idle, _ = timed(watcher.poll)
+        print(f"\n监视：首次检查 {elapsed * 1000:.1f} ms，文件夹无变化时 {idle * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
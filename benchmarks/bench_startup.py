@@ -0,0 +1,99 @@
+"""测量界面冷启动的导入耗时，检查重型依赖是否被提前加载
+
+用法:
+    python benchmarks/bench_startup.py --runs 5 --max-ms 300
+
+每次在新的解释器中用 `python -X importtime` 导入入口模块，取中位数。
+同时在 offscreen 平台上测量从启动到窗口显示的耗时。
+导入了 moviepy、numpy 等重型模块，或耗时超过 --max-ms 时返回非零退出码。
+"""
+import argparse
+import os
+import statistics
+import subprocess as sp
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 界面启动时不应加载的模块
+HEAVY_MODULES = ('moviepy', 'imageio', 'imageio_ffmpeg', 'numpy', 'gif_core')
+
+SHOW_WINDOW = """
+import sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from gif_gui import GifConverterApp
+app = QApplication(sys.argv)
+window = GifConverterApp()
+window.show()
+app.processEvents()
+print(f"{(time.perf_counter() - start) * 1000:.1f}")
+"""
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 {模块: (自身微秒, 累计微秒)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def import_profile(module):
+    """在新的解释器中导入模块，返回 -X importtime 统计"""
+    result = sp.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                    cwd=ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def time_to_window():
+    """在新的解释器中创建并显示主窗口，返回耗时（毫秒）"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = sp.run([sys.executable, '-c', SHOW_WINDOW], cwd=ROOT, env=env,
+                    capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='gif_gui', help='要测量的入口模块')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='列出累计耗时最多的模块数')
+    parser.add_argument('--max-ms', type=float, help='导入耗时上限（毫秒），超过时返回非零')
+    parser.add_argument('--no-window', action='store_true', help='不测量窗口显示耗时')
+    args = parser.parse_args()
+
+    profiles = [import_profile(args.module) for _ in range(args.runs)]
+    totals = [profile[args.module][1] / 1000 for profile in profiles]
+    median = statistics.median(totals)
+    print(f"导入 {args.module}：中位数 {median:.1f} ms（最小 {min(totals):.1f}，最大 {max(totals):.1f}）")
+
+    profile = profiles[totals.index(sorted(totals)[len(totals) // 2])]
+    print(f"\n{'累计(ms)':>10}{'自身(ms)':>10}  模块")
+    top = sorted(profile.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in top:
+        print(f"{cumulative_us / 1000:>10.1f}{self_us / 1000:>10.1f}  {name}")
+
+    if not args.no_window:
+        try:
+            window_ms = statistics.median(time_to_window() for _ in range(args.runs))
+            print(f"\n启动到窗口显示：中位数 {window_ms:.1f} ms")
+        except sp.CalledProcessError as e:
+            print(f"\n无法创建窗口，跳过：{e.stderr.strip().splitlines()[-1:]}")
+
+    failed = False
+    heavy = sorted(name for name in profile if name.split('.')[0] in HEAVY_MODULES)
+    if heavy:
+        failed = True
+        print(f"\n启动时加载了重型模块：{', '.join(heavy[:10])}")
+    if args.max_ms is not None and median > args.max_ms:
+        failed = True
+        print(f"\n导入耗时 {median:.1f} ms 超过上限 {args.max_ms:.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""可复现的端到端基准测试：合成视频和图片语料、JSON 基线和回归比较
+
+用法:
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --threshold 10
+    python benchmarks/bench_suite.py --cases video-screen,images-720p --repeat 5
+
+语料用 NumPy 和 Pillow 按固定随机种子在本地生成（视频再经 ffmpeg 单线程编码），
+缓存在 --corpus-dir 中，重复运行时直接复用。每个用例在独立的子进程中运行，
+峰值内存互不影响；直接调用转换核心，不需要显示器。
+
+比较模式下，耗时、峰值内存、临时磁盘占用或输出大小超过基线 --threshold 百分比时
+列为回归，并返回非零退出码。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess as sp
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 语料格式版本，生成方式变化时递增，旧语料会重新生成
+CORPUS_VERSION = 1
+
+# 视频语料：名称 -> (生成函数名, 尺寸, 秒数, 帧率)
+VIDEO_CORPORA = {
+    'screen': ('screen_frames', (1280, 720), 10, 30),
+    'motion': ('motion_frames', (640, 360), 6, 30),
+}
+
+# 图片语料：名称 -> (尺寸, 张数)
+IMAGE_CORPORA = {
+    'images-240p': ((320, 240), 200),
+    'images-720p': ((1280, 720), 60),
+    'images-1080p': ((1920, 1080), 30),
+}
+
+# 用例：名称 -> (类型, 语料, 转换参数)
+CASES = {
+    'video-screen': ('video', 'screen', {'fps': 10}),
+    'video-screen-dedup': ('video', 'screen', {'fps': 10, 'dedup_threshold': 0.0}),
+    'video-motion': ('video', 'motion', {'fps': 15}),
+    'video-motion-tempdir': ('video', 'motion', {'fps': 15, 'streaming': False}),
+    'images-240p': ('images', 'images-240p', {'duration_ms': 50}),
+    'images-720p': ('images', 'images-720p', {'duration_ms': 100, 'resize': (640, 360)}),
+    'images-1080p': ('images', 'images-1080p', {'duration_ms': 100}),
+}
+
+# 参与回归比较的指标（都是越小越好）
+METRICS = ('wall_time', 'peak_rss', 'temp_disk', 'output_bytes')
+
+
+def screen_frames(size, count, seed=0):
+    """类似屏幕录制的画面：静止的窗口背景，只有光标和一小块文字区域在变化"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    width, height = size
+    # 版面按 640×360 设计，更小的画面按比例缩小（更大的画面保持原样，结果与之前一致）
+    sx = lambda v: max(1, int(v * min(1.0, width / 640)))
+    sy = lambda v: max(1, int(v * min(1.0, height / 360)))
+    left, line = sx(260), sy(28)
+    background = np.full((height, width, 3), 236, dtype=np.uint8)
+    background[:sy(40)] = (45, 45, 48)  # 标题栏
+    background[sy(40):, :sx(220)] = (250, 250, 250)  # 侧边栏
+    for y in range(sy(70), height - sy(40), line):
+        # 固定的"文字行"
+        length = int(rng.integers(sx(200), max(sx(200) + 1, width - sx(300))))
+        background[y:y + sy(10), left:left + length] = 90
+    for i in range(count):
+        frame = background.copy()
+        # 每秒多出一行"输入的文字"
+        typed = min(i // 30, max(height - sy(120), 0) // line)
+        for row in range(typed):
+            y = sy(84) + row * line
+            frame[y:y + sy(10), left:left + sx(400)] = (30, 90, 200)
+        x = int(left + (i * 7) % max(width - sx(300), 1))
+        y = int(sy(60) + (i * 3) % max(height - sy(100), 1))
+        frame[y:y + sy(18), x:x + sx(12)] = 0  # 光标
+        yield frame
+
+
+def motion_frames(size, count, seed=0):
+    """高速运动的画面：整帧噪声叠加平移的渐变，几乎没有可复用的区域"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    width, height = size
+    xs = np.arange(width, dtype=np.uint16)[None, :]
+    ys = np.arange(height, dtype=np.uint16)[:, None]
+    for i in range(count):
+        noise = rng.integers(0, 96, (height, width, 3), dtype=np.uint8)
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[..., 0] = (xs + i * 9) % 256
+        frame[..., 1] = (ys + i * 5) % 256
+        frame[..., 2] = (xs + ys + i * 13) % 256
+        yield frame + noise
+
+
+def write_video(path, frames, size, fps):
+    """把 RGB 帧通过管道交给 ffmpeg 编码为 H.264（单线程，输出可复现）"""
+    from frame_pipeline import get_ffmpeg_binary
+    width, height = size
+    cmd = [get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+           '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+           '-c:v', 'libx264', '-threads', '1', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', path]
+    proc = sp.Popen(cmd, stdin=sp.PIPE)
+    try:
+        for frame in frames:
+            proc.stdin.write(frame.tobytes())
+    finally:
+        proc.stdin.close()
+        if proc.wait():
+            raise RuntimeError(f"ffmpeg 编码失败：{path}")
+
+
+def write_images(dir_path, size, count, seed=0):
+    """生成确定性的 JPEG 序列：渐变背景上移动的色块和轻微噪声"""
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    width, height = size
+    gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+    base = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    box = max(8, min(width, height) // 6)
+    for i in range(count):
+        frame = base + rng.integers(0, 24, (height, width, 3), dtype=np.uint8)
+        x = (i * 11) % (width - box)
+        y = (i * 5) % (height - box)
+        frame[y:y + box, x:x + box] = (220, 60 + i % 150, 40)
+        Image.fromarray(frame).save(os.path.join(dir_path, f'frame_{i:05d}.jpg'), quality=90)
+
+
+def ensure_corpus(corpus_dir, name):
+    """生成（或复用）语料，返回视频路径或图片文件夹"""
+    tag = f'{name}.v{CORPUS_VERSION}'
+    if name in VIDEO_CORPORA:
+        generator, size, seconds, fps = VIDEO_CORPORA[name]
+        path = os.path.join(corpus_dir, tag + '.mp4')
+        if not os.path.exists(path):
+            tmp_path = path + '.tmp.mp4'
+            write_video(tmp_path, globals()[generator](size, seconds * fps), size, fps)
+            os.replace(tmp_path, path)
+        return path
+
+    size, count = IMAGE_CORPORA[name]
+    path = os.path.join(corpus_dir, tag)
+    if not os.path.isdir(path):
+        tmp_path = tempfile.mkdtemp(dir=corpus_dir, prefix=tag + '.')
+        write_images(tmp_path, size, count)
+        os.replace(tmp_path, path)
+    return path
+
+
+def dir_size(path):
+    total = 0
+    for dir_path, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(dir_path, name))
+            except OSError:
+                pass
+    return total
+
+
+def run_case(name, corpus_dir, work_dir):
+    """在当前进程中运行一个用例，返回指标字典"""
+    from gif_core import ImagesToGifConverter, VideoToGifConverter
+    from folder_scan import list_image_files
+    from image_pipeline import default_worker_count
+
+    kind, corpus, params = CASES[name]
+    source = ensure_corpus(corpus_dir, corpus)
+    output_path = os.path.join(work_dir, name + '.gif')
+    params = dict(params)
+    if kind == 'video':
+        converter = VideoToGifConverter(source, output_path, params.pop('fps'), 1.0, **params)
+    else:
+        converter = ImagesToGifConverter(list_image_files(source), output_path, params.pop('duration_ms'), 0,
+                                         workers=default_worker_count(), **params)
+
+    # 后台线程采样临时目录占用的磁盘空间
+    peak_disk = [0]
+    done = threading.Event()
+
+    def watch_disk():
+        while not done.wait(0.05):
+            if getattr(converter, 'temp_dir', None):
+                peak_disk[0] = max(peak_disk[0], dir_size(converter.temp_dir))
+
+    watcher = threading.Thread(target=watch_disk, daemon=True)
+    watcher.start()
+    try:
+        stats = converter.run()
+    finally:
+        done.set()
+        watcher.join()
+
+    return {
+        'wall_time': stats.wall_time,
+        'fps': stats.fps,
+        'frames': stats.frames_encoded,
+        'peak_rss': stats.peak_rss,
+        'temp_disk': max(peak_disk[0], stats.counters.get('temp_bytes_written', 0)),
+        'output_bytes': os.path.getsize(output_path),
+        'stages': {stage: histogram.total for stage, histogram in stats.stages.items()},
+    }
+
+
+def run_case_isolated(name, corpus_dir):
+    """在新的解释器中运行用例，避免峰值内存和已导入模块互相影响"""
+    result = sp.run([sys.executable, os.path.abspath(__file__), '--run-case', name, '--corpus-dir', corpus_dir],
+                    cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"用例 {name} 失败：{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_run(runs):
+    """取耗时为中位数的那一次运行"""
+    ordered = sorted(runs, key=lambda run: run['wall_time'])
+    return ordered[len(ordered) // 2]
+
+
+def environment():
+    import numpy
+    import PIL
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pillow': PIL.__version__,
+    }
+    try:
+        info['commit'] = sp.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, sp.CalledProcessError):
+        pass
+    return info
+
+
+def compare(results, baseline, threshold):
+    """返回回归列表：(用例, 指标, 基线值, 当前值, 变化百分比)"""
+    regressions = []
+    for name, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if change > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
+
+
+def format_metric(metric, value):
+    if metric == 'wall_time':
+        return f"{value:.2f}s"
+    return f"{value / 2**20:.1f}MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', help=f"逗号分隔的用例名，默认全部：{','.join(CASES)}")
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例运行次数，取耗时中位数')
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'gif_converter_bench'),
+                        help='合成语料的缓存目录')
+    parser.add_argument('--save', metavar='PATH', help='把结果保存为 JSON 基线')
+    parser.add_argument('--compare', metavar='PATH', help='与 JSON 基线比较')
+    parser.add_argument('--threshold', type=float, default=10.0, help='判定为回归的变化百分比')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.makedirs(args.corpus_dir, exist_ok=True)
+
+    if args.run_case:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print(json.dumps(run_case(args.run_case, args.corpus_dir, work_dir)))
+        return 0
+
+    names = args.cases.split(',') if args.cases else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"未知的用例：{', '.join(unknown)}")
+
+    # 先在主进程中生成语料，不计入各用例的耗时
+    for name in names:
+        ensure_corpus(args.corpus_dir, CASES[name][1])
+
+    results = {'environment': environment(), 'repeat': args.repeat, 'cases': {}}
+    print(f"{'用例':<22}{'耗时(s)':>9}{'帧/秒':>9}{'峰值内存(MB)':>14}{'临时磁盘(MB)':>14}{'输出(KB)':>10}")
+    for name in names:
+        runs = [run_case_isolated(name, args.corpus_dir) for _ in range(args.repeat)]
+        result = median_run(runs)
+        result['wall_times'] = [run['wall_time'] for run in runs]
+        result['stdev'] = statistics.pstdev(result['wall_times'])
+        results['cases'][name] = result
+        print(f"{name:<22}{result['wall_time']:>9.2f}{result['fps']:>9.1f}"
+              f"{(result['peak_rss'] or 0) / 2**20:>14.1f}{result['temp_disk'] / 2**20:>14.1f}"
+              f"{result['output_bytes'] / 1024:>10.0f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if not regressions:
+            print(f"\n与基线 {args.compare} 相比没有超过 {args.threshold:g}% 的回归")
+            return 0
+        print(f"\n与基线 {args.compare} 相比的回归（阈值 {args.threshold:g}%）：")
+        for name, metric, old, new, change in regressions:
+            print(f"  {name:<22}{metric:<14}{format_metric(metric, old):>10} -> {format_metric(metric, new):<10} +{change:.1f}%")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
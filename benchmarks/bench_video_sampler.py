@@ -0,0 +1,49 @@
+"""对比按时间点定位取帧与 ffmpeg 顺序解码取帧的吞吐量
+
+用法:
+    python benchmarks/bench_video_sampler.py [视频文件] --fps 10
+
+不指定视频文件时会用 ffmpeg 生成一段合成测试视频（默认 10 分钟）。
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gif_core import VideoToGifConverter
+from frame_pipeline import SAMPLER_SEEK, SAMPLER_SEQUENTIAL
+from bench_video_streaming import make_sample_video
+
+
+def run_once(video_path, output_path, fps, sampler, resize):
+    return VideoToGifConverter(video_path, output_path, fps, 1.0, resize=resize, sampler=sampler).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', nargs='?', help='输入视频，不指定则生成合成视频')
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--resize', help='输出尺寸，例如 320x180')
+    parser.add_argument('--seconds', type=int, default=600, help='合成视频的时长')
+    parser.add_argument('--size', default='1280x720', help='合成视频的尺寸')
+    args = parser.parse_args()
+    resize = tuple(int(v) for v in args.resize.split('x')) if args.resize else None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = args.video
+        if not video_path:
+            video_path = os.path.join(work_dir, 'sample.mp4')
+            make_sample_video(video_path, args.seconds, args.size)
+
+        print(f"{'取帧方式':<12}{'帧数':>8}{'帧/秒':>10}{'解码(s)':>10}{'编码(s)':>10}{'总计(s)':>10}")
+        for sampler in (SAMPLER_SEEK, SAMPLER_SEQUENTIAL):
+            output_path = os.path.join(work_dir, f'{sampler}.gif')
+            stats = run_once(video_path, output_path, args.fps, sampler, resize)
+            print(f"{sampler:<12}{stats.frames_encoded:>8}{stats.fps:>10.1f}"
+                  f"{stats.decode_time:>10.2f}{stats.encode_time:>10.2f}{stats.wall_time:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
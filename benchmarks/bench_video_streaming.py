@@ -0,0 +1,107 @@
+"""对比视频转 GIF 的流式模式与临时 PNG 目录模式的吞吐量
+
+用法:
+    python benchmarks/bench_video_streaming.py [视频文件] --fps 10 --window 8
+
+不指定视频文件时会用 ffmpeg 生成一段合成测试视频。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gif_core import VideoToGifConverter
+from frame_pipeline import count_sampled_frames, get_ffmpeg_binary
+import subprocess as sp
+
+
+def make_sample_video(path, seconds, size):
+    """用 ffmpeg 的 testsrc 生成合成视频"""
+    sp.run([get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f'testsrc=duration={seconds}:size={size}:rate=30',
+            '-pix_fmt', 'yuv420p', path], check=True)
+
+
+def dir_size(path):
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return total
+
+
+def run_once(video_path, output_path, fps, streaming, window):
+    converter = VideoToGifConverter(video_path, output_path, fps, 1.0,
+                                    streaming=streaming, frame_window=window)
+
+    # 后台线程采样临时目录占用的磁盘空间
+    peak_disk = [0]
+    done = threading.Event()
+
+    def watch_disk():
+        while not done.wait(0.05):
+            if converter.temp_dir:
+                peak_disk[0] = max(peak_disk[0], dir_size(converter.temp_dir))
+
+    watcher = threading.Thread(target=watch_disk, daemon=True)
+    watcher.start()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        converter.run()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak_mem = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        done.set()
+        watcher.join()
+    return elapsed, peak_mem, peak_disk[0], os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', nargs='?', help='输入视频，不指定则生成合成视频')
+    parser.add_argument('--fps', type=int, default=10)
+    parser.add_argument('--window', type=int, default=8, help='流式模式的帧缓冲窗口')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seconds', type=int, default=10, help='合成视频的时长')
+    parser.add_argument('--size', default='1280x720', help='合成视频的尺寸')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = args.video
+        if not video_path:
+            video_path = os.path.join(work_dir, 'sample.mp4')
+            make_sample_video(video_path, args.seconds, args.size)
+
+        from moviepy.editor import VideoFileClip
+        with VideoFileClip(video_path) as clip:
+            frames = count_sampled_frames(clip.duration, args.fps)
+
+        print(f"{'模式':<10}{'耗时(s)':>10}{'帧/秒':>10}{'峰值内存(MB)':>14}{'临时磁盘(MB)':>14}{'输出(KB)':>10}")
+        for name, streaming in (('temp-dir', False), ('streaming', True)):
+            output_path = os.path.join(work_dir, f'{name}.gif')
+            best = None
+            for _ in range(args.repeat):
+                result = run_once(video_path, output_path, args.fps, streaming, args.window)
+                if best is None or result[0] < best[0]:
+                    best = result
+            elapsed, peak_mem, peak_disk, out_bytes = best
+            print(f"{name:<10}{elapsed:>10.2f}{frames / elapsed:>10.1f}"
+                  f"{peak_mem / 2**20:>14.1f}{peak_disk / 2**20:>14.1f}{out_bytes / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""转换结果与中间帧的磁盘缓存
+
+结果缓存：相同输入（路径+修改时间+大小）和相同参数的转换直接复用上次的输出，
+命中时把缓存的结果复制为输出文件。条目与输出不共用 inode，
+修改输出文件不会影响缓存，命中时更新条目的访问时间也不会改动输出文件。
+
+帧缓存：把解码、缩放后的 RGB 帧保存为内存映射的帧存储文件（frame_store），
+只修改帧时长、循环次数等参数时无需重新解码。
+
+两类条目共享同一个容量上限，按最近使用时间淘汰。
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+from PIL import Image
+
+from frame_store import FrameStore, FrameStoreError, FrameStoreWriter
+from probe import default_cache_dir, file_key
+
+
+# 缓存键的版本，编码结果或缓存文件格式变化时递增
+CACHE_VERSION = 4
+
+# 默认容量上限（字节），可用环境变量 GIF_CONVERTER_CACHE_BYTES 修改
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3
+
+# 单个帧缓存条目最多占用容量上限的比例，避免一次长视频挤掉全部缓存
+FRAME_ENTRY_FRACTION = 0.25
+
+
+def cache_key(kind, sources, **params):
+    """由输入文件的 路径+修改时间+大小 和规范化后的参数计算缓存键"""
+    data = {
+        'version': CACHE_VERSION,
+        'kind': kind,
+        'sources': [file_key(path) for path in sources],
+        'params': {name: list(value) if isinstance(value, tuple) else value
+                   for name, value in params.items()},
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def remove_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def replacing_output(path):
+    """产出 path 旁边一个同扩展名的临时路径，正常结束后用它替换 path
+
+    出错或取消时删除临时文件，原有的输出保持不变；没有写入任何文件时也不改动 path。
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    stem, ext = os.path.splitext(name)
+    temp_path = os.path.join(directory, f'.{stem}.{uuid.uuid4().hex[:8]}.part{ext}')
+    try:
+        yield temp_path
+        if os.path.exists(temp_path):
+            os.replace(temp_path, path)
+    finally:
+        remove_file(temp_path)
+
+
+def frame_nbytes(frame):
+    width, height = (frame.shape[1], frame.shape[0]) if hasattr(frame, 'shape') else frame.size
+    return width * height * 3
+
+
+class ConversionCache:
+    """结果缓存与帧缓存，总大小不超过 max_bytes"""
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or os.path.join(default_cache_dir(), 'conversions')
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('GIF_CONVERTER_CACHE_BYTES', DEFAULT_CACHE_BYTES))
+        self.max_bytes = max_bytes
+        self.results_dir = os.path.join(self.root, 'results')
+        self.frames_dir = os.path.join(self.root, 'frames')
+        self._lock = threading.Lock()
+
+    def _result_path(self, key, output_path):
+        return os.path.join(self.results_dir, key + os.path.splitext(output_path)[1])
+
+    @staticmethod
+    def _touch(*paths):
+        """更新访问时间，作为 LRU 淘汰的依据"""
+        for path in paths:
+            os.utime(path)
+
+    def fetch_result(self, key, output_path):
+        """命中时把缓存的结果复制到 output_path，返回是否命中"""
+        cached = self._result_path(key, output_path)
+        if not os.path.exists(cached):
+            return False
+        try:
+            self._touch(cached)
+            shutil.copyfile(cached, output_path)
+        except FileNotFoundError:
+            # 条目刚好被其他进程淘汰
+            return False
+        return True
+
+    def store_result(self, key, output_path):
+        """把转换结果加入缓存"""
+        os.makedirs(self.results_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.results_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(output_path, tmp_path)
+            os.replace(tmp_path, self._result_path(key, output_path))
+        finally:
+            remove_file(tmp_path)
+        self.evict()
+
+    def _frames_path(self, key):
+        return os.path.join(self.frames_dir, key + '.frames')
+
+    def load_frames(self, key):
+        """读取缓存的帧，返回只读的 FrameStore；未命中返回 None"""
+        path = self._frames_path(key)
+        try:
+            store = FrameStore(path)
+            self._touch(path)
+        except (OSError, FrameStoreError):
+            return None
+        return store
+
+    def record_frames(self, key, frames):
+        """原样产出帧，同时写入帧缓存
+
+        帧尺寸不一致、不是 RGB、超出单个条目上限，或者没有完整遍历时放弃写入。
+        """
+        os.makedirs(self.frames_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.frames_dir, suffix='.tmp')
+        os.close(fd)
+        writer = FrameStoreWriter(tmp_path)
+        limit = self.max_bytes * FRAME_ENTRY_FRACTION
+        recording = True
+        complete = False
+        try:
+            for frame in frames:
+                if recording:
+                    if writer.accepts(frame) and writer.nbytes + frame_nbytes(frame) <= limit:
+                        writer.append(frame)
+                    else:
+                        recording = False
+                        writer.discard()
+                yield frame
+            complete = True
+        finally:
+            if recording and complete and writer.count:
+                writer.close()
+                os.replace(tmp_path, self._frames_path(key))
+                self.evict()
+            else:
+                writer.discard()
+
+    def _entries(self):
+        """按缓存键分组的条目：{键: [最近使用时间, 总大小, 文件列表]}"""
+        entries = {}
+        for directory in (self.results_dir, self.frames_dir):
+            try:
+                it = os.scandir(directory)
+            except FileNotFoundError:
+                continue
+            with it:
+                for item in it:
+                    if item.name.endswith('.tmp'):
+                        continue
+                    try:
+                        st = item.stat()
+                    except FileNotFoundError:
+                        continue
+                    key = os.path.join(directory, item.name.split('.')[0])
+                    entry = entries.setdefault(key, [0.0, 0, []])
+                    entry[0] = max(entry[0], st.st_mtime)
+                    entry[1] += st.st_size
+                    entry[2].append(item.path)
+        return entries
+
+    def size(self):
+        return sum(entry[1] for entry in self._entries().values())
+
+    def evict(self):
+        """按最近使用时间从旧到新删除条目，直到总大小不超过上限"""
+        with self._lock:
+            entries = sorted(self._entries().values())
+            total = sum(entry[1] for entry in entries)
+            for _, entry_size, paths in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in paths:
+                    remove_file(path)
+                total -= entry_size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ConversionCache()
+    return _default_cache
+
+
+def cached_images(frames):
+    """把缓存的帧数组逐个包装为 PIL 图像"""
+    for frame in frames:
+        yield Image.fromarray(frame)
@@ -0,0 +1,77 @@
+import numpy as np
+from PIL import Image
+
+
+# 感知哈希的网格边长
+HASH_SIZE = 16
+
+
+def frame_signature(frame, hash_size=HASH_SIZE):
+    """把帧缩小为 hash_size×hash_size 的灰度图，作为感知哈希"""
+    if isinstance(frame, np.ndarray):
+        frame = Image.fromarray(np.ascontiguousarray(frame, dtype=np.uint8))
+    small = frame.convert('L').resize((hash_size, hash_size), Image.BOX)
+    return np.asarray(small, dtype=np.float32)
+
+
+def frames_equal(a, b):
+    """逐像素比较两帧是否完全相同"""
+    if not isinstance(a, np.ndarray):
+        a = np.asarray(a)
+    if not isinstance(b, np.ndarray):
+        b = np.asarray(b)
+    return a.shape == b.shape and np.array_equal(a, b)
+
+
+class FrameDeduplicator:
+    """丢弃与上一保留帧相同或近似的帧，把它们的时长合并到保留帧上
+
+    threshold 为 0 时只合并完全相同的帧；大于 0 时按感知哈希各网格的
+    最大灰度差（占 255 的百分比）判断是否近似。
+    """
+
+    def __init__(self, threshold=0.0, hash_size=HASH_SIZE, stats=None):
+        self.threshold = threshold
+        self.hash_size = hash_size
+        self.stats = stats
+        self.frames_in = 0
+        self.frames_dropped = 0
+        self.merged_ms = 0.0
+
+    def is_duplicate(self, kept, kept_signature, frame):
+        if self.threshold <= 0:
+            return frames_equal(kept, frame), None
+        signature = frame_signature(frame, self.hash_size)
+        # 取各网格的最大差异，避免画面中小区域的变化被整体平均掉
+        difference = float(np.max(np.abs(signature - kept_signature))) / 255.0 * 100.0
+        return difference <= self.threshold, signature
+
+    def dedup(self, frames, duration_ms):
+        """输入帧迭代器，产出 (帧, 时长) 对"""
+        kept = None
+        kept_signature = None
+        kept_duration = 0.0
+        for frame in frames:
+            self.frames_in += 1
+            if kept is not None:
+                duplicate, signature = self.is_duplicate(kept, kept_signature, frame)
+                if duplicate:
+                    kept_duration += duration_ms
+                    self.frames_dropped += 1
+                    self.merged_ms += duration_ms
+                    if self.stats:
+                        self.stats.frames_dropped += 1
+                    continue
+                yield kept, kept_duration
+            else:
+                signature = frame_signature(frame, self.hash_size) if self.threshold > 0 else None
+            kept, kept_signature, kept_duration = frame, signature, duration_ms
+        if kept is not None:
+            yield kept, kept_duration
+
+
+def timed_frames(frames, duration_ms, threshold=None, stats=None):
+    """给帧配上时长；threshold 不为 None 时先去除重复帧"""
+    if threshold is None:
+        return ((frame, duration_ms) for frame in frames)
+    return FrameDeduplicator(threshold, stats=stats).dedup(frames, duration_ms)
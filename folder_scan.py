@@ -0,0 +1,108 @@
+"""列出和监视图片文件夹
+
+一次 os.scandir 遍历列出图片（扩展名不区分大小写），按预编译的自然排序键排序；
+FolderWatcher 增量发现采集设备陆续写入的新帧。不依赖 Pillow，界面启动时可以直接导入。
+"""
+import bisect
+import os
+import re
+
+# 支持的图片扩展名（小写）
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+_DIGITS = re.compile(r'\d+')
+
+
+def _encode_number(match):
+    # 数字部分编码为 \0 + 位数 + 去掉前导零的数字：\0 小于任何文本字符，位数少的数值小，
+    # 位数相同时按数字逐位比较，与按整数比较的顺序一致
+    digits = match.group().lstrip('0')
+    return '\0' + chr(len(digits)) + digits
+
+
+def natural_sort_key(s):
+    """自然排序键：数字部分按数值比较，其余部分不区分大小写
+
+    返回一个字符串，排序时只做字符串比较，比逐段比较列表快得多。
+    """
+    return _DIGITS.sub(_encode_number, s.lower())
+
+
+def is_image_name(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def scan_image_names(dir_path):
+    """一次遍历列出文件夹中的图片文件名（不排序）"""
+    names = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            # 先判断扩展名；is_file() 通常直接使用目录项中的类型，不需要额外的 stat
+            if is_image_name(entry.name) and entry.is_file():
+                names.append(entry.name)
+    return names
+
+
+def list_image_files(dir_path):
+    """列出文件夹中的 JPG/PNG 图片，按自然顺序排序"""
+    # 同一文件夹中只需按文件名排序，不必为每个路径的目录部分生成排序键
+    names = sorted(scan_image_names(dir_path), key=natural_sort_key)
+    return [os.path.join(dir_path, name) for name in names]
+
+
+class FolderWatcher:
+    """增量监视文件夹中新写入的图片
+
+    poll() 返回自上次以来新出现且已写完的图片路径（按自然顺序）。文件夹的修改时间不变时不重新遍历；
+    新文件的大小连续两次检查都不变才认为写完，避免读到采集设备正在写入的帧。
+    """
+
+    def __init__(self, dir_path, known=()):
+        self.dir_path = dir_path
+        self.known = {os.path.basename(path) for path in known}  # 已报告的文件名
+        self.pending = {}  # 正在写入的文件名 -> 上次检查时的大小
+        self.dir_mtime = None
+
+    def poll(self):
+        mtime = os.stat(self.dir_path).st_mtime_ns
+        if mtime == self.dir_mtime and not self.pending:
+            return []
+        self.dir_mtime = mtime
+
+        ready = []
+        pending = {}
+        for name in scan_image_names(self.dir_path):
+            if name in self.known:
+                continue
+            try:
+                size = os.stat(os.path.join(self.dir_path, name)).st_size
+            except FileNotFoundError:
+                continue
+            if size and self.pending.get(name) == size:
+                ready.append(name)
+            else:
+                pending[name] = size
+        self.pending = pending
+        self.known.update(ready)
+        ready.sort(key=natural_sort_key)
+        return [os.path.join(self.dir_path, name) for name in ready]
+
+
+def merge_sorted_paths(paths, new_paths):
+    """把按自然顺序排好的 new_paths 并入已排序的 paths（原地修改）
+
+    新帧通常排在最后，直接追加；否则逐个二分插入。
+    """
+    if not new_paths:
+        return paths
+    key = lambda path: natural_sort_key(os.path.basename(path))
+    if not paths or key(paths[-1]) <= key(new_paths[0]):
+        paths.extend(new_paths)
+        return paths
+    keys = [key(path) for path in paths]
+    for path in new_paths:
+        path_key = key(path)
+        index = bisect.bisect_right(keys, path_key)
+        keys.insert(index, path_key)
+        paths.insert(index, path)
+    return paths
@@ -0,0 +1,372 @@
+import os
+import queue
+import re
+import subprocess as sp
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from probe import video_info
+
+
+# 默认预取窗口（帧数），决定流式模式下的峰值内存
+DEFAULT_FRAME_WINDOW = 8
+
+# 视频取帧方式：顺序解码一次 / 按时间点逐帧定位
+SAMPLER_SEQUENTIAL = 'sequential'
+SAMPLER_SEEK = 'seek'
+
+# 提前退出时等待解码线程结束的最长时间（秒）；超时后线程在后台自行退出
+CLOSE_TIMEOUT = 5.0
+
+_END = object()
+
+
+def buffered_frames(frames, window=DEFAULT_FRAME_WINDOW, control=None):
+    """在后台线程中预取帧，最多缓冲 window 帧
+
+    control 为帧源使用的 JobControl：消费方提前退出时取消它，唤醒暂停在 control.check() 中的解码线程。
+    """
+    if window <= 0:
+        yield from frames
+        return
+
+    buffer = queue.Queue(maxsize=window)
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for frame in frames:
+                if stop.is_set():
+                    return
+                buffer.put(frame)
+            buffer.put(_END)
+        except BaseException as e:
+            # 消费方已经退出时没有人取结果
+            if not stop.is_set():
+                buffer.put(e)
+        finally:
+            # 提前结束时立即关闭帧源（例如结束 ffmpeg 进程）
+            close = getattr(frames, 'close', None)
+            if close:
+                close()
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                finished = True
+                break
+            if isinstance(item, BaseException):
+                finished = True
+                raise item
+            yield item
+    finally:
+        if not finished:
+            # 消费方提前退出时让解码线程尽快结束
+            stop.set()
+            if control is not None:
+                control.cancel()
+            # 设置 stop 之后解码线程最多再放入一项，清空一次即可保证它不会阻塞在队列上
+            while True:
+                try:
+                    buffer.get_nowait()
+                except queue.Empty:
+                    break
+        thread.join(CLOSE_TIMEOUT)
+
+
+def crop_frame(frame, crop=None):
+    """按 (左, 上, 宽, 高) 裁剪帧，返回连续的 uint8 数组"""
+    if crop:
+        left, top, width, height = crop
+        frame = frame[top:top + height, left:left + width]
+    return np.ascontiguousarray(frame, dtype=np.uint8)
+
+
+def sample_video_frames(video_clip, fps, stats=None, crop=None):
+    """按 fps 对视频逐个时间点取帧（每帧可能触发一次定位），可按 crop 裁剪"""
+    frame_interval = 1.0 / fps
+    for time_point in np.arange(0, video_clip.duration, frame_interval):
+        start = time.perf_counter()
+        frame = crop_frame(video_clip.get_frame(time_point), crop)
+        if stats:
+            stats.record('seek', start)
+            stats.frames_decoded += 1
+        yield frame
+
+
+# 显示矩阵旋转角度对应的 ffmpeg 滤镜（角度为顺时针，与 rotate 标签一致）
+ROTATION_FILTERS = {
+    90: ['transpose=clock'],
+    180: ['hflip', 'vflip'],
+    270: ['transpose=cclock'],
+}
+
+
+def display_rotation(video_path, ffmpeg_binary=None):
+    """视频流显示矩阵（displaymatrix）的旋转角度，按顺时针返回 0/90/180/270
+
+    ffmpeg 7 把 rotate 标签也转换为显示矩阵，moviepy 只识别旧的 rotate 标签。
+    """
+    popen_params = {"stdin": sp.DEVNULL, "stdout": sp.DEVNULL, "stderr": sp.PIPE}
+    if os.name == "nt":
+        popen_params["creationflags"] = 0x08000000
+    result = sp.run([ffmpeg_binary or get_ffmpeg_binary(), '-hide_banner', '-i', video_path], **popen_params)
+    match = re.search(r"displaymatrix: rotation of (-?[\d.]+) degrees", result.stderr.decode(errors='replace'))
+    # 显示矩阵的角度为逆时针
+    return round(-float(match.group(1)) / 90) % 4 * 90 if match else 0
+
+
+def probe_video(video_path):
+    """只读取容器和视频流的头信息：尺寸、时长、帧率、帧数和旋转角度"""
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    infos = ffmpeg_parse_infos(video_path)
+    width, height = infos['video_size']
+    rotation = infos.get('video_rotation', 0) or display_rotation(video_path)
+    # 与 moviepy 一致：旋转 90/270 度的视频交换宽高
+    if rotation in (90, 270):
+        width, height = height, width
+    return {
+        'size': (width, height),
+        'duration': infos['duration'],
+        'fps': infos['video_fps'],
+        'frame_count': infos.get('video_nframes'),
+        'rotation': rotation,
+    }
+
+
+def read_video_frames(video_path, fps, size=None, stats=None, ffmpeg_binary=None, keyframes_only=False,
+                      crop=None, start=None, end=None, region=None):
+    """ffmpeg 顺序解码一次，由 fps 滤镜抽帧并在解码端完成截取、裁剪和缩放
+
+    start/end 为截取范围（秒）：先定位到 start，解码到 end 为止。
+    region 为原画面上的 (左, 上, 宽, 高)，在缩放之前裁剪；crop 为缩放后画面上的裁剪区域。
+    keyframes_only 为真时只解码并输出全部关键帧（忽略 fps），用于快速取样。
+    旋转由 probe_video 的角度显式完成（关闭 ffmpeg 的自动旋转），输出尺寸与探测结果一致。
+    """
+    info = video_info(video_path)
+    filters = list(ROTATION_FILTERS.get(info['rotation'], []))
+    if fps and not keyframes_only:
+        filters.append(f"fps={fps}")
+    if region:
+        left, top, region_width, region_height = region
+        filters.append(f"crop={region_width}:{region_height}:{left}:{top}")
+    if size:
+        filters.append(f"scale={size[0]}:{size[1]}:flags=lanczos")
+    elif region:
+        size = region[2:]
+    else:
+        size = info['size']
+    if crop:
+        left, top, crop_width, crop_height = crop
+        filters.append(f"crop={crop_width}:{crop_height}:{left}:{top}")
+        size = (crop_width, crop_height)
+    width, height = size
+    frame_bytes = width * height * 3
+
+    cmd = [ffmpeg_binary or get_ffmpeg_binary(), '-loglevel', 'error', '-noautorotate']
+    if start:
+        # 放在 -i 之前：直接定位到 start 附近的关键帧，再精确解码到 start
+        cmd += ['-ss', f"{start:.3f}"]
+    if keyframes_only:
+        cmd += ['-skip_frame', 'nokey', '-i', video_path, '-vsync', 'passthrough']
+    else:
+        cmd += ['-i', video_path]
+    if end is not None:
+        cmd += ['-t', f"{end - (start or 0):.3f}"]
+    if filters:
+        cmd += ['-vf', ','.join(filters)]
+    cmd += ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+
+    # stderr 写入临时文件，避免管道写满导致死锁
+    with tempfile.TemporaryFile() as stderr:
+        popen_params = {"stdin": sp.DEVNULL, "stdout": sp.PIPE, "stderr": stderr}
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000
+        proc = sp.Popen(cmd, bufsize=frame_bytes, **popen_params)
+
+        finished = False
+        try:
+            while True:
+                start = time.perf_counter()
+                data = proc.stdout.read(frame_bytes)
+                if len(data) < frame_bytes:
+                    if data:
+                        raise IOError(f"ffmpeg 输出的数据（{len(data)} 字节）与帧尺寸 {width}x{height} 不符")
+                    finished = True
+                    break
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+                if stats:
+                    stats.record('decode', start)
+                    stats.frames_decoded += 1
+                    stats.count('bytes_read', frame_bytes)
+                yield frame
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+        if finished and proc.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors='replace').strip()
+            raise IOError(message or f"ffmpeg 返回错误码 {proc.returncode}")
+
+
+def read_preview_frame(video_path, time_point, size, ffmpeg_binary=None):
+    """快速读取 time_point 处（或之前最近的关键帧）的一帧，缩放到 size，返回 RGB 原始字节
+
+    只解码一个关键帧，用于拖动预览；不依赖 numpy 的结果，界面可以直接构造 QImage。
+    """
+    width, height = size
+    cmd = [ffmpeg_binary or get_ffmpeg_binary(), '-loglevel', 'error',
+           '-noaccurate_seek', '-ss', f"{max(0.0, time_point):.3f}", '-skip_frame', 'nokey',
+           '-i', video_path, '-frames:v', '1', '-vf', f"scale={width}:{height}",
+           '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+    popen_params = {"stdin": sp.DEVNULL, "stdout": sp.PIPE, "stderr": sp.PIPE}
+    if os.name == "nt":
+        popen_params["creationflags"] = 0x08000000
+    result = sp.run(cmd, **popen_params)
+    if result.returncode != 0 or len(result.stdout) < width * height * 3:
+        raise IOError(result.stderr.decode(errors='replace').strip() or "无法读取预览帧")
+    return result.stdout[:width * height * 3]
+
+
+def checked_frames(frames, control):
+    """每取一帧前调用 control.check()，用于暂停和取消任务；control 为 None 时原样返回"""
+    if control is None:
+        return frames
+    return _checked_frames(frames, control)
+
+
+def _checked_frames(frames, control):
+    try:
+        for frame in frames:
+            control.check()
+            yield frame
+    finally:
+        close = getattr(frames, 'close', None)
+        if close:
+            close()
+
+
+def track_progress(frames, callback):
+    """每取出一帧调用一次 callback(已取出的帧数)"""
+    for count, frame in enumerate(frames, 1):
+        yield frame
+        callback(count)
+
+
+def count_sampled_frames(duration, fps):
+    """计算按 fps 取样时的帧数"""
+    return len(np.arange(0, duration, 1.0 / fps))
+
+
+def get_ffmpeg_binary():
+    """获取 moviepy 使用的 ffmpeg 可执行文件"""
+    from moviepy.config import get_setting
+    return get_setting("FFMPEG_BINARY")
+
+
+class FfmpegPipeWriter:
+    """通过管道把原始 RGB 帧交给 ffmpeg 编码，output_args 为输出文件之前的编码参数"""
+
+    def __init__(self, output_path, size, fps, output_args, ffmpeg_binary=None):
+        self.output_path = output_path
+        self.size = size
+        self.fps = fps
+        self.frame_count = 0
+
+        cmd = [ffmpeg_binary or get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-vcodec', 'rawvideo',
+               '-r', "%.02f" % fps,
+               '-s', "%dx%d" % size,
+               '-pix_fmt', 'rgb24',
+               '-i', '-'] + list(output_args) + [output_path]
+
+        # stderr 写入临时文件，避免管道写满导致死锁
+        self._stderr = tempfile.TemporaryFile()
+        popen_params = {"stdin": sp.PIPE, "stdout": sp.DEVNULL, "stderr": self._stderr}
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000
+        self.proc = sp.Popen(cmd, **popen_params)
+
+    def write_frame(self, frame):
+        if frame.shape[1::-1] != tuple(self.size):
+            raise ValueError(f"帧尺寸 {frame.shape[1::-1]} 与输出尺寸 {tuple(self.size)} 不一致")
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame[:, :, :3], dtype=np.uint8).tobytes())
+        except (BrokenPipeError, OSError):
+            raise IOError(self._read_error() or "ffmpeg 编码进程意外退出")
+        self.frame_count += 1
+
+    def close(self):
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        if self.proc.wait() != 0:
+            raise IOError(self._read_error() or f"ffmpeg 返回错误码 {self.proc.returncode}")
+
+    def abort(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+    def _read_error(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors='replace').strip()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class FfmpegGifWriter(FfmpegPipeWriter):
+    """通过管道把原始 RGB 帧直接交给 ffmpeg 编码为 GIF"""
+
+    def __init__(self, output_path, size, fps, ffmpeg_binary=None):
+        super().__init__(output_path, size, fps, ['-pix_fmt', 'rgb24', '-r', "%.02f" % fps], ffmpeg_binary)
+
+
+def write_gif_stream(frames, output_path, fps, progress=None, stats=None):
+    """把帧迭代器流式写入 GIF，返回写入的帧数"""
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("没有可写入的帧")
+
+    height, width = first.shape[:2]
+    with FfmpegGifWriter(output_path, (width, height), fps) as writer:
+        frame = first
+        while frame is not None:
+            start = time.perf_counter()
+            writer.write_frame(frame)
+            if stats:
+                stats.record('encode', start)
+                stats.frames_encoded += 1
+            if progress:
+                progress(writer.frame_count)
+            frame = next(frames, None)
+        # ffmpeg 在输入结束后才完成最终的 GIF 写出
+        start = time.perf_counter()
+        writer.close()
+        if stats:
+            stats.record('encode', start)
+    return writer.frame_count
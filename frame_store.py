@@ -0,0 +1,131 @@
+"""内存映射的帧存储：一个未压缩文件保存整段固定尺寸的 RGB 帧
+
+文件由 64 字节的头（标识、版本、帧数、高、宽、通道数）和紧随其后的逐帧原始数据组成。
+读取时整体映射为 NxHxWxC 的 numpy.memmap，按下标取帧是零拷贝的视图，可随机访问；
+由操作系统的页缓存决定哪些帧留在内存中。FrameStore 按路径序列化，
+传给工作进程时只传路径，在进程中重新映射，不复制像素数据。
+"""
+import os
+import struct
+
+import numpy as np
+
+
+MAGIC = b'GIFFRAME'
+FORMAT_VERSION = 1
+
+# 标识、版本、帧数、高、宽、通道数；补齐到 64 字节，使帧数据按 64 字节对齐
+_HEADER = struct.Struct('<8sIQIII')
+HEADER_SIZE = 64
+
+
+class FrameStoreError(ValueError):
+    """帧存储文件损坏，或帧的尺寸与已写入的帧不一致"""
+
+
+def frame_array(frame):
+    """把帧转为 HxWx3 的连续 uint8 数组；带透明通道或其他颜色模式的帧返回 None"""
+    if isinstance(frame, np.ndarray):
+        if frame.ndim == 3 and frame.shape[2] == 3:
+            return np.ascontiguousarray(frame, dtype=np.uint8)
+        return None
+    if frame.mode != 'RGB':
+        return None
+    return np.asarray(frame)
+
+
+class FrameStoreWriter:
+    """逐帧追加写入，close() 时写入帧数并返回可读取的 FrameStore"""
+
+    def __init__(self, path):
+        self.path = path
+        self.shape = None
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(bytes(HEADER_SIZE))
+
+    @property
+    def nbytes(self):
+        """已写入的帧数据大小（字节）"""
+        return self.count * (int(np.prod(self.shape)) if self.shape else 0)
+
+    def accepts(self, frame):
+        """frame 能否追加：尺寸与已写入的帧一致且为 RGB"""
+        array = frame_array(frame)
+        return array is not None and (self.shape is None or array.shape == self.shape)
+
+    def append(self, frame):
+        array = frame_array(frame)
+        if array is None:
+            raise FrameStoreError("只能保存 RGB 帧")
+        if self.shape is None:
+            self.shape = array.shape
+        elif array.shape != self.shape:
+            raise FrameStoreError(f"帧尺寸 {array.shape} 与之前的 {self.shape} 不一致")
+        self._file.write(array.data)
+        self.count += 1
+
+    def close(self):
+        """写入文件头并关闭文件，返回 FrameStore（没有写入任何帧时返回 None）"""
+        if self._file.closed:
+            return None
+        height, width, channels = self.shape or (0, 0, 0)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, self.count, height, width, channels))
+        self._file.close()
+        return FrameStore(self.path) if self.count else None
+
+    def discard(self):
+        """放弃写入并删除文件"""
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class FrameStore:
+    """只读的帧序列，store[i] 返回第 i 帧的零拷贝视图"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+            magic, version, count, height, width, channels = _HEADER.unpack(header)
+        except struct.error:
+            raise FrameStoreError(f"帧存储文件不完整：{path}")
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise FrameStoreError(f"不是可识别的帧存储文件：{path}")
+        self.shape = (height, width, channels)
+        expected = HEADER_SIZE + count * height * width * channels
+        if os.path.getsize(path) != expected:
+            raise FrameStoreError(f"帧存储文件大小与文件头不符：{path}")
+        self.frames = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_SIZE,
+                                shape=(count,) + self.shape) if count else np.empty((0,) + self.shape, np.uint8)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def __reduce__(self):
+        # 序列化时只传路径，接收方重新映射文件
+        return FrameStore, (self.path,)
@@ -1,581 +1,351 @@
-import sys
+"""GIF转换器入口
+
+不带参数运行时启动图形界面；带子命令时在命令行下转换，不依赖 PyQt5：
+
+    python gif_converter.py
+    python -m gif_converter video in.mp4 out.gif --fps 10 --size 640x480
+    python -m gif_converter video in.mp4 out.webp --quality 75 --encode-speed small
+    python -m gif_converter images out.gif frames/ --duration 100
+    python -m gif_converter batch jobs.json --jobs 4
+    python -m gif_converter probe in.mp4 --fps 10
+"""
+import argparse
+import json
 import os
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QPushButton, QFileDialog, QComboBox, QSpinBox, 
-                            QTabWidget, QProgressBar, QSlider, QMessageBox, QSplitter, 
-                            QGroupBox, QRadioButton, QLineEdit, QFormLayout, QDoubleSpinBox,
-                            QCheckBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
-from PyQt5.QtGui import QIcon, QPixmap, QFont
-import glob
-import re
-from PIL import Image
-from moviepy.editor import VideoFileClip, ImageSequenceClip
-import numpy as np
-import tempfile
-import shutil
-
-
-class VideoToGifWorker(QThread):
-    progress = pyqtSignal(int)
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-    
-    def __init__(self, video_path, output_path, fps, speed_factor, resize=None):
-        super().__init__()
-        self.video_path = video_path
-        self.output_path = output_path
-        self.fps = fps
-        self.speed_factor = speed_factor
-        self.resize = resize  # 添加尺寸参数
-        self.temp_dir = None
-    
-    def run(self):
-        try:
-            # 创建临时文件夹
-            self.temp_dir = tempfile.mkdtemp()
-            
-            # 加载视频
-            video_clip = VideoFileClip(self.video_path)
-            
-            # 调整尺寸（如果需要）
-            if self.resize and self.resize[0] > 0 and self.resize[1] > 0:
-                video_clip = video_clip.resize(newsize=self.resize)
-            
-            # 计算要捕获的时间点
-            video_duration = video_clip.duration
-            frame_interval = 1.0 / self.fps
-            time_points = np.arange(0, video_duration, frame_interval)
-            total_frames = len(time_points)
-            
-            # 捕获帧
-            frame_paths = []
-            for i, time_point in enumerate(time_points):
-                frame = video_clip.get_frame(time_point)
-                frame_image = Image.fromarray(np.uint8(frame))
-                frame_path = os.path.join(self.temp_dir, f'frame_{i:05d}.png')
-                frame_image.save(frame_path)
-                frame_paths.append(frame_path)
-                
-                # 更新进度
-                progress_value = int((i + 1) / total_frames * 100)
-                self.progress.emit(progress_value)
-            
-            # 创建GIF
-            adjusted_fps = self.fps * self.speed_factor
-            gif_clip = ImageSequenceClip(frame_paths, fps=adjusted_fps)
-            gif_clip.write_gif(self.output_path, program='ffmpeg')
-            
-            # 完成
-            self.finished.emit(self.output_path)
-            
-        except Exception as e:
-            self.error.emit(str(e))
-        finally:
-            # 清理临时文件
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
-
-
-class ImagesToGifWorker(QThread):
-    progress = pyqtSignal(int)
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-    
-    def __init__(self, image_paths, output_path, duration_ms, loop_count, resize=None):
-        super().__init__()
-        self.image_paths = image_paths
-        self.output_path = output_path
-        self.duration_ms = duration_ms
-        self.loop_count = loop_count
-        self.resize = resize  # 添加尺寸参数
-    
-    def run(self):
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from folder_scan import IMAGE_EXTENSIONS, list_image_files, natural_sort_key
+from image_pipeline import default_worker_count
+from options import ENCODE_SPEEDS, OUTPUT_FORMATS, PALETTE_GLOBAL, PALETTE_MODES, RESIZE_MODES, RESIZE_STRETCH
+
+
+JOB_VIDEO = 'video'
+JOB_IMAGES = 'images'
+
+
+def parse_size(text):
+    """解析 '640x480' 形式的尺寸"""
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"尺寸格式应为 宽x高，例如 640x480：{text}")
+    return width, height
+
+
+def parse_time(text):
+    """解析秒数或 [时:]分:秒 形式的时间，例如 90、1:30、0:01:30.5"""
+    try:
+        seconds = 0.0
+        for part in text.split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"时间格式应为秒数或 分:秒，例如 90 或 1:30：{text}")
+    return seconds
+
+
+def parse_crop(text):
+    """解析 '宽x高+左+上' 形式的裁剪区域，例如 1280x720+640+360，返回 (左, 上, 宽, 高)"""
+    try:
+        size, left, top = text.split('+')
+        width, height = parse_size(size)
+        return int(left), int(top), width, height
+    except (ValueError, argparse.ArgumentTypeError):
+        raise argparse.ArgumentTypeError(f"裁剪区域格式应为 宽x高+左+上，例如 1280x720+640+360：{text}")
+
+
+def parse_bytes(text):
+    """解析文件大小，例如 8M、500K、1.5MB 或字节数"""
+    units = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    value = text.strip().upper().removesuffix('B').removesuffix('I')
+    unit = value[-1:] if value[-1:] in units else ''
+    try:
+        size = int(float(value[:len(value) - len(unit)]) * units[unit])
+    except ValueError:
+        size = 0
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"文件大小格式应为数字加 K/M 单位，例如 8M：{text}")
+    return size
+
+
+def parse_color(text):
+    """解析 '#rrggbb' 或 'r,g,b' 形式的颜色，返回 (r, g, b)"""
+    try:
+        if text.startswith('#') and len(text) == 7:
+            color = tuple(int(text[i:i + 2], 16) for i in (1, 3, 5))
+        else:
+            color = tuple(int(v) for v in text.split(','))
+        if len(color) != 3 or not all(0 <= v <= 255 for v in color):
+            raise ValueError(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"颜色格式应为 #rrggbb 或 r,g,b，例如 #ffffff：{text}")
+    return color
+
+
+def expand_image_inputs(inputs):
+    """展开命令行中的图片参数：文件夹按自然顺序列出图片，文件原样保留"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += list_image_files(item)
+        else:
+            paths.append(item)
+    return paths
+
+
+def run_job(job, progress=None):
+    """执行一个转换任务（字典形式），返回耗时统计"""
+    from cache import get_default_cache
+    from gif_core import ImagesToGifConverter, VideoToGifConverter
+    from options import FORMAT_GIF
+    from output_formats import format_for_path
+    from size_budget import TargetSizeVideoConverter
+
+    job = dict(job)
+    kind = job.pop('type')
+    # 转换结束后导出性能统计（JSON）和 Chrome trace 文件
+    stats_json = job.pop('stats_json', None)
+    trace = job.pop('trace', None)
+    # 默认使用结果缓存和帧缓存，任务中 "cache": false 时关闭
+    job['cache'] = get_default_cache() if job.pop('cache', True) else None
+    for key in ('resize', 'crop', 'background'):
+        if job.get(key):
+            job[key] = tuple(job[key])
+
+    # 未指定输出格式时按输出文件的扩展名判断
+    if not job.get('output_format'):
+        job['output_format'] = format_for_path(job['output'])
+    target_bytes = job.pop('target_bytes', None)
+    if target_bytes and job['output_format'] != FORMAT_GIF:
+        raise ValueError("目标文件大小只支持 GIF 输出")
+    if kind == JOB_VIDEO and target_bytes:
+        # 按目标文件大小选择帧率、尺寸和颜色数，fps 和 resize 为上限
+        converter = TargetSizeVideoConverter(job.pop('input'), job.pop('output'), target_bytes,
+                                             job.pop('fps', 10), job.pop('speed_factor', 1.0),
+                                             progress=progress, **job)
+    elif kind == JOB_VIDEO:
+        converter = VideoToGifConverter(job.pop('input'), job.pop('output'), job.pop('fps', 10),
+                                        job.pop('speed_factor', 1.0), progress=progress, **job)
+    elif kind == JOB_IMAGES:
+        inputs = job.pop('inputs')
+        image_paths = expand_image_inputs([inputs] if isinstance(inputs, str) else inputs)
+        if job.pop('sort', True):
+            image_paths = sorted(image_paths, key=natural_sort_key)
+        converter = ImagesToGifConverter(image_paths, job.pop('output'), job.pop('duration_ms', 500),
+                                         job.pop('loop_count', 0), progress=progress, **job)
+    else:
+        raise ValueError(f"未知的任务类型：{kind}")
+    stats = converter.run()
+    if stats_json:
+        stats.write_json(stats_json)
+    if trace:
+        stats.write_trace(trace)
+    return stats
+
+
+def _run_job_in_pool(job):
+    stats = run_job(job)
+    return stats.summary()
+
+
+def load_manifest(path):
+    """读取任务清单：JSON 列表、{"jobs": [...]} 或每行一个 JSON 的 .jsonl"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            jobs = data['jobs'] if isinstance(data, dict) else data
+
+    # 相对路径以清单文件所在目录为基准
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return p if os.path.isabs(p) else os.path.join(base_dir, p)
+
+    for job in jobs:
+        for key in ('input', 'output', 'stats_json', 'trace'):
+            if key in job:
+                job[key] = resolve(job[key])
+        if 'inputs' in job:
+            inputs = job['inputs']
+            job['inputs'] = resolve(inputs) if isinstance(inputs, str) else [resolve(p) for p in inputs]
+    return jobs
+
+
+def run_batch(jobs, max_workers):
+    """在进程池中并发执行多个任务，返回失败的任务数"""
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_run_job_in_pool, job): job for job in jobs}
+        for future in as_completed(futures):
+            output = futures[future]['output']
+            try:
+                print(f"完成 {output}：{future.result()}")
+            except Exception as e:
+                failures += 1
+                print(f"失败 {output}：{e}", file=sys.stderr)
+    return failures
+
+
+def print_probe(args):
+    """打印每个输入的元数据和预计输出；图片文件和文件夹合并为一个序列"""
+    from probe import (describe_estimate, estimate_images_output, estimate_video_output,
+                       image_info, video_info)
+
+    image_paths = []
+    for item in args.inputs:
+        if os.path.isdir(item) or os.path.splitext(item)[1].lower() in IMAGE_EXTENSIONS:
+            image_paths += expand_image_inputs([item])
+            continue
+        info = video_info(item)
+        width, height = info['size']
+        print(f"{item}：{width}×{height}，{info['duration']:.2f} 秒，{info['fps']:g} fps，"
+              f"{info['frame_count']} 帧，旋转 {info['rotation']}°")
+        estimate = estimate_video_output(info, args.fps, args.speed, args.size, args.resize_mode,
+                                         args.start, args.end, args.crop)
+        print("  " + describe_estimate(estimate))
+    if image_paths:
+        info = image_info(image_paths[0])
+        width, height = info['size']
+        print(f"{len(image_paths)} 张图片，首张 {width}×{height} {info['mode']} {info['format']}")
+        print("  " + describe_estimate(estimate_images_output(image_paths, info, args.duration, args.size)))
+
+
+def print_progress(value):
+    sys.stderr.write(f"\r进度 {value:3d}%")
+    sys.stderr.flush()
+
+
+def add_common_options(parser):
+    parser.add_argument('--size', type=parse_size, help='输出尺寸，例如 640x480')
+    parser.add_argument('--resize-mode', choices=RESIZE_MODES, default=RESIZE_STRETCH,
+                        help='缩放方式：拉伸 / 保持比例缩放到尺寸之内 / 保持比例填满后居中裁剪')
+    parser.add_argument('--palette', choices=PALETTE_MODES, default=PALETTE_GLOBAL,
+                        help='调色板模式')
+    parser.add_argument('--colors', type=int, choices=range(2, 257), default=256, metavar='N',
+                        help='共享调色板的颜色数（2~256）')
+    parser.add_argument('--dither', action='store_true', help='使用有序抖动')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                        help='输出格式；不指定时按输出文件的扩展名判断（.webp / .png / .apng / .mp4，其余为 GIF）')
+    parser.add_argument('--quality', type=int, choices=range(0, 101), metavar='0-100',
+                        help='WebP、MP4 的画质（默认 80）')
+    parser.add_argument('--encode-speed', choices=ENCODE_SPEEDS,
+                        help='WebP、APNG、MP4 的编码速度：fast 最快，small 文件最小（默认 balanced）')
+    parser.add_argument('--no-optimize', action='store_true', help='关闭帧间差分优化')
+    parser.add_argument('--encode-workers', type=int, default=1, metavar='N',
+                        help='内置 GIF 编码器的并行进程数（输出与单进程相同，默认 1）')
+    parser.add_argument('--dedup', type=float, metavar='TOLERANCE',
+                        help='合并重复帧，容差为百分比（0 表示只合并完全相同的帧）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用也不写入转换缓存')
+    parser.add_argument('--cache-frames', action='store_true',
+                        help='把解码后的帧（未压缩）写入帧缓存，之后只改时间设置时跳过解码')
+    parser.add_argument('--stats-json', metavar='PATH', help='把分阶段耗时、字节数和峰值内存写入 JSON 文件')
+    parser.add_argument('--trace', metavar='PATH', help='写出 Chrome trace 文件（chrome://tracing、Perfetto 可打开）')
+
+
+def add_clip_options(parser):
+    parser.add_argument('--start', type=parse_time, help='截取的开始时间（秒或 分:秒）')
+    parser.add_argument('--end', type=parse_time, help='截取的结束时间（秒或 分:秒）')
+    parser.add_argument('--crop', type=parse_crop, metavar='WxH+X+Y', help='在缩放之前裁剪原画面的区域')
+
+
+def common_job_options(args):
+    return {
+        'resize': args.size,
+        'resize_mode': args.resize_mode,
+        'palette_mode': args.palette,
+        'dither': args.dither,
+        'colors': args.colors,
+        'output_format': args.format,
+        'quality': args.quality,
+        'speed': args.encode_speed,
+        'optimize': not args.no_optimize,
+        'encode_workers': args.encode_workers,
+        'dedup_threshold': args.dedup,
+        'cache': not args.no_cache,
+        'cache_frames': args.cache_frames,
+        'stats_json': args.stats_json,
+        'trace': args.trace,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='gif_converter', description='把视频或图片序列转换为 GIF（或 WebP、APNG、MP4）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    video = subparsers.add_parser(JOB_VIDEO, help='视频转 GIF')
+    video.add_argument('input', help='输入视频')
+    video.add_argument('output', help='输出文件（GIF、WebP、APNG 或 MP4）')
+    video.add_argument('--fps', type=int, default=10, help='帧率')
+    video.add_argument('--speed', type=float, default=1.0, help='速度倍数')
+    video.add_argument('--encoder', choices=('ffmpeg', 'native'), default='ffmpeg',
+                       help='逐帧调色板时使用的编码器')
+    video.add_argument('--target-size', type=parse_bytes, metavar='SIZE',
+                       help='目标文件大小，例如 8M；自动选择不超过 --fps 和 --size 的帧率、尺寸和颜色数')
+    add_clip_options(video)
+    add_common_options(video)
+
+    images = subparsers.add_parser(JOB_IMAGES, help='图片序列转 GIF')
+    images.add_argument('output', help='输出文件（GIF、WebP、APNG 或 MP4）')
+    images.add_argument('inputs', nargs='+', help='图片文件或文件夹')
+    images.add_argument('--duration', type=int, default=500, help='每帧持续时间（毫秒）')
+    images.add_argument('--loop', type=int, default=0, help='循环次数，0 表示无限循环')
+    images.add_argument('--workers', type=int, default=default_worker_count(), help='并行解码数')
+    images.add_argument('--background', type=parse_color, default=(255, 255, 255), metavar='COLOR',
+                        help='透明像素合成和尺寸不一致时补边的背景色（#rrggbb 或 r,g,b，默认白色）')
+    add_common_options(images)
+
+    probe = subparsers.add_parser('probe', help='读取视频或图片信息并估算输出')
+    probe.add_argument('inputs', nargs='+', help='视频、图片文件或图片文件夹')
+    probe.add_argument('--fps', type=int, default=10, help='视频帧率')
+    probe.add_argument('--speed', type=float, default=1.0, help='视频速度倍数')
+    probe.add_argument('--duration', type=int, default=500, help='图片每帧持续时间（毫秒）')
+    probe.add_argument('--size', type=parse_size, help='输出尺寸，例如 640x480')
+    probe.add_argument('--resize-mode', choices=RESIZE_MODES, default=RESIZE_STRETCH, help='缩放方式')
+    add_clip_options(probe)
+
+    batch = subparsers.add_parser('batch', help='按任务清单批量转换')
+    batch.add_argument('manifest', help='任务清单（.json 或 .jsonl）')
+    batch.add_argument('--jobs', type=int, default=default_worker_count(), help='同时执行的任务数')
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        from gif_gui import run_gui
+        return run_gui()
+
+    args = build_parser().parse_args(argv)
+    if args.command == 'batch':
+        return 1 if run_batch(load_manifest(args.manifest), args.jobs) else 0
+    if args.command == 'probe':
         try:
-            total_images = len(self.image_paths)
-            frames = []
-            
-            for i, img_path in enumerate(self.image_paths):
-                img = Image.open(img_path)
-                
-                # 调整尺寸（如果需要）
-                if self.resize and self.resize[0] > 0 and self.resize[1] > 0:
-                    img = img.resize(self.resize, Image.LANCZOS)
-                
-                frames.append(img)
-                
-                # 更新进度
-                progress_value = int((i + 1) / total_images * 100)
-                self.progress.emit(progress_value)
-            
-            # 保存为GIF
-            if frames:
-                frames[0].save(
-                    self.output_path,
-                    save_all=True,
-                    append_images=frames[1:],
-                    duration=self.duration_ms,
-                    loop=self.loop_count
-                )
-            
-            # 完成
-            self.finished.emit(self.output_path)
-            
+            print_probe(args)
         except Exception as e:
-            self.error.emit(str(e))
-
-
-class GifConverterApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("GIF转换器")
-        self.setMinimumSize(800, 600)
-        
-        # 设置应用图标
-        self.setWindowIcon(QIcon("app_icon.svg"))
-        
-        # 初始化UI
-        self.init_ui()
-    
-    def init_ui(self):
-        # 创建主窗口部件
-        main_widget = QWidget()
-        main_layout = QVBoxLayout(main_widget)
-        main_layout.setContentsMargins(20, 20, 20, 20)
-        main_layout.setSpacing(15)
-        
-        # 创建标签
-        title_label = QLabel("GIF转换器")
-        title_label.setAlignment(Qt.AlignCenter)
-        title_label.setFont(QFont("Arial", 20, QFont.Bold))
-        main_layout.addWidget(title_label)
-        
-        # 创建标签页
-        tabs = QTabWidget()
-        tabs.setStyleSheet("QTabBar::tab { height: 30px; width: 120px; }")
-        
-        # 视频转GIF标签页
-        video_tab = QWidget()
-        video_layout = QVBoxLayout(video_tab)
-        video_layout.setContentsMargins(10, 10, 10, 10)
-        video_layout.setSpacing(10)
-        
-        # 视频选择部分
-        video_file_group = QGroupBox("视频文件")
-        video_file_layout = QFormLayout()
-        video_file_layout.setLabelAlignment(Qt.AlignLeft)
-        
-        self.video_path_edit = QLineEdit()
-        self.video_path_edit.setReadOnly(True)
-        self.video_browse_btn = QPushButton("浏览...")
-        self.video_browse_btn.setStyleSheet("padding: 5px;")
-        self.video_browse_btn.clicked.connect(self.browse_video)
-        
-        video_path_layout = QHBoxLayout()
-        video_path_layout.addWidget(self.video_path_edit)
-        video_path_layout.addWidget(self.video_browse_btn)
-        
-        video_file_layout.addRow("选择视频:", video_path_layout)
-        video_file_group.setLayout(video_file_layout)
-        video_layout.addWidget(video_file_group)
-        
-        # 视频转换设置
-        video_settings_group = QGroupBox("转换设置")
-        video_settings_layout = QFormLayout()
-        video_settings_layout.setLabelAlignment(Qt.AlignLeft)
-        
-        self.video_fps_spin = QSpinBox()
-        self.video_fps_spin.setRange(1, 30)
-        self.video_fps_spin.setValue(10)
-        video_settings_layout.addRow("帧率 (FPS):", self.video_fps_spin)
-        
-        self.video_speed_spin = QDoubleSpinBox()
-        self.video_speed_spin.setRange(0.1, 10.0)
-        self.video_speed_spin.setValue(1.0)
-        self.video_speed_spin.setSingleStep(0.1)
-        video_settings_layout.addRow("速度倍数:", self.video_speed_spin)
-        
-        # 添加尺寸设置
-        size_layout = QHBoxLayout()
-        
-        self.video_resize_check = QCheckBox("调整尺寸")
-        self.video_resize_check.setChecked(False)
-        size_layout.addWidget(self.video_resize_check)
-        
-        self.video_width_spin = QSpinBox()
-        self.video_width_spin.setRange(10, 3840)
-        self.video_width_spin.setValue(640)
-        self.video_width_spin.setEnabled(False)
-        size_layout.addWidget(QLabel("宽:"))
-        size_layout.addWidget(self.video_width_spin)
-        
-        self.video_height_spin = QSpinBox()
-        self.video_height_spin.setRange(10, 2160)
-        self.video_height_spin.setValue(480)
-        self.video_height_spin.setEnabled(False)
-        size_layout.addWidget(QLabel("高:"))
-        size_layout.addWidget(self.video_height_spin)
-        
-        # 连接复选框事件
-        self.video_resize_check.toggled.connect(self.video_width_spin.setEnabled)
-        self.video_resize_check.toggled.connect(self.video_height_spin.setEnabled)
-        
-        video_settings_layout.addRow("尺寸设置:", size_layout)
-        
-        video_settings_group.setLayout(video_settings_layout)
-        video_layout.addWidget(video_settings_group)
-        
-        # 视频输出设置
-        video_output_group = QGroupBox("输出设置")
-        video_output_layout = QFormLayout()
-        video_output_layout.setLabelAlignment(Qt.AlignLeft)
-        
-        self.video_output_edit = QLineEdit()
-        self.video_output_edit.setReadOnly(True)
-        self.video_output_btn = QPushButton("浏览...")
-        self.video_output_btn.setStyleSheet("padding: 5px;")
-        self.video_output_btn.clicked.connect(self.browse_video_output)
-        
-        video_output_path_layout = QHBoxLayout()
-        video_output_path_layout.addWidget(self.video_output_edit)
-        video_output_path_layout.addWidget(self.video_output_btn)
-        
-        video_output_layout.addRow("输出GIF:", video_output_path_layout)
-        video_output_group.setLayout(video_output_layout)
-        video_layout.addWidget(video_output_group)
-        
-        # 视频转换按钮和进度条
-        self.video_progress = QProgressBar()
-        self.video_progress.setTextVisible(False)
-        video_layout.addWidget(self.video_progress)
-        
-        self.video_convert_btn = QPushButton("开始转换")
-        self.video_convert_btn.setStyleSheet("padding: 10px; font-size: 16px;")
-        self.video_convert_btn.clicked.connect(self.convert_video_to_gif)
-        video_layout.addWidget(self.video_convert_btn)
-        
-        # 图片转GIF标签页
-        image_tab = QWidget()
-        image_layout = QVBoxLayout(image_tab)
-        image_layout.setContentsMargins(10, 10, 10, 10)
-        image_layout.setSpacing(10)
-        
-        # 图片选择部分
-        image_file_group = QGroupBox("图片文件")
-        image_file_layout = QVBoxLayout()
-        
-        self.image_dir_edit = QLineEdit()
-        self.image_dir_edit.setReadOnly(True)
-        self.image_dir_btn = QPushButton("选择文件夹...")
-        self.image_dir_btn.setStyleSheet("padding: 5px;")
-        self.image_dir_btn.clicked.connect(self.browse_image_dir)
-        
-        self.image_files_btn = QPushButton("选择多个文件...")
-        self.image_files_btn.setStyleSheet("padding: 5px;")
-        self.image_files_btn.clicked.connect(self.browse_image_files)
-        
-        image_path_layout = QHBoxLayout()
-        image_path_layout.addWidget(self.image_dir_edit)
-        image_path_layout.addWidget(self.image_dir_btn)
-        image_path_layout.addWidget(self.image_files_btn)
-        
-        image_file_layout.addLayout(image_path_layout)
-        
-        self.image_count_label = QLabel("已选择 0 个图片文件")
-        image_file_layout.addWidget(self.image_count_label)
-        
-        image_file_group.setLayout(image_file_layout)
-        image_layout.addWidget(image_file_group)
-        
-        # 图片转换设置
-        image_settings_group = QGroupBox("转换设置")
-        image_settings_layout = QFormLayout()
-        image_settings_layout.setLabelAlignment(Qt.AlignLeft)
-        
-        self.image_duration_spin = QSpinBox()
-        self.image_duration_spin.setRange(50, 5000)
-        self.image_duration_spin.setValue(500)
-        self.image_duration_spin.setSingleStep(50)
-        image_settings_layout.addRow("每帧持续时间 (毫秒):", self.image_duration_spin)
-        
-        self.image_loop_spin = QSpinBox()
-        self.image_loop_spin.setRange(0, 100)
-        self.image_loop_spin.setValue(0)
-        self.image_loop_spin.setSpecialValueText("无限循环")
-        image_settings_layout.addRow("循环次数:", self.image_loop_spin)
-        
-        # 添加尺寸设置
-        img_size_layout = QHBoxLayout()
-        
-        self.image_resize_check = QCheckBox("调整尺寸")
-        self.image_resize_check.setChecked(False)
-        img_size_layout.addWidget(self.image_resize_check)
-        
-        self.image_width_spin = QSpinBox()
-        self.image_width_spin.setRange(10, 3840)
-        self.image_width_spin.setValue(800)
-        self.image_width_spin.setEnabled(False)
-        img_size_layout.addWidget(QLabel("宽:"))
-        img_size_layout.addWidget(self.image_width_spin)
-        
-        self.image_height_spin = QSpinBox()
-        self.image_height_spin.setRange(10, 2160)
-        self.image_height_spin.setValue(600)
-        self.image_height_spin.setEnabled(False)
-        img_size_layout.addWidget(QLabel("高:"))
-        img_size_layout.addWidget(self.image_height_spin)
-        
-        # 连接复选框事件
-        self.image_resize_check.toggled.connect(self.image_width_spin.setEnabled)
-        self.image_resize_check.toggled.connect(self.image_height_spin.setEnabled)
-        
-        image_settings_layout.addRow("尺寸设置:", img_size_layout)
-        
-        image_settings_group.setLayout(image_settings_layout)
-        image_layout.addWidget(image_settings_group)
-        
-        # 图片输出设置
-        image_output_group = QGroupBox("输出设置")
-        image_output_layout = QFormLayout()
-        image_output_layout.setLabelAlignment(Qt.AlignLeft)
-        
-        self.image_output_edit = QLineEdit()
-        self.image_output_edit.setReadOnly(True)
-        self.image_output_btn = QPushButton("浏览...")
-        self.image_output_btn.setStyleSheet("padding: 5px;")
-        self.image_output_btn.clicked.connect(self.browse_image_output)
-        
-        image_output_path_layout = QHBoxLayout()
-        image_output_path_layout.addWidget(self.image_output_edit)
-        image_output_path_layout.addWidget(self.image_output_btn)
-        
-        image_output_layout.addRow("输出GIF:", image_output_path_layout)
-        image_output_group.setLayout(image_output_layout)
-        image_layout.addWidget(image_output_group)
-        
-        # 图片转换按钮和进度条
-        self.image_progress = QProgressBar()
-        self.image_progress.setTextVisible(False)
-        image_layout.addWidget(self.image_progress)
-        
-        self.image_convert_btn = QPushButton("开始转换")
-        self.image_convert_btn.setStyleSheet("padding: 10px; font-size: 16px;")
-        self.image_convert_btn.clicked.connect(self.convert_images_to_gif)
-        image_layout.addWidget(self.image_convert_btn)
-        
-        # 添加标签页
-        tabs.addTab(video_tab, "视频转GIF")
-        tabs.addTab(image_tab, "图片转GIF")
-        main_layout.addWidget(tabs)
-        
-        # 设置主窗口
-        self.setCentralWidget(main_widget)
-        
-        # 初始化变量
-        self.selected_image_paths = []
-        self.video_worker = None
-        self.image_worker = None
-    
-    def browse_video(self):
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "选择视频文件", "", "视频文件 (*.mp4 *.avi *.mov *.mkv);;所有文件 (*)"
-        )
-        if file_path:
-            self.video_path_edit.setText(file_path)
-            
-            # 自动设置输出路径
-            output_path = os.path.splitext(file_path)[0] + ".gif"
-            self.video_output_edit.setText(output_path)
-            
-            # 获取视频原始尺寸并设置到尺寸控件中
-            try:
-                video = VideoFileClip(file_path)
-                width, height = video.size
-                self.video_width_spin.setValue(width)
-                self.video_height_spin.setValue(height)
-                video.close()
-            except:
-                pass
-    
-    def browse_video_output(self):
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "保存GIF", "", "GIF文件 (*.gif);;所有文件 (*)"
-        )
-        if file_path:
-            if not file_path.lower().endswith('.gif'):
-                file_path += '.gif'
-            self.video_output_edit.setText(file_path)
-    
-    def browse_image_dir(self):
-        dir_path = QFileDialog.getExistingDirectory(self, "选择图片文件夹")
-        if dir_path:
-            self.image_dir_edit.setText(dir_path)
-            
-            # 获取文件夹中的所有图片文件
-            image_files = glob.glob(os.path.join(dir_path, '*.jpg'))
-            image_files += glob.glob(os.path.join(dir_path, '*.jpeg'))
-            image_files += glob.glob(os.path.join(dir_path, '*.png'))
-            
-            # 自然排序
-            self.selected_image_paths = sorted(image_files, key=self.natural_sort_key)
-            self.image_count_label.setText(f"已选择 {len(self.selected_image_paths)} 个图片文件")
-            
-            # 自动设置输出路径
-            if self.selected_image_paths:
-                output_dir = os.path.dirname(self.selected_image_paths[0])
-                output_path = os.path.join(output_dir, "output.gif")
-                self.image_output_edit.setText(output_path)
-                
-                # 获取第一张图片尺寸并设置到尺寸控件
-                try:
-                    img = Image.open(self.selected_image_paths[0])
-                    width, height = img.size
-                    self.image_width_spin.setValue(width)
-                    self.image_height_spin.setValue(height)
-                    img.close()
-                except:
-                    pass
-    
-    def browse_image_files(self):
-        file_paths, _ = QFileDialog.getOpenFileNames(
-            self, "选择图片文件", "", "图片文件 (*.jpg *.jpeg *.png);;所有文件 (*)"
-        )
-        if file_paths:
-            # 设置第一个文件的目录作为显示路径
-            if file_paths:
-                self.image_dir_edit.setText(os.path.dirname(file_paths[0]) + "/ (多个文件)")
-            
-            # 自然排序
-            self.selected_image_paths = sorted(file_paths, key=self.natural_sort_key)
-            self.image_count_label.setText(f"已选择 {len(self.selected_image_paths)} 个图片文件")
-            
-            # 自动设置输出路径
-            if self.selected_image_paths:
-                output_dir = os.path.dirname(self.selected_image_paths[0])
-                output_path = os.path.join(output_dir, "output.gif")
-                self.image_output_edit.setText(output_path)
-                
-                # 获取第一张图片尺寸并设置到尺寸控件
-                try:
-                    img = Image.open(self.selected_image_paths[0])
-                    width, height = img.size
-                    self.image_width_spin.setValue(width)
-                    self.image_height_spin.setValue(height)
-                    img.close()
-                except:
-                    pass
-    
-    def browse_image_output(self):
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "保存GIF", "", "GIF文件 (*.gif);;所有文件 (*)"
-        )
-        if file_path:
-            if not file_path.lower().endswith('.gif'):
-                file_path += '.gif'
-            self.image_output_edit.setText(file_path)
-    
-    def convert_video_to_gif(self):
-        video_path = self.video_path_edit.text()
-        output_path = self.video_output_edit.text()
-        
-        if not video_path or not output_path:
-            QMessageBox.warning(self, "错误", "请选择视频文件和输出路径")
-            return
-        
-        # 获取设置
-        fps = self.video_fps_spin.value()
-        speed_factor = self.video_speed_spin.value()
-        
-        # 获取尺寸设置
-        resize = None
-        if self.video_resize_check.isChecked():
-            width = self.video_width_spin.value()
-            height = self.video_height_spin.value()
-            resize = (width, height)
-        
-        # 禁用按钮
-        self.video_convert_btn.setEnabled(False)
-        
-        # 创建并启动工作线程
-        self.video_worker = VideoToGifWorker(video_path, output_path, fps, speed_factor, resize)
-        self.video_worker.progress.connect(self.update_video_progress)
-        self.video_worker.finished.connect(self.on_video_conversion_finished)
-        self.video_worker.error.connect(self.on_conversion_error)
-        self.video_worker.start()
-    
-    def convert_images_to_gif(self):
-        if not self.selected_image_paths:
-            QMessageBox.warning(self, "错误", "请选择图片文件")
-            return
-        
-        output_path = self.image_output_edit.text()
-        if not output_path:
-            QMessageBox.warning(self, "错误", "请选择输出路径")
-            return
-        
-        # 获取设置
-        duration_ms = self.image_duration_spin.value()
-        loop_count = self.image_loop_spin.value()
-        
-        # 获取尺寸设置
-        resize = None
-        if self.image_resize_check.isChecked():
-            width = self.image_width_spin.value()
-            height = self.image_height_spin.value()
-            resize = (width, height)
-        
-        # 禁用按钮
-        self.image_convert_btn.setEnabled(False)
-        
-        # 创建并启动工作线程
-        self.image_worker = ImagesToGifWorker(self.selected_image_paths, output_path, duration_ms, loop_count, resize)
-        self.image_worker.progress.connect(self.update_image_progress)
-        self.image_worker.finished.connect(self.on_image_conversion_finished)
-        self.image_worker.error.connect(self.on_conversion_error)
-        self.image_worker.start()
-    
-    def update_video_progress(self, value):
-        self.video_progress.setValue(value)
-    
-    def update_image_progress(self, value):
-        self.image_progress.setValue(value)
-    
-    def on_video_conversion_finished(self, output_path):
-        # 启用按钮
-        self.video_convert_btn.setEnabled(True)
-        QMessageBox.information(self, "完成", f"视频已成功转换为GIF：\n{output_path}")
-        
-        # 重置进度条
-        self.video_progress.setValue(0)
-    
-    def on_image_conversion_finished(self, output_path):
-        # 启用按钮
-        self.image_convert_btn.setEnabled(True)
-        QMessageBox.information(self, "完成", f"图片已成功转换为GIF：\n{output_path}")
-        
-        # 重置进度条
-        self.image_progress.setValue(0)
-    
-    def on_conversion_error(self, error_msg):
-        # 启用按钮
-        self.video_convert_btn.setEnabled(True)
-        self.image_convert_btn.setEnabled(True)
-        
-        # 显示错误消息
-        QMessageBox.critical(self, "错误", f"转换过程中出错：\n{error_msg}")
-        
-        # 重置进度条
-        self.video_progress.setValue(0)
-        self.image_progress.setValue(0)
-    
-    @staticmethod
-    def natural_sort_key(s):
-        """自然排序函数"""
-        return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+            print(f"读取文件信息出错：{e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.command == JOB_VIDEO:
+        job = dict(type=JOB_VIDEO, input=args.input, output=args.output, fps=args.fps,
+                   speed_factor=args.speed, encoder=args.encoder, start=args.start, end=args.end,
+                   crop=args.crop, target_bytes=args.target_size, **common_job_options(args))
+    else:
+        job = dict(type=JOB_IMAGES, inputs=args.inputs, output=args.output, duration_ms=args.duration,
+                   loop_count=args.loop, workers=args.workers, background=args.background, sort=False,
+                   **common_job_options(args))
+
+    try:
+        stats = run_job(job, progress=print_progress)
+    except Exception as e:
+        print(f"\n转换过程中出错：{e}", file=sys.stderr)
+        return 1
+    print(f"\n已生成 {args.output}：{stats.summary()}")
+    return 0
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = GifConverterApp()
-    window.show()
-    sys.exit(app.exec_()) 
\ No newline at end of file
+    sys.exit(main())
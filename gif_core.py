@@ -0,0 +1,496 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from cache import cache_key, cached_images, replacing_output
+from dedup import timed_frames
+from frame_store import FrameStoreWriter
+from frame_pipeline import (DEFAULT_FRAME_WINDOW, SAMPLER_SEQUENTIAL, checked_frames, crop_frame,
+                            buffered_frames, count_sampled_frames, read_video_frames,
+                            sample_video_frames, track_progress, write_gif_stream)
+from gif_writer import DISPOSE_BACKGROUND, DISPOSE_NONE, ENCODER_FFMPEG, ENCODER_NATIVE, write_timed_gif_frames
+from image_pipeline import EXECUTOR_THREAD, load_frames, probe_image_size
+from instrumentation import CACHE_HIT_FRAMES, CACHE_HIT_RESULT, PipelineStats
+from normalize import DEFAULT_BACKGROUND, cached_plan
+from palette import PALETTE_GLOBAL, PALETTE_PER_FRAME, PALETTE_SAMPLE_FRAMES, build_quantizer, sample_evenly
+from options import FORMAT_APNG, FORMAT_GIF, FORMAT_WEBP, RESIZE_FILL, RESIZE_FIT, RESIZE_STRETCH
+from output_formats import write_timed_frames
+from probe import clip_time_range, video_info
+from sizing import clip_region, fit_size, output_size, valid_resize
+
+
+class VideoToGifConverter:
+    """视频转 GIF，progress 回调接收 0~100 的进度"""
+    
+    def __init__(self, video_path, output_path, fps, speed_factor, resize=None,
+                 streaming=True, frame_window=DEFAULT_FRAME_WINDOW, sampler=SAMPLER_SEQUENTIAL,
+                 encoder=ENCODER_FFMPEG, palette_mode=PALETTE_GLOBAL, dither=False, optimize=True,
+                 dedup_threshold=None, cache=None, progress=None, control=None, resize_mode=RESIZE_STRETCH,
+                 start=None, end=None, crop=None, colors=256, output_format=FORMAT_GIF, quality=None, speed=None,
+                 encode_workers=1, cache_frames=False):
+        self.video_path = video_path
+        self.output_path = output_path
+        self.fps = fps
+        self.speed_factor = speed_factor
+        self.resize = resize  # 添加尺寸参数
+        self.resize_mode = resize_mode  # 缩放方式：拉伸 / 保持比例 / 填充裁剪
+        self.start = start  # 截取的开始时间（秒），None 表示从头开始
+        self.end = end  # 截取的结束时间（秒），None 表示到结尾
+        self.crop = crop  # 原画面上的裁剪区域 (左, 上, 宽, 高)，在缩放之前应用
+        self.streaming = streaming  # 流式模式：帧不落盘，直接送入编码器
+        self.frame_window = frame_window  # 流式模式下最多缓冲的帧数
+        self.sampler = sampler  # 取帧方式：顺序解码或按时间点定位
+        self.encoder = encoder  # GIF 编码方式：ffmpeg（moviepy）或内置增量编码器
+        self.encode_workers = encode_workers  # 内置 GIF 编码器的并行进程数（输出与单进程相同）
+        self.palette_mode = palette_mode  # 调色板模式：逐帧 / 全局 / 按场景（后两者使用内置编码器）
+        self.dither = dither  # 是否使用有序抖动
+        self.colors = colors  # 共享调色板的颜色数（全局 / 按场景调色板时有效）
+        self.optimize = optimize  # 帧间差分：只写出变化的区域
+        self.dedup_threshold = dedup_threshold  # 重复帧容差（百分比），None 表示不去重
+        self.output_format = output_format  # 输出格式：GIF / WebP / APNG / MP4
+        self.quality = quality  # 画质 0~100（WebP、MP4），None 表示默认值
+        self.speed = speed  # 编码速度（WebP、APNG、MP4），None 表示默认值
+        self.cache = cache  # 结果与中间帧缓存（ConversionCache），None 表示不使用
+        self.cache_frames = cache_frames  # 是否把解码帧写入帧缓存（未压缩，占用磁盘较多，默认关闭）
+        self.progress = progress  # 进度回调
+        self.control = control  # 暂停/取消控制（JobControl），在帧循环中检查
+        self.stats = None  # 解码/编码耗时统计
+        self.temp_dir = None
+    
+    def run(self):
+        """执行转换，返回耗时统计；出错时抛出异常
+        
+        先写入输出旁边的临时文件，成功后才替换 output_path，失败或取消时保留原有的输出。
+        """
+        output_path = self.output_path
+        try:
+            with replacing_output(output_path) as temp_path:
+                self.output_path = temp_path
+                return self.convert()
+        finally:
+            self.output_path = output_path
+    
+    def convert(self):
+        """转换到 output_path，返回耗时统计"""
+        video_clip = None
+        try:
+            self.stats = PipelineStats()
+            
+            # 相同输入和参数的结果直接复用
+            if self.cache and self.cache.fetch_result(self.result_key(), self.output_path):
+                self.stats.cache_hit = CACHE_HIT_RESULT
+                self.emit_progress(1, 1)
+                self.stats.stop()
+                return self.stats
+            
+            use_frame_cache = self.cache is not None and self.cache_frames
+            cached_frames = self.cache.load_frames(self.frames_key()) if use_frame_cache else None
+            if cached_frames is not None:
+                # 复用缓存的解码帧，跳过解码
+                self.stats.cache_hit = CACHE_HIT_FRAMES
+                frames = iter(cached_frames)
+                total_frames = len(cached_frames)
+                palette_samples = lambda: sample_evenly(cached_frames, PALETTE_SAMPLE_FRAMES)
+            elif self.decode_with_ffmpeg():
+                # ffmpeg 顺序解码一次，截取、裁剪、抽帧和缩放都在解码端完成
+                start, end = self.time_range()
+                duration = end - start
+                scaled, crop = self.resize_plan()
+                decode = dict(crop=crop, region=self.region(), start=start or None,
+                              end=end if end < video_info(self.video_path)['duration'] else None)
+                frames = read_video_frames(self.video_path, self.fps, scaled, self.stats, **decode)
+                # 只解码关键帧来取样生成调色板
+                palette_samples = lambda: read_video_frames(
+                    self.video_path, None, scaled, keyframes_only=True, **decode)
+            else:
+                # 加载视频（moviepy 依赖较多，只在需要时导入）
+                from moviepy.editor import VideoFileClip
+                scaled, crop = self.moviepy_plan()
+                # moviepy 不识别显示矩阵，会把自动旋转后的画面缩放回存储时的尺寸；旋转的视频总是指定显示尺寸
+                if not scaled and video_info(self.video_path)['rotation']:
+                    scaled = video_info(self.video_path)['size']
+                # 缩放交给 moviepy 启动的 ffmpeg 解码进程完成，不再逐帧在 Python 中缩放
+                video_clip = VideoFileClip(self.video_path,
+                                           target_resolution=scaled[::-1] if scaled else None,
+                                           resize_algorithm='lanczos')
+                start, end = self.time_range()
+                if (start, end) != (0, video_clip.duration):
+                    video_clip = video_clip.subclip(start, end)
+                
+                duration = video_clip.duration
+                frames = sample_video_frames(video_clip, self.fps, self.stats, crop)
+                palette_samples = lambda: (
+                    crop_frame(video_clip.get_frame(t), crop)
+                    for t in np.linspace(0, duration, PALETTE_SAMPLE_FRAMES, endpoint=False))
+            
+            if cached_frames is None:
+                total_frames = count_sampled_frames(duration, self.fps)
+                if use_frame_cache:
+                    frames = self.cache.record_frames(self.frames_key(), frames)
+            frames = checked_frames(frames, self.control)
+            if self.streaming:
+                self.convert_streaming(frames, total_frames, palette_samples)
+            else:
+                self.convert_with_temp_dir(frames, total_frames)
+            self.stats.count('bytes_written', os.path.getsize(self.output_path))
+            if self.cache:
+                self.cache.store_result(self.result_key(), self.output_path)
+            self.stats.stop()
+            return self.stats
+        finally:
+            if video_clip is not None:
+                video_clip.close()
+            # 清理临时文件
+            if self.temp_dir and os.path.exists(self.temp_dir):
+                shutil.rmtree(self.temp_dir)
+    
+    def target_size(self):
+        return valid_resize(self.resize)
+    
+    def time_range(self):
+        """限制在视频时长之内的截取范围 (开始, 结束)"""
+        return clip_time_range(self.start, self.end, video_info(self.video_path)['duration'])
+    
+    def region(self):
+        """限制在画面之内的裁剪区域；不裁剪时返回 None"""
+        return clip_region(self.crop, video_info(self.video_path)['size'])
+    
+    def resize_plan(self):
+        """裁剪之后的缩放尺寸和缩放后的裁剪区域；不缩放时返回 (None, None)"""
+        if not self.target_size():
+            return None, None
+        region = self.region()
+        source_size = region[2:] if region else video_info(self.video_path)['size']
+        return fit_size(source_size, self.target_size(), self.resize_mode)
+    
+    def moviepy_plan(self):
+        """moviepy 解码的整帧尺寸和解码后的裁剪区域
+
+        moviepy 只能缩放整帧，这里把裁剪区域换算到缩放后的整帧上，裁剪和缩放合并为一步。
+        """
+        region = self.region()
+        scaled, crop = self.resize_plan()
+        if not region:
+            return scaled, crop
+        if not scaled:
+            return None, region
+        width, height = video_info(self.video_path)['size']
+        left, top, region_width, region_height = region
+        scale_x = scaled[0] / region_width
+        scale_y = scaled[1] / region_height
+        full = (max(1, round(width * scale_x)), max(1, round(height * scale_y)))
+        crop_left, crop_top, crop_width, crop_height = crop or (0, 0) + scaled
+        return full, (min(round(left * scale_x) + crop_left, full[0] - crop_width),
+                      min(round(top * scale_y) + crop_top, full[1] - crop_height),
+                      crop_width, crop_height)
+    
+    def decode_with_ffmpeg(self):
+        return self.streaming and self.sampler == SAMPLER_SEQUENTIAL
+    
+    def frames_key(self):
+        """解码帧的缓存键：只与取帧相关的参数有关"""
+        return cache_key('video-frames', [self.video_path], fps=self.fps, resize=self.target_size(),
+                         resize_mode=self.resize_mode, start=self.start, end=self.end, crop=self.crop,
+                         decoder='ffmpeg' if self.decode_with_ffmpeg() else 'moviepy')
+    
+    def result_key(self):
+        """输出结果的缓存键：包含所有影响输出内容的参数"""
+        return cache_key('video-result', [self.video_path], fps=self.fps, speed_factor=self.speed_factor,
+                         resize=self.target_size(), resize_mode=self.resize_mode, start=self.start,
+                         end=self.end, crop=self.crop, streaming=self.streaming,
+                         decoder='ffmpeg' if self.decode_with_ffmpeg() else 'moviepy',
+                         encoder=self.encoder, palette_mode=self.palette_mode, dither=self.dither,
+                         colors=self.colors, optimize=self.optimize, dedup_threshold=self.dedup_threshold,
+                         output_format=self.output_format, quality=self.quality, speed=self.speed)
+    
+    def emit_progress(self, frame_count, total_frames):
+        if self.progress:
+            self.progress(min(100, int(frame_count / max(total_frames, 1) * 100)))
+    
+    def build_quantizer(self, palette_samples):
+        """由取样帧生成共享调色板；逐帧调色板和其他输出格式返回 None"""
+        if self.output_format != FORMAT_GIF or self.palette_mode == PALETTE_PER_FRAME:
+            return None
+        start = time.perf_counter()
+        quantizer = build_quantizer(checked_frames(palette_samples(), self.control), self.palette_mode,
+                                    colors=self.colors, dither=self.dither)
+        self.stats.record('palette', start)
+        return quantizer
+    
+    def convert_streaming(self, frames, total_frames, palette_samples):
+        """解码后的帧经有界队列直接送入编码器"""
+        quantizer = self.build_quantizer(palette_samples)
+        
+        frames = buffered_frames(frames, self.frame_window, self.control)
+        adjusted_fps = self.fps * self.speed_factor
+        report = lambda count: self.emit_progress(count, total_frames)
+        # 共享调色板和重复帧合并（可变帧时长）都需要内置编码器；其他输出格式有各自的编码器
+        if (self.output_format != FORMAT_GIF or quantizer or self.encoder == ENCODER_NATIVE
+                or self.dedup_threshold is not None):
+            frames = track_progress(frames, report)
+            frame_ms = 1000.0 / adjusted_fps
+            write_timed_frames(timed_frames(frames, frame_ms, self.dedup_threshold, self.stats),
+                               self.output_path, self.output_format, stats=self.stats, quantizer=quantizer,
+                               optimize=self.optimize, quality=self.quality, speed=self.speed,
+                               workers=self.encode_workers, frame_ms=frame_ms)
+        else:
+            write_gif_stream(frames, self.output_path, adjusted_fps, progress=report, stats=self.stats)
+    
+    def convert_with_temp_dir(self, frames, total_frames):
+        """先把帧写入临时目录中的内存映射帧存储，再整体编码"""
+        # 创建临时文件夹
+        self.temp_dir = tempfile.mkdtemp()
+        
+        # 捕获帧：原始像素直接追加到一个文件，不做 PNG 编解码
+        writer = FrameStoreWriter(os.path.join(self.temp_dir, 'frames.bin'))
+        for i, frame in enumerate(frames):
+            start = time.perf_counter()
+            writer.append(frame)
+            self.stats.record('store_write', start)
+            
+            # 更新进度
+            self.emit_progress(i + 1, total_frames)
+        store = writer.close()
+        if store is None:
+            raise ValueError("视频中没有可转换的帧")
+        self.stats.count('temp_bytes_written', store.nbytes)
+        
+        adjusted_fps = self.fps * self.speed_factor
+        # 其他输出格式、内置 GIF 编码器和重复帧合并（moviepy 只支持固定帧率）与流式模式走同一条路径
+        if (self.output_format != FORMAT_GIF or self.encoder == ENCODER_NATIVE
+                or self.dedup_threshold is not None):
+            # 帧存储可以随机访问，直接从中均匀取样生成调色板
+            frame_ms = 1000.0 / adjusted_fps
+            quantizer = self.build_quantizer(lambda: sample_evenly(store, PALETTE_SAMPLE_FRAMES))
+            write_timed_frames(timed_frames(store, frame_ms, self.dedup_threshold, self.stats),
+                               self.output_path, self.output_format, stats=self.stats, quantizer=quantizer,
+                               optimize=self.optimize,
+                               quality=self.quality, speed=self.speed, workers=self.encode_workers,
+                               frame_ms=frame_ms)
+            return
+        
+        # 创建GIF：各帧是内存映射上的零拷贝视图
+        start = time.perf_counter()
+        from moviepy.editor import ImageSequenceClip
+        gif_clip = ImageSequenceClip(list(store), fps=adjusted_fps)
+        gif_clip.write_gif(self.output_path, program='ffmpeg')
+        self.stats.record('write_gif', start)
+        self.stats.frames_encoded += len(store)
+
+
+class ImagesToGifConverter:
+    """图片序列转 GIF，progress 回调接收 0~100 的进度"""
+    
+    def __init__(self, image_paths, output_path, duration_ms, loop_count, resize=None,
+                 workers=1, executor=EXECUTOR_THREAD, fast_downscale=True, streaming=True,
+                 palette_mode=PALETTE_GLOBAL, dither=False, optimize=True, dedup_threshold=None,
+                 cache=None, progress=None, control=None, resize_mode=RESIZE_STRETCH, colors=256,
+                 output_format=FORMAT_GIF, quality=None, speed=None, background=DEFAULT_BACKGROUND,
+                 encode_workers=1, cache_frames=False):
+        self.image_paths = image_paths
+        self.output_path = output_path
+        self.duration_ms = duration_ms
+        self.loop_count = loop_count
+        self.resize = resize  # 添加尺寸参数
+        self.resize_mode = resize_mode  # 缩放方式：拉伸 / 保持比例 / 填充裁剪
+        self.workers = workers  # 并行解码/缩放的工作线程（进程）数
+        self.executor = executor  # 并行方式：线程池或进程池
+        self.fast_downscale = fast_downscale  # 缩小时使用 JPEG 降采样解码
+        self.streaming = streaming  # 流式模式：逐帧写入 GIF，不在内存中保留整个序列
+        self.palette_mode = palette_mode  # 调色板模式：逐帧 / 全局 / 按场景
+        self.dither = dither  # 是否使用有序抖动
+        self.colors = colors  # 共享调色板的颜色数
+        self.optimize = optimize  # 帧间差分：只写出变化的区域
+        self.dedup_threshold = dedup_threshold  # 重复帧容差（百分比），None 表示不去重
+        self.output_format = output_format  # 输出格式：GIF / WebP / APNG / MP4
+        self.quality = quality  # 画质 0~100（WebP、MP4），None 表示默认值
+        self.speed = speed  # 编码速度（WebP、APNG、MP4），None 表示默认值
+        self.background = tuple(background)  # 透明像素合成和尺寸不一致时补边的背景色
+        self.encode_workers = encode_workers  # 流式 GIF 编码的并行进程数（输出与单进程相同）
+        self.cache = cache  # 结果与中间帧缓存（ConversionCache），None 表示不使用
+        self.cache_frames = cache_frames  # 是否把解码帧写入帧缓存（未压缩，占用磁盘较多，默认关闭）
+        self.progress = progress  # 进度回调
+        self.control = control  # 暂停/取消控制（JobControl），在帧循环中检查
+        self.stats = None  # 解码/编码耗时统计
+        self.plan = None  # 颜色模式与尺寸的归一化方案
+    
+    def run(self):
+        """执行转换，返回耗时统计；出错时抛出异常
+        
+        先写入输出旁边的临时文件，成功后才替换 output_path，失败或取消时保留原有的输出。
+        """
+        output_path = self.output_path
+        try:
+            with replacing_output(output_path) as temp_path:
+                self.output_path = temp_path
+                return self.convert()
+        finally:
+            self.output_path = output_path
+    
+    def convert(self):
+        """转换到 output_path，返回耗时统计"""
+        total_images = len(self.image_paths)
+        if not total_images:
+            raise ValueError("没有可转换的图片")
+        self.stats = PipelineStats()
+        use_cache = self.cache is not None
+        
+        # 相同输入和参数的结果直接复用
+        if use_cache and self.cache.fetch_result(self.result_key(), self.output_path):
+            self.stats.cache_hit = CACHE_HIT_RESULT
+            if self.progress:
+                self.progress(100)
+            self.stats.stop()
+            return self.stats
+        
+        use_frame_cache = use_cache and self.cache_frames
+        cached_frames = self.cache.load_frames(self.frames_key()) if use_frame_cache else None
+        palette_samples = None
+        if cached_frames is not None and len(cached_frames) == total_images:
+            # 复用缓存的解码帧，跳过解码和缩放
+            self.stats.cache_hit = CACHE_HIT_FRAMES
+            loaded = cached_images(cached_frames)
+            palette_samples = sample_evenly(cached_frames, PALETTE_SAMPLE_FRAMES)
+        else:
+            # 并行解码、缩放并统一为相同的颜色模式和尺寸，结果按原始顺序返回
+            resize, resize_mode = self.frame_size()
+            loaded = load_frames(self.image_paths, resize, self.workers, self.executor,
+                                 self.fast_downscale, stats=self.stats, resize_mode=resize_mode,
+                                 plan=self.normalize_plan())
+            if use_frame_cache:
+                loaded = self.cache.record_frames(self.frames_key(), loaded)
+        loaded = checked_frames(loaded, self.control)
+        
+        def report(frame_count):
+            if self.progress:
+                self.progress(int(frame_count / total_images * 100))
+        
+        # 按需合并重复帧，为每帧配上显示时长
+        frames = timed_frames(track_progress(loaded, report), self.duration_ms,
+                              self.dedup_threshold, self.stats)
+        
+        if self.output_format != FORMAT_GIF:
+            # 其他格式的编码器自行处理帧，不需要共享调色板
+            write_timed_frames(frames, self.output_path, self.output_format, self.loop_count,
+                               stats=self.stats, quality=self.quality, speed=self.speed,
+                               frame_ms=self.duration_ms)
+        elif self.streaming:
+            # 透明像素处不能露出上一帧：每帧显示后清除，不做帧间差分
+            transparent = self.transparent_output()
+            write_timed_gif_frames(frames, self.output_path, self.loop_count, stats=self.stats,
+                                   quantizer=self.build_quantizer(palette_samples),
+                                   optimize=self.optimize and not transparent,
+                                   disposal=DISPOSE_BACKGROUND if transparent else DISPOSE_NONE,
+                                   workers=self.encode_workers)
+        else:
+            self.convert_in_memory(frames)
+        self.stats.count('bytes_written', os.path.getsize(self.output_path))
+        if use_cache:
+            self.cache.store_result(self.result_key(), self.output_path)
+        self.stats.stop()
+        return self.stats
+    
+    def frame_size(self):
+        """每张图片的目标尺寸和缩放方式
+
+        保持比例时按第一张图片确定输出尺寸，其余图片以填充裁剪的方式缩放到同一尺寸，
+        保证 GIF 各帧尺寸一致且画面不变形。
+        """
+        resize = valid_resize(self.resize)
+        if resize and self.resize_mode == RESIZE_FIT and self.image_paths:
+            return output_size(probe_image_size(self.image_paths[0]), resize, RESIZE_FIT), RESIZE_FILL
+        return resize, self.resize_mode
+    
+    def keep_alpha(self):
+        """输出能否保留透明：WebP、APNG 和逐帧调色板的 GIF；共享调色板的 GIF 和 MP4 合成到背景色上"""
+        if self.output_format == FORMAT_GIF:
+            return self.palette_mode == PALETTE_PER_FRAME
+        return self.output_format in (FORMAT_WEBP, FORMAT_APNG)
+    
+    def transparent_output(self):
+        """归一化后的帧是否带透明通道（复用缓存的帧时一定是 RGB）"""
+        return self.plan is not None and self.plan.mode == 'RGBA'
+    
+    def normalize_plan(self):
+        """读取全部图片的文件头，确定统一的颜色模式和画布（结果按输入和参数缓存）"""
+        if self.plan is None:
+            start = time.perf_counter()
+            self.plan = cached_plan(self.image_paths, self.resize, self.resize_mode, self.keep_alpha(),
+                                    self.background, self.workers, cache=None if self.cache else False)
+            self.stats.record('normalize_plan', start)
+        return self.plan
+    
+    def frames_key(self):
+        """解码帧的缓存键：只与解码、缩放和归一化相关的参数有关"""
+        return cache_key('image-frames', self.image_paths, resize=self.resize, resize_mode=self.resize_mode,
+                         fast_downscale=self.fast_downscale, keep_alpha=self.keep_alpha(),
+                         background=self.background)
+    
+    def result_key(self):
+        """输出结果的缓存键：包含所有影响输出内容的参数"""
+        return cache_key('image-result', self.image_paths, duration_ms=self.duration_ms,
+                         loop_count=self.loop_count, resize=self.resize, resize_mode=self.resize_mode,
+                         fast_downscale=self.fast_downscale, streaming=self.streaming,
+                         palette_mode=self.palette_mode, dither=self.dither, colors=self.colors,
+                         optimize=self.optimize, dedup_threshold=self.dedup_threshold,
+                         output_format=self.output_format, quality=self.quality, speed=self.speed,
+                         background=self.background)
+    
+    def build_quantizer(self, samples=None):
+        """从均匀取样的若干张图片生成共享调色板"""
+        if self.palette_mode == PALETTE_PER_FRAME or not self.image_paths:
+            return None
+        start = time.perf_counter()
+        if samples is None:
+            sample_paths = sample_evenly(self.image_paths, PALETTE_SAMPLE_FRAMES)
+            resize, resize_mode = self.frame_size()
+            samples = load_frames(sample_paths, resize, self.workers, self.executor,
+                                  self.fast_downscale, resize_mode=resize_mode, plan=self.normalize_plan())
+        quantizer = build_quantizer(checked_frames(samples, self.control), self.palette_mode,
+                                    colors=self.colors, dither=self.dither)
+        self.stats.record('palette', start)
+        return quantizer
+    
+    def convert_in_memory(self, timed):
+        """先保存全部帧，再由 Pillow 一次性保存为 GIF
+
+        帧保存在临时的内存映射帧存储中，由操作系统的页缓存管理内存；
+        遇到尺寸或颜色模式不一致的帧时改为保存在内存中。
+        """
+        durations = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            writer = FrameStoreWriter(os.path.join(temp_dir, 'frames.bin'))
+            kept = None  # 无法写入帧存储时保存在内存中的图片
+            for img, duration in timed:
+                if kept is None and not writer.accepts(img):
+                    store = writer.close()
+                    kept = [Image.fromarray(np.array(frame)) for frame in store] if store else []
+                if kept is None:
+                    writer.append(img)
+                else:
+                    kept.append(img)
+                durations.append(duration)
+            if kept is None:
+                store = writer.close()
+                images = cached_images(store) if store else iter(())
+            else:
+                images = iter(kept)
+            
+            # 保存为GIF
+            first = next(images, None)
+            if first is not None:
+                start = time.perf_counter()
+                first.save(
+                    self.output_path,
+                    save_all=True,
+                    append_images=images,
+                    duration=durations,
+                    loop=self.loop_count,
+                    disposal=DISPOSE_BACKGROUND if self.transparent_output() else DISPOSE_NONE
+                )
+                self.stats.record('encode', start)
+                self.stats.frames_encoded += len(durations)
@@ -0,0 +1,1188 @@
+import sys
+import os
+import functools
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                            QLabel, QPushButton, QFileDialog, QComboBox, QSpinBox, 
+                            QTabWidget, QProgressBar, QSlider, QMessageBox, QSplitter, 
+                            QGroupBox, QRadioButton, QLineEdit, QFormLayout, QDoubleSpinBox,
+                            QCheckBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView)
+from PyQt5.QtCore import Qt, QThread, QObject, QTimer, pyqtSignal, QSize
+from PyQt5.QtGui import QIcon, QPixmap, QFont, QImage, QPainter, QPen, QColor
+
+# 转换引擎依赖 numpy 和 moviepy，在开始转换时才导入，让窗口尽快显示
+from folder_scan import FolderWatcher, list_image_files, merge_sorted_paths, natural_sort_key
+from image_pipeline import default_worker_count
+from jobs import (STATE_CANCELLED, STATE_DONE, STATE_FAILED, STATE_PAUSED, STATE_QUEUED, STATE_RUNNING,
+                  Job, JobScheduler, default_concurrency)
+from options import (DEFAULT_QUALITY, FORMAT_APNG, FORMAT_EXTENSIONS, FORMAT_GIF, FORMAT_MP4, FORMAT_WEBP,
+                     PALETTE_GLOBAL, PALETTE_PER_FRAME, PALETTE_SCENE, RESIZE_FILL, RESIZE_FIT, RESIZE_STRETCH,
+                     SPEED_BALANCED, SPEED_FAST, SPEED_SMALL)
+from probe import describe_estimate, estimate_images_output, estimate_video_output, image_info, video_info
+from sizing import fit_size
+
+
+# 调色板选项：(显示文字, 模式)
+PALETTE_MODE_CHOICES = [
+    ("全局共享", PALETTE_GLOBAL),
+    ("按场景切换", PALETTE_SCENE),
+    ("逐帧生成", PALETTE_PER_FRAME),
+]
+
+# 缩放方式选项：(显示文字, 方式)
+RESIZE_MODE_CHOICES = [
+    ("保持比例", RESIZE_FIT),
+    ("填充裁剪", RESIZE_FILL),
+    ("拉伸", RESIZE_STRETCH),
+]
+
+
+# 输出格式选项：(显示文字, 格式)
+OUTPUT_FORMAT_CHOICES = [
+    ("GIF", FORMAT_GIF),
+    ("WebP 动画", FORMAT_WEBP),
+    ("APNG", FORMAT_APNG),
+    ("MP4 (H.264)", FORMAT_MP4),
+]
+
+# 保存对话框中各格式的文件类型
+OUTPUT_FORMAT_FILTERS = {
+    FORMAT_GIF: "GIF文件 (*.gif)",
+    FORMAT_WEBP: "WebP文件 (*.webp)",
+    FORMAT_APNG: "APNG文件 (*.png *.apng)",
+    FORMAT_MP4: "MP4视频 (*.mp4)",
+}
+
+# 编码速度选项：(显示文字, 速度)
+ENCODE_SPEED_CHOICES = [
+    ("均衡", SPEED_BALANCED),
+    ("最快", SPEED_FAST),
+    ("文件最小", SPEED_SMALL),
+]
+
+# 使用画质设置的格式
+QUALITY_FORMATS = (FORMAT_WEBP, FORMAT_MP4)
+
+
+# 任务状态的显示文字
+JOB_STATE_TEXT = {
+    STATE_QUEUED: "排队中",
+    STATE_RUNNING: "转换中",
+    STATE_PAUSED: "已暂停",
+    STATE_DONE: "完成",
+    STATE_FAILED: "出错",
+    STATE_CANCELLED: "已取消",
+}
+
+# 预览画面的最大尺寸
+PREVIEW_SIZE = (320, 180)
+
+# 预览拖动停止多久后再解码（毫秒），避免拖动时频繁启动 ffmpeg
+PREVIEW_DELAY_MS = 120
+
+# 监视图片文件夹时的检查间隔（毫秒）
+WATCH_INTERVAL_MS = 1000
+
+# 任务队列表格的列
+JOB_COLUMNS = ["任务", "状态", "优先级", "进度", "信息"]
+
+
+class JobSignals(QObject):
+    """把调度器在转换线程中的状态通知转发到界面线程"""
+    changed = pyqtSignal(object)
+
+
+def scan_images(source):
+    """列出文件夹中的图片（或把给定的文件列表按自然顺序排序），并探测第一张图片"""
+    paths = list_image_files(source) if isinstance(source, str) else sorted(source, key=natural_sort_key)
+    return paths, (image_info(paths[0]) if paths else None)
+
+
+def poll_image_folder(request):
+    """检查监视的文件夹：request 为 (FolderWatcher, 当前图片列表)
+
+    有新图片时返回 (合并后的列表, 新增数量, 第一张图片的信息或 None)，否则返回 None。
+    """
+    watcher, paths = request
+    new_paths = watcher.poll()
+    if not new_paths:
+        return None
+    merged = merge_sorted_paths(list(paths), new_paths)
+    return merged, len(new_paths), (image_info(merged[0]) if not paths else None)
+
+
+def preview_frame(request):
+    """读取预览帧：request 为 (视频路径, 时间点, 预览尺寸)"""
+    from frame_pipeline import read_preview_frame
+    path, time_point, size = request
+    return read_preview_frame(path, time_point, size)
+
+
+class ProbeWorker(QThread):
+    """在后台线程中读取文件信息，避免网络路径或大文件卡住界面"""
+    probed = pyqtSignal(object)
+    
+    def __init__(self, probe, source):
+        super().__init__()
+        self.probe = probe
+        self.source = source
+    
+    def run(self):
+        try:
+            result = self.probe(self.source)
+        except Exception:
+            result = None
+        self.probed.emit(result)
+
+
+class GifConverterApp(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("GIF转换器")
+        self.setMinimumSize(800, 600)
+        
+        # 设置应用图标
+        self.setWindowIcon(QIcon("app_icon.svg"))
+        
+        # 初始化UI
+        self.init_ui()
+    
+    def init_ui(self):
+        # 创建主窗口部件
+        main_widget = QWidget()
+        main_layout = QVBoxLayout(main_widget)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+        
+        # 创建标签
+        title_label = QLabel("GIF转换器")
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setFont(QFont("Arial", 20, QFont.Bold))
+        main_layout.addWidget(title_label)
+        
+        # 创建标签页
+        tabs = QTabWidget()
+        tabs.setStyleSheet("QTabBar::tab { height: 30px; width: 120px; }")
+        
+        # 视频转GIF标签页
+        video_tab = QWidget()
+        video_layout = QVBoxLayout(video_tab)
+        video_layout.setContentsMargins(10, 10, 10, 10)
+        video_layout.setSpacing(10)
+        
+        # 视频选择部分
+        video_file_group = QGroupBox("视频文件")
+        video_file_layout = QFormLayout()
+        video_file_layout.setLabelAlignment(Qt.AlignLeft)
+        
+        self.video_path_edit = QLineEdit()
+        self.video_path_edit.setReadOnly(True)
+        self.video_browse_btn = QPushButton("浏览...")
+        self.video_browse_btn.setStyleSheet("padding: 5px;")
+        self.video_browse_btn.clicked.connect(self.browse_video)
+        
+        video_path_layout = QHBoxLayout()
+        video_path_layout.addWidget(self.video_path_edit)
+        video_path_layout.addWidget(self.video_browse_btn)
+        
+        video_file_layout.addRow("选择视频:", video_path_layout)
+        
+        self.video_info_label = QLabel("")
+        video_file_layout.addRow("视频信息:", self.video_info_label)
+        video_file_group.setLayout(video_file_layout)
+        video_layout.addWidget(video_file_group)
+        
+        # 截取与裁剪：拖动滑块预览关键帧，选择时间范围和裁剪区域
+        video_clip_group = QGroupBox("截取与裁剪")
+        video_clip_layout = QFormLayout()
+        video_clip_layout.setLabelAlignment(Qt.AlignLeft)
+        
+        self.video_preview_label = QLabel("选择视频后显示预览")
+        self.video_preview_label.setAlignment(Qt.AlignCenter)
+        self.video_preview_label.setFixedSize(*PREVIEW_SIZE)
+        self.video_preview_label.setStyleSheet("background-color: #222; color: #aaa;")
+        video_clip_layout.addRow("预览:", self.video_preview_label)
+        
+        scrub_layout = QHBoxLayout()
+        self.video_scrub_slider = QSlider(Qt.Horizontal)
+        self.video_scrub_slider.setEnabled(False)
+        scrub_layout.addWidget(self.video_scrub_slider)
+        self.video_scrub_label = QLabel("0.0 秒")
+        scrub_layout.addWidget(self.video_scrub_label)
+        video_clip_layout.addRow("位置:", scrub_layout)
+        
+        range_layout = QHBoxLayout()
+        self.video_start_spin = QDoubleSpinBox()
+        self.video_end_spin = QDoubleSpinBox()
+        for spin in (self.video_start_spin, self.video_end_spin):
+            spin.setDecimals(1)
+            spin.setSingleStep(0.1)
+            spin.setSuffix(" 秒")
+            spin.setRange(0.0, 0.0)
+        range_layout.addWidget(QLabel("开始:"))
+        range_layout.addWidget(self.video_start_spin)
+        set_start_btn = QPushButton("设为开始")
+        set_start_btn.clicked.connect(lambda: self.video_start_spin.setValue(self.scrub_time()))
+        range_layout.addWidget(set_start_btn)
+        range_layout.addWidget(QLabel("结束:"))
+        range_layout.addWidget(self.video_end_spin)
+        set_end_btn = QPushButton("设为结束")
+        set_end_btn.clicked.connect(lambda: self.video_end_spin.setValue(self.scrub_time()))
+        range_layout.addWidget(set_end_btn)
+        video_clip_layout.addRow("时间范围:", range_layout)
+        
+        crop_layout = QHBoxLayout()
+        self.video_crop_check = QCheckBox("裁剪区域")
+        crop_layout.addWidget(self.video_crop_check)
+        self.video_crop_spins = []
+        for text in ("左:", "上:", "宽:", "高:"):
+            spin = QSpinBox()
+            spin.setRange(0, 7680)
+            spin.setEnabled(False)
+            self.video_crop_check.toggled.connect(spin.setEnabled)
+            spin.valueChanged.connect(self.refresh_preview)
+            spin.valueChanged.connect(self.update_video_estimate)
+            crop_layout.addWidget(QLabel(text))
+            crop_layout.addWidget(spin)
+            self.video_crop_spins.append(spin)
+        video_clip_layout.addRow("裁剪:", crop_layout)
+        
+        video_clip_group.setLayout(video_clip_layout)
+        video_layout.addWidget(video_clip_group)
+        
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.request_preview)
+        self.video_scrub_slider.valueChanged.connect(self.on_scrub_moved)
+        self.video_start_spin.valueChanged.connect(self.update_video_estimate)
+        self.video_end_spin.valueChanged.connect(self.update_video_estimate)
+        self.video_crop_check.toggled.connect(self.refresh_preview)
+        self.video_crop_check.toggled.connect(self.update_video_estimate)
+        
+        # 视频转换设置
+        video_settings_group = QGroupBox("转换设置")
+        video_settings_layout = QFormLayout()
+        video_settings_layout.setLabelAlignment(Qt.AlignLeft)
+        
+        self.video_fps_spin = QSpinBox()
+        self.video_fps_spin.setRange(1, 30)
+        self.video_fps_spin.setValue(10)
+        video_settings_layout.addRow("帧率 (FPS):", self.video_fps_spin)
+        
+        self.video_speed_spin = QDoubleSpinBox()
+        self.video_speed_spin.setRange(0.1, 10.0)
+        self.video_speed_spin.setValue(1.0)
+        self.video_speed_spin.setSingleStep(0.1)
+        video_settings_layout.addRow("速度倍数:", self.video_speed_spin)
+        
+        # 添加尺寸设置
+        size_layout = QHBoxLayout()
+        
+        self.video_resize_check = QCheckBox("调整尺寸")
+        self.video_resize_check.setChecked(False)
+        size_layout.addWidget(self.video_resize_check)
+        
+        self.video_width_spin = QSpinBox()
+        self.video_width_spin.setRange(10, 3840)
+        self.video_width_spin.setValue(640)
+        self.video_width_spin.setEnabled(False)
+        size_layout.addWidget(QLabel("宽:"))
+        size_layout.addWidget(self.video_width_spin)
+        
+        self.video_height_spin = QSpinBox()
+        self.video_height_spin.setRange(10, 2160)
+        self.video_height_spin.setValue(480)
+        self.video_height_spin.setEnabled(False)
+        size_layout.addWidget(QLabel("高:"))
+        size_layout.addWidget(self.video_height_spin)
+        
+        self.video_resize_mode_combo = QComboBox()
+        for text, mode in RESIZE_MODE_CHOICES:
+            self.video_resize_mode_combo.addItem(text, mode)
+        self.video_resize_mode_combo.setEnabled(False)
+        size_layout.addWidget(self.video_resize_mode_combo)
+        
+        # 连接复选框事件
+        self.video_resize_check.toggled.connect(self.video_width_spin.setEnabled)
+        self.video_resize_check.toggled.connect(self.video_height_spin.setEnabled)
+        self.video_resize_check.toggled.connect(self.video_resize_mode_combo.setEnabled)
+        
+        video_settings_layout.addRow("尺寸设置:", size_layout)
+        
+        # 调色板设置
+        palette_layout = QHBoxLayout()
+        self.video_palette_combo = QComboBox()
+        for text, mode in PALETTE_MODE_CHOICES:
+            self.video_palette_combo.addItem(text, mode)
+        palette_layout.addWidget(self.video_palette_combo)
+        self.video_dither_check = QCheckBox("抖动")
+        palette_layout.addWidget(self.video_dither_check)
+        video_settings_layout.addRow("调色板:", palette_layout)
+        
+        # 并行编码设置：GIF 的量化和压缩分给多个进程，输出不变；同时运行多个任务时保持 1 即可
+        self.video_encode_workers_spin = QSpinBox()
+        self.video_encode_workers_spin.setRange(1, max(64, default_worker_count()))
+        self.video_encode_workers_spin.setValue(1)
+        video_settings_layout.addRow("并行编码数:", self.video_encode_workers_spin)
+        
+        # 重复帧设置
+        dedup_layout = QHBoxLayout()
+        self.video_dedup_check = QCheckBox("合并重复帧")
+        dedup_layout.addWidget(self.video_dedup_check)
+        self.video_dedup_spin = QDoubleSpinBox()
+        self.video_dedup_spin.setRange(0.0, 20.0)
+        self.video_dedup_spin.setSingleStep(0.5)
+        self.video_dedup_spin.setValue(0.0)
+        self.video_dedup_spin.setSuffix(" %")
+        self.video_dedup_spin.setEnabled(False)
+        dedup_layout.addWidget(QLabel("容差:"))
+        dedup_layout.addWidget(self.video_dedup_spin)
+        self.video_dedup_check.toggled.connect(self.video_dedup_spin.setEnabled)
+        video_settings_layout.addRow("重复帧:", dedup_layout)
+        
+        # 目标文件大小：帧率和尺寸作为上限，自动选择帧率、尺寸和颜色数
+        target_layout = QHBoxLayout()
+        self.video_target_check = QCheckBox("限制文件大小")
+        target_layout.addWidget(self.video_target_check)
+        self.video_target_spin = QDoubleSpinBox()
+        self.video_target_spin.setRange(0.05, 500.0)
+        self.video_target_spin.setSingleStep(0.5)
+        self.video_target_spin.setValue(8.0)
+        self.video_target_spin.setSuffix(" MB")
+        self.video_target_spin.setEnabled(False)
+        target_layout.addWidget(QLabel("不超过:"))
+        target_layout.addWidget(self.video_target_spin)
+        self.video_target_check.toggled.connect(self.video_target_spin.setEnabled)
+        # 按目标大小转换时由取样结果决定颜色数和抖动
+        self.video_target_check.toggled.connect(lambda checked: self.video_dither_check.setEnabled(not checked))
+        video_settings_layout.addRow("目标大小:", target_layout)
+        
+        video_settings_group.setLayout(video_settings_layout)
+        video_layout.addWidget(video_settings_group)
+        
+        # 设置变化时更新预计输出
+        self.video_fps_spin.valueChanged.connect(self.update_video_estimate)
+        self.video_speed_spin.valueChanged.connect(self.update_video_estimate)
+        self.video_resize_check.toggled.connect(self.update_video_estimate)
+        self.video_width_spin.valueChanged.connect(self.update_video_estimate)
+        self.video_height_spin.valueChanged.connect(self.update_video_estimate)
+        self.video_resize_mode_combo.currentIndexChanged.connect(self.update_video_estimate)
+        
+        # 视频输出设置
+        video_output_group = QGroupBox("输出设置")
+        video_output_layout = QFormLayout()
+        video_output_layout.setLabelAlignment(Qt.AlignLeft)
+        
+        # 输出格式、画质和编码速度
+        video_format_layout = QHBoxLayout()
+        self.video_format_combo = QComboBox()
+        for text, fmt in OUTPUT_FORMAT_CHOICES:
+            self.video_format_combo.addItem(text, fmt)
+        video_format_layout.addWidget(self.video_format_combo)
+        video_format_layout.addWidget(QLabel("画质:"))
+        self.video_quality_spin = QSpinBox()
+        self.video_quality_spin.setRange(0, 100)
+        self.video_quality_spin.setValue(DEFAULT_QUALITY)
+        video_format_layout.addWidget(self.video_quality_spin)
+        video_format_layout.addWidget(QLabel("速度:"))
+        self.video_encode_speed_combo = QComboBox()
+        for text, speed in ENCODE_SPEED_CHOICES:
+            self.video_encode_speed_combo.addItem(text, speed)
+        video_format_layout.addWidget(self.video_encode_speed_combo)
+        self.video_format_combo.currentIndexChanged.connect(self.update_video_format)
+        video_output_layout.addRow("输出格式:", video_format_layout)
+        
+        self.video_output_edit = QLineEdit()
+        self.video_output_edit.setReadOnly(True)
+        self.video_output_btn = QPushButton("浏览...")
+        self.video_output_btn.setStyleSheet("padding: 5px;")
+        self.video_output_btn.clicked.connect(self.browse_video_output)
+        
+        video_output_path_layout = QHBoxLayout()
+        video_output_path_layout.addWidget(self.video_output_edit)
+        video_output_path_layout.addWidget(self.video_output_btn)
+        
+        video_output_layout.addRow("输出文件:", video_output_path_layout)
+        video_output_group.setLayout(video_output_layout)
+        video_layout.addWidget(video_output_group)
+        
+        # 视频转换按钮和进度条
+        self.video_progress = QProgressBar()
+        self.video_progress.setTextVisible(False)
+        video_layout.addWidget(self.video_progress)
+        
+        self.video_convert_btn = QPushButton("开始转换")
+        self.video_convert_btn.setStyleSheet("padding: 10px; font-size: 16px;")
+        self.video_convert_btn.clicked.connect(self.convert_video_to_gif)
+        video_layout.addWidget(self.video_convert_btn)
+        
+        # 图片转GIF标签页
+        image_tab = QWidget()
+        image_layout = QVBoxLayout(image_tab)
+        image_layout.setContentsMargins(10, 10, 10, 10)
+        image_layout.setSpacing(10)
+        
+        # 图片选择部分
+        image_file_group = QGroupBox("图片文件")
+        image_file_layout = QVBoxLayout()
+        
+        self.image_dir_edit = QLineEdit()
+        self.image_dir_edit.setReadOnly(True)
+        self.image_dir_btn = QPushButton("选择文件夹...")
+        self.image_dir_btn.setStyleSheet("padding: 5px;")
+        self.image_dir_btn.clicked.connect(self.browse_image_dir)
+        
+        self.image_files_btn = QPushButton("选择多个文件...")
+        self.image_files_btn.setStyleSheet("padding: 5px;")
+        self.image_files_btn.clicked.connect(self.browse_image_files)
+        
+        image_path_layout = QHBoxLayout()
+        image_path_layout.addWidget(self.image_dir_edit)
+        image_path_layout.addWidget(self.image_dir_btn)
+        image_path_layout.addWidget(self.image_files_btn)
+        
+        image_file_layout.addLayout(image_path_layout)
+        
+        count_layout = QHBoxLayout()
+        self.image_count_label = QLabel("已选择 0 个图片文件")
+        count_layout.addWidget(self.image_count_label)
+        count_layout.addStretch()
+        # 监视文件夹：采集设备陆续写入的新帧自动加入图片列表
+        self.image_watch_check = QCheckBox("监视文件夹中的新图片")
+        self.image_watch_check.toggled.connect(self.update_folder_watch)
+        count_layout.addWidget(self.image_watch_check)
+        image_file_layout.addLayout(count_layout)
+        
+        self.folder_watch_timer = QTimer(self)
+        self.folder_watch_timer.setInterval(WATCH_INTERVAL_MS)
+        self.folder_watch_timer.timeout.connect(self.poll_folder_watch)
+        
+        self.image_info_label = QLabel("")
+        image_file_layout.addWidget(self.image_info_label)
+        
+        image_file_group.setLayout(image_file_layout)
+        image_layout.addWidget(image_file_group)
+        
+        # 图片转换设置
+        image_settings_group = QGroupBox("转换设置")
+        image_settings_layout = QFormLayout()
+        image_settings_layout.setLabelAlignment(Qt.AlignLeft)
+        
+        self.image_duration_spin = QSpinBox()
+        self.image_duration_spin.setRange(50, 5000)
+        self.image_duration_spin.setValue(500)
+        self.image_duration_spin.setSingleStep(50)
+        image_settings_layout.addRow("每帧持续时间 (毫秒):", self.image_duration_spin)
+        
+        self.image_loop_spin = QSpinBox()
+        self.image_loop_spin.setRange(0, 100)
+        self.image_loop_spin.setValue(0)
+        self.image_loop_spin.setSpecialValueText("无限循环")
+        image_settings_layout.addRow("循环次数:", self.image_loop_spin)
+        
+        # 添加尺寸设置
+        img_size_layout = QHBoxLayout()
+        
+        self.image_resize_check = QCheckBox("调整尺寸")
+        self.image_resize_check.setChecked(False)
+        img_size_layout.addWidget(self.image_resize_check)
+        
+        self.image_width_spin = QSpinBox()
+        self.image_width_spin.setRange(10, 3840)
+        self.image_width_spin.setValue(800)
+        self.image_width_spin.setEnabled(False)
+        img_size_layout.addWidget(QLabel("宽:"))
+        img_size_layout.addWidget(self.image_width_spin)
+        
+        self.image_height_spin = QSpinBox()
+        self.image_height_spin.setRange(10, 2160)
+        self.image_height_spin.setValue(600)
+        self.image_height_spin.setEnabled(False)
+        img_size_layout.addWidget(QLabel("高:"))
+        img_size_layout.addWidget(self.image_height_spin)
+        
+        self.image_resize_mode_combo = QComboBox()
+        for text, mode in RESIZE_MODE_CHOICES:
+            self.image_resize_mode_combo.addItem(text, mode)
+        self.image_resize_mode_combo.setEnabled(False)
+        img_size_layout.addWidget(self.image_resize_mode_combo)
+        
+        # 连接复选框事件
+        self.image_resize_check.toggled.connect(self.image_width_spin.setEnabled)
+        self.image_resize_check.toggled.connect(self.image_height_spin.setEnabled)
+        self.image_resize_check.toggled.connect(self.image_resize_mode_combo.setEnabled)
+        
+        image_settings_layout.addRow("尺寸设置:", img_size_layout)
+        
+        # 并行解码设置
+        self.image_workers_spin = QSpinBox()
+        self.image_workers_spin.setRange(1, max(64, default_worker_count()))
+        self.image_workers_spin.setValue(default_worker_count())
+        image_settings_layout.addRow("并行解码数:", self.image_workers_spin)
+        
+        # 调色板设置
+        palette_layout = QHBoxLayout()
+        self.image_palette_combo = QComboBox()
+        for text, mode in PALETTE_MODE_CHOICES:
+            self.image_palette_combo.addItem(text, mode)
+        palette_layout.addWidget(self.image_palette_combo)
+        self.image_dither_check = QCheckBox("抖动")
+        palette_layout.addWidget(self.image_dither_check)
+        image_settings_layout.addRow("调色板:", palette_layout)
+        
+        # 并行编码设置：GIF 的量化和压缩分给多个进程，输出不变；同时运行多个任务时保持 1 即可
+        self.image_encode_workers_spin = QSpinBox()
+        self.image_encode_workers_spin.setRange(1, max(64, default_worker_count()))
+        self.image_encode_workers_spin.setValue(1)
+        image_settings_layout.addRow("并行编码数:", self.image_encode_workers_spin)
+        
+        # 重复帧设置
+        dedup_layout = QHBoxLayout()
+        self.image_dedup_check = QCheckBox("合并重复帧")
+        dedup_layout.addWidget(self.image_dedup_check)
+        self.image_dedup_spin = QDoubleSpinBox()
+        self.image_dedup_spin.setRange(0.0, 20.0)
+        self.image_dedup_spin.setSingleStep(0.5)
+        self.image_dedup_spin.setValue(0.0)
+        self.image_dedup_spin.setSuffix(" %")
+        self.image_dedup_spin.setEnabled(False)
+        dedup_layout.addWidget(QLabel("容差:"))
+        dedup_layout.addWidget(self.image_dedup_spin)
+        self.image_dedup_check.toggled.connect(self.image_dedup_spin.setEnabled)
+        image_settings_layout.addRow("重复帧:", dedup_layout)
+        
+        image_settings_group.setLayout(image_settings_layout)
+        image_layout.addWidget(image_settings_group)
+        
+        # 设置变化时更新预计输出
+        self.image_duration_spin.valueChanged.connect(self.update_image_estimate)
+        self.image_resize_check.toggled.connect(self.update_image_estimate)
+        self.image_width_spin.valueChanged.connect(self.update_image_estimate)
+        self.image_height_spin.valueChanged.connect(self.update_image_estimate)
+        self.image_resize_mode_combo.currentIndexChanged.connect(self.update_image_estimate)
+        
+        # 图片输出设置
+        image_output_group = QGroupBox("输出设置")
+        image_output_layout = QFormLayout()
+        image_output_layout.setLabelAlignment(Qt.AlignLeft)
+        
+        # 输出格式、画质和编码速度
+        image_format_layout = QHBoxLayout()
+        self.image_format_combo = QComboBox()
+        for text, fmt in OUTPUT_FORMAT_CHOICES:
+            self.image_format_combo.addItem(text, fmt)
+        image_format_layout.addWidget(self.image_format_combo)
+        image_format_layout.addWidget(QLabel("画质:"))
+        self.image_quality_spin = QSpinBox()
+        self.image_quality_spin.setRange(0, 100)
+        self.image_quality_spin.setValue(DEFAULT_QUALITY)
+        image_format_layout.addWidget(self.image_quality_spin)
+        image_format_layout.addWidget(QLabel("速度:"))
+        self.image_encode_speed_combo = QComboBox()
+        for text, speed in ENCODE_SPEED_CHOICES:
+            self.image_encode_speed_combo.addItem(text, speed)
+        image_format_layout.addWidget(self.image_encode_speed_combo)
+        self.image_format_combo.currentIndexChanged.connect(self.update_image_format)
+        image_output_layout.addRow("输出格式:", image_format_layout)
+        
+        self.image_output_edit = QLineEdit()
+        self.image_output_edit.setReadOnly(True)
+        self.image_output_btn = QPushButton("浏览...")
+        self.image_output_btn.setStyleSheet("padding: 5px;")
+        self.image_output_btn.clicked.connect(self.browse_image_output)
+        
+        image_output_path_layout = QHBoxLayout()
+        image_output_path_layout.addWidget(self.image_output_edit)
+        image_output_path_layout.addWidget(self.image_output_btn)
+        
+        image_output_layout.addRow("输出文件:", image_output_path_layout)
+        image_output_group.setLayout(image_output_layout)
+        image_layout.addWidget(image_output_group)
+        
+        # 图片转换按钮和进度条
+        self.image_progress = QProgressBar()
+        self.image_progress.setTextVisible(False)
+        image_layout.addWidget(self.image_progress)
+        
+        self.image_convert_btn = QPushButton("开始转换")
+        self.image_convert_btn.setStyleSheet("padding: 10px; font-size: 16px;")
+        self.image_convert_btn.clicked.connect(self.convert_images_to_gif)
+        image_layout.addWidget(self.image_convert_btn)
+        
+        # 添加标签页
+        tabs.addTab(video_tab, "视频转GIF")
+        tabs.addTab(image_tab, "图片转GIF")
+        
+        # 任务队列
+        queue_group = QGroupBox("任务队列")
+        queue_layout = QVBoxLayout()
+        
+        self.job_table = QTableWidget(0, len(JOB_COLUMNS))
+        self.job_table.setHorizontalHeaderLabels(JOB_COLUMNS)
+        self.job_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.job_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.job_table.verticalHeader().setVisible(False)
+        self.job_table.horizontalHeader().setSectionResizeMode(len(JOB_COLUMNS) - 1, QHeaderView.Stretch)
+        self.job_table.itemDoubleClicked.connect(self.show_job_details)
+        queue_layout.addWidget(self.job_table)
+        
+        queue_buttons = QHBoxLayout()
+        for text, slot in (("暂停", self.pause_selected_jobs), ("继续", self.resume_selected_jobs),
+                           ("取消", self.cancel_selected_jobs), ("提高优先级", self.raise_selected_jobs),
+                           ("降低优先级", self.lower_selected_jobs), ("清除已结束", self.clear_finished_jobs),
+                           ("导出性能数据", self.export_selected_stats)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            queue_buttons.addWidget(button)
+        queue_buttons.addStretch()
+        queue_buttons.addWidget(QLabel("同时运行:"))
+        self.job_concurrency_spin = QSpinBox()
+        self.job_concurrency_spin.setRange(1, max(16, default_worker_count()))
+        self.job_concurrency_spin.setValue(default_concurrency())
+        queue_buttons.addWidget(self.job_concurrency_spin)
+        queue_layout.addLayout(queue_buttons)
+        queue_group.setLayout(queue_layout)
+        
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(tabs)
+        splitter.addWidget(queue_group)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        main_layout.addWidget(splitter)
+        
+        # 设置主窗口
+        self.setCentralWidget(main_widget)
+        
+        # 初始化变量
+        self.selected_image_paths = []
+        self.video_job = None
+        self.image_job = None
+        self.job_rows = {}
+        self.job_signals = JobSignals()
+        self.job_signals.changed.connect(self.on_job_changed)
+        self.scheduler = JobScheduler(self.job_concurrency_spin.value(), listener=self.job_signals.changed.emit)
+        self.job_concurrency_spin.valueChanged.connect(self.scheduler.set_max_workers)
+        self.source_video_info = None
+        self.preview_image = None
+        self.preview_request = None
+        self.first_image_info = None
+        self.image_source = None
+        self.folder_watcher = None
+        self.folder_polling = False
+        self.probe_workers = set()
+        
+        # 按默认输出格式启用或禁用相关控件
+        self.update_video_format()
+        self.update_image_format()
+    
+    def browse_video(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择视频文件", "", "视频文件 (*.mp4 *.avi *.mov *.mkv);;所有文件 (*)"
+        )
+        if file_path:
+            self.video_path_edit.setText(file_path)
+            
+            # 自动设置输出路径
+            output_path = os.path.splitext(file_path)[0] + FORMAT_EXTENSIONS[self.video_format_combo.currentData()]
+            self.video_output_edit.setText(output_path)
+            
+            # 在后台读取视频信息，完成后设置尺寸控件和预览
+            self.source_video_info = None
+            self.preview_image = None
+            self.video_scrub_slider.setEnabled(False)
+            self.video_info_label.setText("正在读取视频信息...")
+            self.start_probe(video_info, file_path, self.on_video_probed)
+    
+    def browse_video_output(self):
+        file_path = self.save_output_dialog(self.video_format_combo.currentData())
+        if file_path:
+            self.video_output_edit.setText(file_path)
+    
+    def browse_image_dir(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "选择图片文件夹")
+        if dir_path:
+            self.image_dir_edit.setText(dir_path)
+            
+            # 在后台列出文件夹中的所有图片文件（自然排序）
+            self.start_image_scan(dir_path)
+    
+    def browse_image_files(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "选择图片文件", "", "图片文件 (*.jpg *.jpeg *.png);;所有文件 (*)"
+        )
+        if file_paths:
+            # 设置第一个文件的目录作为显示路径
+            if file_paths:
+                self.image_dir_edit.setText(os.path.dirname(file_paths[0]) + "/ (多个文件)")
+            
+            # 在后台按自然顺序排序
+            self.start_image_scan(file_paths)
+    
+    def start_probe(self, probe, source, callback):
+        """在后台线程中探测文件，完成后在界面线程中回调"""
+        worker = ProbeWorker(probe, source)
+        worker.probed.connect(callback)
+        worker.finished.connect(self.release_probe_worker)
+        self.probe_workers.add(worker)
+        worker.start()
+    
+    def release_probe_worker(self):
+        self.probe_workers.discard(self.sender())
+    
+    def on_video_probed(self, info):
+        # 用户已选择了其他文件时忽略过期的结果
+        if self.sender().source != self.video_path_edit.text():
+            return
+        if info is None:
+            self.video_info_label.setText("无法读取视频信息")
+            return
+        self.source_video_info = info
+        width, height = info['size']
+        self.video_width_spin.setValue(width)
+        self.video_height_spin.setValue(height)
+        
+        # 时间范围默认为整段视频，裁剪区域默认为整个画面
+        duration = info['duration']
+        for spin in (self.video_start_spin, self.video_end_spin):
+            spin.setRange(0.0, duration)
+        self.video_start_spin.setValue(0.0)
+        self.video_end_spin.setValue(duration)
+        for spin, value in zip(self.video_crop_spins, (0, 0, width, height)):
+            spin.setValue(value)
+        self.video_scrub_slider.setRange(0, int(duration * 10))
+        self.video_scrub_slider.setValue(0)
+        self.video_scrub_slider.setEnabled(True)
+        self.request_preview()
+        self.update_video_estimate()
+    
+    def scrub_time(self):
+        """滑块对应的时间（秒），滑块以 0.1 秒为单位"""
+        return self.video_scrub_slider.value() / 10.0
+    
+    def on_scrub_moved(self, value):
+        self.video_scrub_label.setText(f"{self.scrub_time():.1f} 秒")
+        self.preview_timer.start()
+    
+    def request_preview(self):
+        """在后台解码滑块位置附近的关键帧"""
+        info = self.source_video_info
+        if not info:
+            return
+        size, _ = fit_size(info['size'], PREVIEW_SIZE, RESIZE_FIT)
+        self.preview_request = (self.video_path_edit.text(), self.scrub_time(), size)
+        self.start_probe(preview_frame, self.preview_request, self.on_preview_loaded)
+    
+    def on_preview_loaded(self, data):
+        # 只显示最近一次请求的结果
+        if self.sender().source is not self.preview_request or data is None:
+            return
+        width, height = self.preview_request[2]
+        self.preview_image = QImage(data, width, height, width * 3, QImage.Format_RGB888).copy()
+        self.refresh_preview()
+    
+    def video_crop(self):
+        if self.video_crop_check.isChecked():
+            return tuple(spin.value() for spin in self.video_crop_spins)
+        return None
+    
+    def refresh_preview(self):
+        """显示预览帧，并画出裁剪区域"""
+        if self.preview_image is None or not self.source_video_info:
+            return
+        pixmap = QPixmap.fromImage(self.preview_image)
+        crop = self.video_crop()
+        if crop:
+            scale = self.preview_image.width() / self.source_video_info['size'][0]
+            left, top, width, height = (round(v * scale) for v in crop)
+            painter = QPainter(pixmap)
+            painter.setPen(QPen(QColor(255, 80, 80), 2))
+            painter.drawRect(left, top, width, height)
+            painter.end()
+        self.video_preview_label.setPixmap(pixmap)
+    
+    def update_video_estimate(self):
+        info = self.source_video_info
+        if not info:
+            return
+        width, height = info['size']
+        start, end = self.video_time_range()
+        try:
+            estimate = estimate_video_output(info, self.video_fps_spin.value(), self.video_speed_spin.value(),
+                                             self.video_resize(), self.video_resize_mode_combo.currentData(),
+                                             start, end, self.video_crop())
+        except ValueError as e:
+            self.video_info_label.setText(str(e))
+            return
+        self.video_info_label.setText(f"{width}×{height}，{info['duration']:.1f} 秒，{info['fps']:g} fps\n"
+                                      + describe_estimate(estimate))
+    
+    def start_image_scan(self, source):
+        self.image_source = source
+        self.selected_image_paths = []
+        self.first_image_info = None
+        # 列出图片之后再开始监视，已有的图片不作为新图片
+        self.folder_watcher = None
+        self.folder_watch_timer.stop()
+        self.image_count_label.setText("正在读取图片...")
+        self.image_info_label.setText("")
+        self.start_probe(scan_images, source, self.on_images_scanned)
+    
+    def on_images_scanned(self, result):
+        if self.sender().source is not self.image_source:
+            return
+        if result is None:
+            self.image_count_label.setText("无法读取图片")
+            return
+        self.selected_image_paths, first_info = result
+        self.image_count_label.setText(f"已选择 {len(self.selected_image_paths)} 个图片文件")
+        if first_info:
+            self.set_first_image(first_info)
+        self.update_folder_watch()
+        self.update_image_estimate()
+    
+    def set_first_image(self, info):
+        self.first_image_info = info
+        
+        # 自动设置输出路径
+        output_dir = os.path.dirname(self.selected_image_paths[0])
+        output_path = os.path.join(output_dir, "output" + FORMAT_EXTENSIONS[self.image_format_combo.currentData()])
+        self.image_output_edit.setText(output_path)
+        
+        # 第一张图片的尺寸设置到尺寸控件
+        width, height = info['size']
+        self.image_width_spin.setValue(width)
+        self.image_height_spin.setValue(height)
+    
+    def update_folder_watch(self):
+        """按复选框开始或停止监视当前图片文件夹（选择多个文件时不监视）"""
+        source = self.image_source
+        if self.image_watch_check.isChecked() and isinstance(source, str):
+            if self.folder_watcher is None or self.folder_watcher.dir_path != source:
+                self.folder_watcher = FolderWatcher(source, self.selected_image_paths)
+            self.folder_watch_timer.start()
+        else:
+            self.folder_watcher = None
+            self.folder_watch_timer.stop()
+    
+    def poll_folder_watch(self):
+        # 上一次检查还没结束时跳过，文件很多时遍历可能超过检查间隔
+        if self.folder_watcher is None or self.folder_polling:
+            return
+        self.folder_polling = True
+        self.start_probe(poll_image_folder, (self.folder_watcher, self.selected_image_paths),
+                         self.on_folder_polled)
+    
+    def on_folder_polled(self, result):
+        self.folder_polling = False
+        watcher, _ = self.sender().source
+        if watcher is not self.folder_watcher or result is None:
+            return
+        self.selected_image_paths, added, first_info = result
+        if first_info:
+            # 文件夹原来是空的：第一张新图片决定输出路径和尺寸
+            self.set_first_image(first_info)
+        self.image_count_label.setText(f"已选择 {len(self.selected_image_paths)} 个图片文件（新增 {added} 个）")
+        self.update_image_estimate()
+    
+    def update_image_estimate(self):
+        if not self.first_image_info:
+            return
+        estimate = estimate_images_output(self.selected_image_paths, self.first_image_info,
+                                          self.image_duration_spin.value(), self.image_resize(),
+                                          self.image_resize_mode_combo.currentData())
+        self.image_info_label.setText(describe_estimate(estimate))
+    
+    def video_time_range(self):
+        """截取范围 (开始, 结束)；从头开始或到结尾时对应的值为 None"""
+        if not self.source_video_info:
+            return None, None
+        start = self.video_start_spin.value()
+        end = self.video_end_spin.value()
+        return (start or None), (end if end < self.source_video_info['duration'] else None)
+    
+    def video_resize(self):
+        if self.video_resize_check.isChecked():
+            return (self.video_width_spin.value(), self.video_height_spin.value())
+        return None
+    
+    def image_resize(self):
+        if self.image_resize_check.isChecked():
+            return (self.image_width_spin.value(), self.image_height_spin.value())
+        return None
+    
+    def browse_image_output(self):
+        file_path = self.save_output_dialog(self.image_format_combo.currentData())
+        if file_path:
+            self.image_output_edit.setText(file_path)
+    
+    def save_output_dialog(self, output_format):
+        """按输出格式选择保存路径，缺少扩展名时补上"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "保存输出文件", "", OUTPUT_FORMAT_FILTERS[output_format] + ";;所有文件 (*)"
+        )
+        extension = FORMAT_EXTENSIONS[output_format]
+        if file_path and not file_path.lower().endswith(extension):
+            if not (output_format == FORMAT_APNG and file_path.lower().endswith('.apng')):
+                file_path += extension
+        return file_path
+    
+    @staticmethod
+    def replace_output_extension(edit, output_format):
+        """切换输出格式时同步修改已选择的输出路径的扩展名"""
+        path = edit.text()
+        if path:
+            edit.setText(os.path.splitext(path)[0] + FORMAT_EXTENSIONS[output_format])
+    
+    def update_video_format(self):
+        """调色板和目标大小只用于 GIF；画质只用于 WebP 和 MP4"""
+        output_format = self.video_format_combo.currentData()
+        is_gif = output_format == FORMAT_GIF
+        if not is_gif:
+            self.video_target_check.setChecked(False)
+        self.video_target_check.setEnabled(is_gif)
+        self.video_palette_combo.setEnabled(is_gif)
+        self.video_encode_workers_spin.setEnabled(is_gif)
+        self.video_dither_check.setEnabled(is_gif and not self.video_target_check.isChecked())
+        self.video_quality_spin.setEnabled(output_format in QUALITY_FORMATS)
+        self.video_encode_speed_combo.setEnabled(not is_gif)
+        self.replace_output_extension(self.video_output_edit, output_format)
+    
+    def update_image_format(self):
+        """调色板只用于 GIF；画质只用于 WebP 和 MP4"""
+        output_format = self.image_format_combo.currentData()
+        is_gif = output_format == FORMAT_GIF
+        self.image_palette_combo.setEnabled(is_gif)
+        self.image_encode_workers_spin.setEnabled(is_gif)
+        self.image_dither_check.setEnabled(is_gif)
+        self.image_quality_spin.setEnabled(output_format in QUALITY_FORMATS)
+        self.image_encode_speed_combo.setEnabled(not is_gif)
+        self.replace_output_extension(self.image_output_edit, output_format)
+    
+    def convert_video_to_gif(self):
+        video_path = self.video_path_edit.text()
+        output_path = self.video_output_edit.text()
+        
+        if not video_path or not output_path:
+            QMessageBox.warning(self, "错误", "请选择视频文件和输出路径")
+            return
+        
+        # 获取设置
+        fps = self.video_fps_spin.value()
+        speed_factor = self.video_speed_spin.value()
+        
+        # 获取尺寸、截取和裁剪设置
+        resize = self.video_resize()
+        start, end = self.video_time_range()
+        
+        # 加入任务队列
+        from cache import get_default_cache
+        from gif_core import VideoToGifConverter
+        options = dict(resize_mode=self.video_resize_mode_combo.currentData(),
+                       start=start, end=end, crop=self.video_crop(),
+                       palette_mode=self.video_palette_combo.currentData(),
+                       dither=self.video_dither_check.isChecked(),
+                       dedup_threshold=self.dedup_threshold(self.video_dedup_check, self.video_dedup_spin),
+                       encode_workers=self.video_encode_workers_spin.value(),
+                       cache=get_default_cache())
+        if not self.video_target_check.isChecked():
+            options.update(output_format=self.video_format_combo.currentData(),
+                           quality=self.video_quality_spin.value(),
+                           speed=self.video_encode_speed_combo.currentData())
+        if self.video_target_check.isChecked():
+            # 帧率和尺寸作为上限，按目标大小自动选择
+            from size_budget import TargetSizeVideoConverter
+            target_bytes = int(self.video_target_spin.value() * 2**20)
+            factory = functools.partial(TargetSizeVideoConverter, video_path, output_path, target_bytes,
+                                        fps, speed_factor, resize, **options)
+        else:
+            factory = functools.partial(VideoToGifConverter, video_path, output_path, fps, speed_factor, resize,
+                                        **options)
+        self.video_progress.setValue(0)
+        self.video_job = self.scheduler.submit(Job(os.path.basename(output_path), factory, output_path=output_path))
+    
+    def convert_images_to_gif(self):
+        if not self.selected_image_paths:
+            QMessageBox.warning(self, "错误", "请选择图片文件")
+            return
+        
+        output_path = self.image_output_edit.text()
+        if not output_path:
+            QMessageBox.warning(self, "错误", "请选择输出路径")
+            return
+        
+        # 获取设置
+        duration_ms = self.image_duration_spin.value()
+        loop_count = self.image_loop_spin.value()
+        
+        # 获取尺寸设置
+        resize = self.image_resize()
+        
+        workers = self.image_workers_spin.value()
+        
+        # 加入任务队列
+        from cache import get_default_cache
+        from gif_core import ImagesToGifConverter
+        factory = functools.partial(ImagesToGifConverter, list(self.selected_image_paths), output_path,
+                                    duration_ms, loop_count, resize, workers=workers,
+                                    resize_mode=self.image_resize_mode_combo.currentData(),
+                                    palette_mode=self.image_palette_combo.currentData(),
+                                    dither=self.image_dither_check.isChecked(),
+                                    dedup_threshold=self.dedup_threshold(self.image_dedup_check,
+                                                                         self.image_dedup_spin),
+                                    output_format=self.image_format_combo.currentData(),
+                                    quality=self.image_quality_spin.value(),
+                                    speed=self.image_encode_speed_combo.currentData(),
+                                    encode_workers=self.image_encode_workers_spin.value(),
+                                    cache=get_default_cache())
+        self.image_progress.setValue(0)
+        self.image_job = self.scheduler.submit(Job(os.path.basename(output_path), factory, output_path=output_path))
+    
+    @staticmethod
+    def dedup_threshold(check, spin):
+        """未勾选合并重复帧时返回 None"""
+        return spin.value() if check.isChecked() else None
+    
+    @staticmethod
+    def dedup_message(stats):
+        if stats and stats.frames_dropped:
+            return f"已合并 {stats.frames_dropped} 个重复帧，约节省 {stats.time_saved:.1f} 秒"
+        return ""
+    
+    @staticmethod
+    def cache_message(stats):
+        from instrumentation import CACHE_HIT_FRAMES, CACHE_HIT_RESULT
+        if stats and stats.cache_hit == CACHE_HIT_RESULT:
+            return "相同设置已转换过，直接使用了缓存的结果"
+        if stats and stats.cache_hit == CACHE_HIT_FRAMES:
+            return "复用了缓存的解码帧"
+        return ""
+    
+    @staticmethod
+    def live_message(job):
+        """运行中任务的实时速度和预计剩余时间"""
+        stats = job.live_stats()
+        parts = []
+        if stats and stats.frames_encoded:
+            parts.append(f"{stats.fps:.1f} 帧/秒")
+        eta = job.eta()
+        if eta is not None:
+            parts.append(f"剩余约 {eta:.0f} 秒")
+        return "，".join(parts)
+    
+    def job_message(self, job):
+        if job.state == STATE_FAILED:
+            return job.error or ""
+        if job.state == STATE_RUNNING:
+            return self.live_message(job)
+        if job.state == STATE_DONE:
+            parts = [job.output_path, self.dedup_message(job.stats), self.cache_message(job.stats)]
+            return "；".join(part for part in parts if part)
+        return ""
+    
+    def on_job_changed(self, job):
+        """更新任务队列表格和对应标签页的进度条"""
+        row = self.job_rows.get(job.id)
+        if row is None:
+            row = self.job_table.rowCount()
+            self.job_table.insertRow(row)
+            self.job_rows[job.id] = row
+            name_item = QTableWidgetItem(job.name)
+            name_item.setData(Qt.UserRole, job)
+            self.job_table.setItem(row, 0, name_item)
+            progress = QProgressBar()
+            progress.setTextVisible(True)
+            self.job_table.setCellWidget(row, 3, progress)
+        
+        self.job_table.setItem(row, 1, QTableWidgetItem(JOB_STATE_TEXT[job.state]))
+        self.job_table.setItem(row, 2, QTableWidgetItem(str(job.priority)))
+        self.job_table.cellWidget(row, 3).setValue(job.progress)
+        message = QTableWidgetItem(self.job_message(job))
+        message.setToolTip(message.text())
+        self.job_table.setItem(row, 4, message)
+        
+        for tab_job, progress_bar in ((self.video_job, self.video_progress), (self.image_job, self.image_progress)):
+            if job is tab_job:
+                progress_bar.setValue(job.progress)
+        
+        if job.state == STATE_DONE:
+            self.statusBar().showMessage(f"已完成：{job.output_path}", 10000)
+        elif job.state == STATE_FAILED:
+            self.statusBar().showMessage(f"转换出错：{job.name}：{job.error}", 10000)
+    
+    def selected_jobs(self):
+        rows = sorted({index.row() for index in self.job_table.selectionModel().selectedRows()})
+        return [self.job_table.item(row, 0).data(Qt.UserRole) for row in rows]
+    
+    def pause_selected_jobs(self):
+        for job in self.selected_jobs():
+            self.scheduler.pause(job)
+    
+    def resume_selected_jobs(self):
+        for job in self.selected_jobs():
+            self.scheduler.resume(job)
+    
+    def cancel_selected_jobs(self):
+        for job in self.selected_jobs():
+            self.scheduler.cancel(job)
+    
+    def raise_selected_jobs(self):
+        for job in self.selected_jobs():
+            self.scheduler.set_priority(job, job.priority + 1)
+    
+    def lower_selected_jobs(self):
+        for job in self.selected_jobs():
+            self.scheduler.set_priority(job, job.priority - 1)
+    
+    def clear_finished_jobs(self):
+        """从表格中移除已结束的任务"""
+        self.scheduler.clear_finished()
+        for row in reversed(range(self.job_table.rowCount())):
+            if self.job_table.item(row, 0).data(Qt.UserRole).finished:
+                self.job_table.removeRow(row)
+        self.job_rows = {self.job_table.item(row, 0).data(Qt.UserRole).id: row
+                         for row in range(self.job_table.rowCount())}
+    
+    def closeEvent(self, event):
+        # 关闭窗口时取消未完成的任务，结束 ffmpeg 进程并清理临时文件
+        for job in list(self.scheduler.jobs):
+            self.scheduler.cancel(job)
+        self.scheduler.wait(5)
+        super().closeEvent(event)
+    
+    def export_selected_stats(self):
+        """把选中的已完成任务的性能统计导出为 JSON 和 Chrome trace 文件"""
+        jobs = [job for job in self.selected_jobs() if job.stats]
+        if not jobs:
+            QMessageBox.information(self, "导出性能数据", "请先选中已完成的任务")
+            return
+        directory = QFileDialog.getExistingDirectory(self, "选择导出目录")
+        if not directory:
+            return
+        try:
+            for job in jobs:
+                base = os.path.join(directory, os.path.splitext(job.name)[0] + f".{job.id}")
+                job.stats.write_json(base + ".stats.json")
+                job.stats.write_trace(base + ".trace.json")
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"导出失败：\n{e}")
+            return
+        self.statusBar().showMessage(f"已导出 {len(jobs)} 个任务的性能数据到 {directory}", 10000)
+    
+    def show_job_details(self, item):
+        job = self.job_table.item(item.row(), 0).data(Qt.UserRole)
+        if job.state == STATE_FAILED:
+            QMessageBox.critical(self, "错误", f"转换过程中出错：\n{job.error}")
+        elif job.state == STATE_DONE:
+            QMessageBox.information(self, "完成", f"已成功转换：\n{job.output_path}\n\n{job.stats.summary()}")
+
+
+def run_gui(argv=None):
+    """启动图形界面"""
+    app = QApplication(sys.argv if argv is None else argv)
+    window = GifConverterApp()
+    window.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(run_gui())
@@ -0,0 +1,149 @@
+"""多进程 GIF 编码
+
+调色板确定后，各帧的量化、帧间差分和 LZW 压缩只依赖本帧和上一帧。
+帧按连续的小段分给工作进程，每段附带上一段的最后一帧作为差分的参考帧。
+RGB 帧连同参考帧写入临时的帧存储文件，工作进程按路径映射读取，像素不经进程间管道复制；
+其他帧（带透明通道的帧、主进程量化后的调色板图像）直接序列化传递。
+工作进程返回各帧的图像块（图像描述符 + 颜色表 + LZW 数据子块），主进程按原始顺序拼接，
+并负责只能顺序计算的部分：文件头、累计舍入的帧时长和 Graphic Control Extension。
+输出与单进程编码逐字节相同。
+
+按场景切换调色板的量化器依赖前面的帧，这时量化在主进程中完成，工作进程只做差分和压缩。
+"""
+import os
+import tempfile
+import time
+from collections import deque
+from itertools import islice
+
+from frame_store import FrameStoreWriter
+from gif_writer import DISPOSE_NONE, FrameEncoder, GifWriter, frame_size
+from palette import PaletteQuantizer
+
+
+# 每个任务包含的连续帧数：越大进程间往返越少、参考帧的重复量化越少，但首尾等待越长
+CHUNK_FRAMES = 8
+
+# 工作进程中的编码参数：(画布尺寸, 全局调色板, 帧间差分, 量化器)
+_encode_options = None
+
+
+def _init_worker(size, palette, optimize, quantizer):
+    global _encode_options
+    _encode_options = (size, palette, optimize, quantizer)
+
+
+def encode_chunk(frames, primed=False):
+    """在工作进程中编码一段连续帧，返回 ([(图像块, 透明色索引)], [(阶段, 开始, 结束)], 进程号)
+
+    frames 为帧列表或 FrameStore；primed 为真时第一帧是上一段的最后一帧，只作为帧间差分的参考帧，不输出。
+    """
+    size, palette, optimize, quantizer = _encode_options
+    encoder = FrameEncoder(size, palette, optimize)
+    events = []
+
+    def quantize(frame):
+        if quantizer is None:
+            return frame
+        start = time.perf_counter()
+        frame = quantizer.quantize(frame)
+        events.append(('quantize', start, time.perf_counter()))
+        return frame
+
+    frames = iter(frames)
+    if primed:
+        encoder.prepare(quantize(next(frames)))
+    blocks = []
+    for frame in frames:
+        frame = quantize(frame)
+        start = time.perf_counter()
+        blocks.append(encoder.encode(frame))
+        events.append(('encode', start, time.perf_counter()))
+    return blocks, events, os.getpid()
+
+
+def pack_frames(frames, path):
+    """尺寸一致的 RGB 帧写入帧存储文件并返回 FrameStore（序列化时只传路径），否则原样返回列表"""
+    writer = FrameStoreWriter(path)
+    for frame in frames:
+        if not writer.accepts(frame):
+            writer.discard()
+            return frames
+        writer.append(frame)
+    return writer.close()
+
+
+def write_parallel_gif_frames(timed_frames, output_path, workers, loop=0, progress=None, stats=None,
+                              quantizer=None, optimize=True, disposal=DISPOSE_NONE, chunk_frames=CHUNK_FRAMES):
+    """用 workers 个进程把 (帧, 时长毫秒) 迭代器编码为 GIF，返回写入的帧数
+
+    参数与 write_timed_gif_frames 相同；不足一段的短序列直接在当前进程中编码。
+    """
+    from gif_writer import write_timed_gif_frames
+
+    timed_frames = iter(timed_frames)
+    chunk = list(islice(timed_frames, chunk_frames))
+    if len(chunk) < chunk_frames:
+        return write_timed_gif_frames(chunk, output_path, loop, progress, stats, quantizer, optimize, disposal)
+
+    palette = quantizer.palette_bytes if quantizer else None
+    # 固定调色板的量化器可以在工作进程中并行量化；有状态的（按场景切换）在主进程中顺序量化
+    local_quantizer = None if quantizer is None or isinstance(quantizer, PaletteQuantizer) else quantizer
+    worker_quantizer = None if local_quantizer else quantizer
+
+    def quantized(frames):
+        if local_quantizer is None:
+            return frames
+        start = time.perf_counter()
+        frames = [local_quantizer.quantize(frame) for frame in frames]
+        if stats:
+            stats.record('quantize', start)
+        return frames
+
+    # 进程池模块导入较慢，只在并行编码时加载
+    from concurrent.futures import ProcessPoolExecutor
+    size = frame_size(chunk[0][0])
+    with GifWriter(output_path, size, loop=loop, palette=palette) as writer, \
+            tempfile.TemporaryDirectory() as temp_dir:
+        def write(future, durations, path):
+            blocks, events, worker = future.result()
+            # 这一段的帧存储文件已经用完
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            for (block, transparency), duration_ms in zip(blocks, durations):
+                writer.write_block(block, transparency, duration_ms, disposal)
+            if stats:
+                for stage, start, end in events:
+                    stats.record(stage, start, end, tid=worker)
+                stats.frames_encoded += len(blocks)
+            if progress:
+                progress(writer.frame_count)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(size, palette, optimize, worker_quantizer)) as pool:
+            # 只提前提交有限数量的任务，避免帧堆积占满内存
+            max_pending = workers * 2
+            pending = deque()
+            previous = None
+            index = 0
+            try:
+                while chunk:
+                    frames = quantized([frame for frame, _ in chunk])
+                    durations = [duration_ms for _, duration_ms in chunk]
+                    primed = optimize and previous is not None
+                    path = os.path.join(temp_dir, f'chunk_{index}.bin')
+                    packed = pack_frames([previous] + frames if primed else frames, path)
+                    pending.append((pool.submit(encode_chunk, packed, primed), durations, path))
+                    previous = frames[-1]
+                    index += 1
+                    if len(pending) >= max_pending:
+                        write(*pending.popleft())
+                    chunk = list(islice(timed_frames, chunk_frames))
+                while pending:
+                    write(*pending.popleft())
+            finally:
+                for future, _, _ in pending:
+                    future.cancel()
+    return writer.frame_count
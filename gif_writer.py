@@ -0,0 +1,303 @@
+import io
+import struct
+import time
+
+import numpy as np
+from PIL import Image, ImageFile
+
+
+# GIF 编码方式：ffmpeg 管道 / 内置增量编码器
+ENCODER_FFMPEG = 'ffmpeg'
+ENCODER_NATIVE = 'native'
+
+# GIF 帧的处置方式（Graphic Control Extension 中的 disposal method）
+DISPOSE_NONE = 1
+DISPOSE_BACKGROUND = 2
+
+
+def _color_table_bits(color_count):
+    """颜色表大小为 2 的幂，返回对应的位数（1~8）"""
+    return max(1, int(color_count - 1).bit_length())
+
+
+def _color_table(palette, bits):
+    """把调色板补齐为 2**bits 个颜色"""
+    table = bytes(palette[:3 * (1 << bits)])
+    return table + b"\0" * (3 * (1 << bits) - len(table))
+
+
+def _lzw_data(indexed):
+    """用 Pillow 的 C 编码器把调色板图像压缩为 LZW 数据子块"""
+    fp = io.BytesIO()
+    indexed.encoderconfig = (8, False)  # 最小码长 8，不交错
+    ImageFile._save(indexed, fp, [("gif", (0, 0) + indexed.size, 0, "P")])
+    return fp.getvalue()
+
+
+def to_indexed(frame):
+    """把帧转换为调色板图像，返回 (图像, 透明色索引)"""
+    if isinstance(frame, np.ndarray):
+        frame = Image.fromarray(np.ascontiguousarray(frame, dtype=np.uint8))
+
+    if frame.mode == 'P':
+        transparency = frame.info.get('transparency')
+        return frame, transparency if isinstance(transparency, int) else None
+
+    if frame.mode in ('RGBA', 'LA', 'PA') or 'transparency' in frame.info:
+        # 半透明像素按 50% 阈值处理为全透明，占用调色板最后一个索引
+        rgba = frame.convert('RGBA')
+        indexed = rgba.convert('RGB').convert('P', palette=Image.ADAPTIVE, colors=255)
+        alpha = np.asarray(rgba.getchannel('A'))
+        if (alpha < 128).any():
+            indices = np.asarray(indexed).copy()
+            indices[alpha < 128] = 255
+            palette = indexed.getpalette()
+            indexed = Image.fromarray(indices, 'P')
+            indexed.putpalette(palette)
+            return indexed, 255
+        return indexed, None
+
+    return frame.convert('RGB').convert('P', palette=Image.ADAPTIVE), None
+
+
+class DeltaOptimizer:
+    """帧间差分：只输出与上一帧不同的矩形区域，未变化的像素设为透明
+
+    只处理覆盖整个画布且不含透明像素的帧，其余帧原样输出并重置参考帧。
+    """
+
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.pixels_in = 0
+        self.pixels_out = 0
+        self._prev_indices = None
+        self._prev_palette = None
+
+    def reset(self):
+        self._prev_indices = None
+        self._prev_palette = None
+
+    def optimize(self, indexed):
+        """返回 (子区域图像, 偏移, 透明色索引)"""
+        self.pixels_in += indexed.width * indexed.height
+        palette_list = indexed.getpalette() or [0, 0, 0]
+        palette = np.array(palette_list, dtype=np.uint8).reshape(-1, 3)
+        indices = np.asarray(indexed)
+        prev_indices, prev_palette = self._prev_indices, self._prev_palette
+        self._prev_indices, self._prev_palette = indices, palette
+
+        if prev_indices is None:
+            self.pixels_out += indices.size
+            return indexed, (0, 0), None
+
+        # 调色板相同时直接比较索引，否则比较实际颜色
+        if np.array_equal(palette, prev_palette):
+            changed = indices != prev_indices
+        else:
+            changed = (palette[indices] != prev_palette[prev_indices]).any(axis=2)
+
+        rows = np.flatnonzero(changed.any(axis=1))
+        if len(rows) == 0:
+            # 与上一帧完全相同：输出 1×1 的透明像素，仅保留时长
+            sub = Image.fromarray(np.zeros((1, 1), dtype=np.uint8), 'P')
+            sub.putpalette(palette_list)
+            self.pixels_out += 1
+            return sub, (0, 0), 0
+        cols = np.flatnonzero(changed.any(axis=0))
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = cols[0], cols[-1] + 1
+        sub_indices = indices[top:bottom, left:right]
+        sub_changed = changed[top:bottom, left:right]
+        self.pixels_out += sub_indices.size
+
+        # 在颜色表范围内找一个变化像素没有用到的索引作为透明色
+        table_size = 1 << _color_table_bits(len(palette))
+        used = np.bincount(sub_indices[sub_changed], minlength=table_size)[:table_size]
+        free = np.flatnonzero(used == 0)
+        transparency = None
+        if len(free):
+            transparency = int(free[-1])
+            sub_indices = np.where(sub_changed, sub_indices, transparency).astype(np.uint8)
+
+        sub = Image.fromarray(np.ascontiguousarray(sub_indices), 'P')
+        sub.putpalette(palette_list)
+        return sub, (int(left), int(top)), transparency
+
+
+class FrameEncoder:
+    """把帧编码为 GIF 图像块（图像描述符 + 局部颜色表 + LZW 数据），不涉及时长和文件
+
+    帧间差分需要上一帧作为参考：顺序编码时由同一个编码器依次处理；
+    多进程编码时每段帧用新的编码器，先用 prepare() 处理上一段的最后一帧作为参考帧。
+    """
+
+    def __init__(self, size, palette=None, optimize=False):
+        self.size = tuple(size)
+        self.optimizer = DeltaOptimizer(size) if optimize else None
+        self.global_palette = bytes(palette) if palette is not None else None
+
+    def prepare(self, frame, offset=(0, 0)):
+        """转换为调色板图像并做帧间差分，返回 (图像, 偏移, 透明色索引)"""
+        indexed, transparency = to_indexed(frame)
+
+        # 超出画布的部分裁掉
+        x, y = offset
+        width = min(indexed.width, self.size[0] - x)
+        height = min(indexed.height, self.size[1] - y)
+        if (width, height) != indexed.size:
+            indexed = indexed.crop((0, 0, width, height))
+
+        # 帧间差分优化
+        if self.optimizer:
+            if transparency is None and offset == (0, 0) and indexed.size == self.size:
+                indexed, (x, y), transparency = self.optimizer.optimize(indexed)
+            else:
+                self.optimizer.reset()
+        return indexed, (x, y), transparency
+
+    def image_block(self, indexed, offset):
+        """图像描述符 + 局部颜色表 + LZW 数据；帧调色板与全局调色板一致时不写局部颜色表"""
+        flags = 0
+        table = b""
+        palette = indexed.getpalette() or []
+        if self.global_palette is None or bytes(palette[:len(self.global_palette)]) != self.global_palette:
+            bits = _color_table_bits(len(palette) // 3)
+            flags = 0x80 | (bits - 1)
+            table = _color_table(palette, bits)
+        x, y = offset
+        descriptor = struct.pack("<BHHHHB", 0x2C, x, y, indexed.width, indexed.height, flags)
+        # LZW 最小码长 + 数据子块 + 块结束符
+        return descriptor + table + b"\x08" + _lzw_data(indexed) + b"\0"
+
+    def encode(self, frame, offset=(0, 0)):
+        """返回 (图像块, 透明色索引)"""
+        indexed, offset, transparency = self.prepare(frame, offset)
+        return self.image_block(indexed, offset), transparency
+
+
+class GifWriter:
+    """增量 GIF 编码器：帧到达即写出，内存只占用当前帧和调色板"""
+
+    def __init__(self, output, size, loop=0, palette=None, optimize=False):
+        self.size = tuple(size)
+        self.loop = loop
+        self.frame_count = 0
+        self.encoder = FrameEncoder(size, palette, optimize)
+        self._own_file = isinstance(output, (str, bytes)) or hasattr(output, '__fspath__')
+        self._fp = open(output, 'wb') if self._own_file else output
+        self._closed = False
+        # 累计时长，把毫秒换算为 1/100 秒时不累积舍入误差
+        self._elapsed_ms = 0.0
+        self._elapsed_cs = 0
+        self._write_header()
+
+    def _write_header(self):
+        width, height = self.size
+        flags = 0
+        table = b""
+        palette = self.encoder.global_palette
+        if palette is not None:
+            bits = _color_table_bits(len(palette) // 3)
+            flags = 0x80 | ((bits - 1) << 4) | (bits - 1)
+            table = _color_table(palette, bits)
+
+        self._fp.write(b"GIF89a" + struct.pack("<HHBBB", width, height, flags, 0, 0) + table)
+
+        # NETSCAPE2.0 循环扩展，0 表示无限循环
+        if self.loop is not None:
+            self._fp.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\0")
+
+    def write_frame(self, frame, duration_ms, offset=(0, 0), disposal=DISPOSE_NONE):
+        """写入一帧；frame 可以是 PIL 图像或 HxWx3/4 的 uint8 数组"""
+        block, transparency = self.encoder.encode(frame, offset)
+        self.write_block(block, transparency, duration_ms, disposal)
+
+    def write_block(self, block, transparency, duration_ms, disposal=DISPOSE_NONE):
+        """写入已编码的图像块，前面加上 Graphic Control Extension：显示时长（1/100 秒）、处置方式和透明色"""
+        packed = (disposal << 2) | (1 if transparency is not None else 0)
+        self._elapsed_ms += duration_ms
+        delay = min(max(int(round(self._elapsed_ms / 10)) - self._elapsed_cs, 0), 0xFFFF)
+        self._elapsed_cs += delay
+        self._fp.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, packed,
+                                   delay, transparency or 0, 0))
+        self._fp.write(block)
+        self.frame_count += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._fp.write(b"\x3b")
+        if self._own_file:
+            self._fp.close()
+        else:
+            self._fp.flush()
+
+    def abort(self):
+        self._closed = True
+        if self._own_file:
+            self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def frame_size(frame):
+    """返回帧的 (宽, 高)"""
+    if isinstance(frame, np.ndarray):
+        return frame.shape[1], frame.shape[0]
+    return frame.size
+
+
+def write_gif_frames(frames, output_path, duration_ms, loop=0, progress=None, stats=None,
+                     quantizer=None, optimize=True):
+    """把任意帧迭代器增量写入 GIF（每帧时长相同），返回写入的帧数"""
+    return write_timed_gif_frames(((frame, duration_ms) for frame in frames), output_path, loop,
+                                  progress, stats, quantizer, optimize)
+
+
+def write_timed_gif_frames(timed_frames, output_path, loop=0, progress=None, stats=None,
+                           quantizer=None, optimize=True, disposal=DISPOSE_NONE, workers=1):
+    """把 (帧, 时长毫秒) 迭代器增量写入 GIF，返回写入的帧数
+
+    指定 quantizer 时所有帧映射到其调色板，并写入全局颜色表；
+    optimize 为真时只写出相邻帧之间变化的矩形区域。
+    带透明像素的序列应使用 DISPOSE_BACKGROUND（并关闭 optimize），否则透明处会露出上一帧。
+    workers 大于 1 时由多个进程并行量化和压缩（见 gif_parallel），输出与单进程相同。
+    """
+    if workers > 1:
+        from gif_parallel import write_parallel_gif_frames
+        return write_parallel_gif_frames(timed_frames, output_path, workers, loop, progress, stats,
+                                         quantizer, optimize, disposal)
+
+    timed_frames = iter(timed_frames)
+    first = next(timed_frames, None)
+    if first is None:
+        raise ValueError("没有可写入的帧")
+
+    palette = quantizer.palette_bytes if quantizer else None
+    with GifWriter(output_path, frame_size(first[0]), loop=loop, palette=palette, optimize=optimize) as writer:
+        item = first
+        while item is not None:
+            frame, duration_ms = item
+            if quantizer:
+                start = time.perf_counter()
+                frame = quantizer.quantize(frame)
+                if stats:
+                    stats.record('quantize', start)
+            start = time.perf_counter()
+            writer.write_frame(frame, duration_ms, disposal=disposal)
+            if stats:
+                stats.record('encode', start)
+                stats.frames_encoded += 1
+            if progress:
+                progress(writer.frame_count)
+            item = next(timed_frames, None)
+    return writer.frame_count
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import deque
+
+from PIL import Image
+
+from normalize import normalize_frame
+from options import RESIZE_STRETCH
+from sizing import fit_size, source_box, valid_resize
+
+
+# 并行方式：线程池（Pillow 解码和缩放时会释放 GIL）/ 进程池
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+
+
+def default_worker_count():
+    """默认并行数：CPU 核心数"""
+    return os.cpu_count() or 1
+
+
+def probe_image_size(path):
+    """只读取图片头信息获取尺寸，不解码像素数据"""
+    with Image.open(path) as img:
+        return img.size
+
+
+def load_frame(path, resize=None, fast_downscale=True, resize_mode=RESIZE_STRETCH, plan=None):
+    """解码一张图片，并按需缩放（填充模式下只对裁剪区域重采样）
+
+    指定归一化方案 plan 时再转为方案的颜色模式和画布尺寸，在解码线程（进程）中并行完成。
+    """
+    img = Image.open(path)
+
+    # 调整尺寸（如果需要）
+    resize = valid_resize(resize)
+    if resize:
+        scaled, _ = fit_size(img.size, resize, resize_mode)
+        reducing_gap = None
+        if fast_downscale:
+            # JPEG 直接按 1/2、1/4、1/8 的 DCT 缩放解码，结果不小于目标尺寸
+            if img.format == 'JPEG':
+                img.draft(img.mode, scaled)
+            # 剩余部分先做整数倍缩小，最后用 LANCZOS 精细重采样
+            reducing_gap = 3.0
+        # draft 可能已经改变了尺寸，按解码后的尺寸计算裁剪区域
+        scaled, crop = fit_size(img.size, resize, resize_mode)
+        box = source_box(img.size, resize, resize_mode) if crop else None
+        resized = img.resize(crop[2:] if crop else scaled, Image.LANCZOS, box=box, reducing_gap=reducing_gap)
+        img.close()
+        return normalize_frame(resized, plan) if plan else resized
+
+    img.load()
+    return normalize_frame(img, plan) if plan else img
+
+
+def load_frame_timed(path, resize=None, fast_downscale=True, resize_mode=RESIZE_STRETCH, plan=None):
+    """解码一张图片，同时返回开始/结束时间、执行线程（进程）编号和文件大小"""
+    start = time.perf_counter()
+    frame = load_frame(path, resize, fast_downscale, resize_mode, plan)
+    return frame, start, time.perf_counter(), threading.get_ident(), os.path.getsize(path)
+
+
+def load_frames(paths, resize=None, workers=1, executor=EXECUTOR_THREAD, fast_downscale=True, stats=None,
+                resize_mode=RESIZE_STRETCH, plan=None):
+    """并行解码并缩放图片，按 paths 的原始顺序依次产出
+
+    指定 stats 时记录每张图片的解码耗时、帧数和读取的字节数。
+    """
+    def collect(result):
+        frame, start, end, worker, size = result
+        stats.record('load', start, end, tid=worker)
+        stats.frames_decoded += 1
+        stats.count('bytes_read', size)
+        return frame
+
+    if workers <= 1:
+        for path in paths:
+            if stats:
+                yield collect(load_frame_timed(path, resize, fast_downscale, resize_mode, plan))
+            else:
+                yield load_frame(path, resize, fast_downscale, resize_mode, plan)
+        return
+
+    # 进程池模块导入较慢，只在并行解码时加载
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    pool_class = ProcessPoolExecutor if executor == EXECUTOR_PROCESS else ThreadPoolExecutor
+    task = load_frame_timed if stats else load_frame
+    finish = collect if stats else (lambda result: result)
+    # 只提前提交有限数量的任务，避免结果堆积占满内存
+    max_pending = workers * 2
+    with pool_class(max_workers=workers) as pool:
+        pending = deque()
+        try:
+            for path in paths:
+                pending.append(pool.submit(task, path, resize, fast_downscale, resize_mode, plan))
+                if len(pending) >= max_pending:
+                    yield finish(pending.popleft().result())
+            while pending:
+                yield finish(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
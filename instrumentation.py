@@ -0,0 +1,225 @@
+"""转换流程的性能统计：分阶段计时、计数器、单帧延迟直方图和峰值内存
+
+统计结果可导出为 JSON，或 Chrome trace 事件文件（chrome://tracing、Perfetto 可打开）。
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+
+# 缓存命中类型：直接复用结果 / 复用解码帧
+CACHE_HIT_RESULT = 'result'
+CACHE_HIT_FRAMES = 'frames'
+
+# 各阶段累计到的汇总耗时字段
+STAGE_TOTALS = {
+    'decode': 'decode_time',  # ffmpeg 顺序解码
+    'seek': 'decode_time',  # moviepy 按时间点定位取帧
+    'load': 'decode_time',  # 图片解码和缩放
+    'palette': 'palette_time',
+    'quantize': 'quantize_time',
+    'encode': 'encode_time',
+    'write_gif': 'encode_time',  # 临时目录模式下 moviepy 整体编码
+}
+
+# 最多保留的追踪事件数，超出后只计数不记录，避免长任务占用过多内存
+MAX_TRACE_EVENTS = 200000
+
+# 延迟直方图的桶数：第 i 个桶为 [2^(i-1), 2^i) 微秒
+HISTOGRAM_BUCKETS = 32
+
+
+def peak_rss():
+    """当前进程的峰值常驻内存（字节），无法获取时返回 None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，其他系统以 KB 为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class LatencyHistogram:
+    """按 2 的幂分桶的延迟直方图（微秒）"""
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, seconds):
+        micros = int(seconds * 1e6)
+        self.counts[min(micros.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """由分桶估算百分位数（取桶的上界，秒）"""
+        if not self.count:
+            return 0.0
+        target = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min or 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            # 桶上界（微秒）-> 次数，只列出非空的桶
+            'buckets_us': {str(1 << i): n for i, n in enumerate(self.counts) if n},
+        }
+
+
+class PipelineStats:
+    """记录转换流程各阶段的帧数、耗时、字节数和峰值内存"""
+
+    def __init__(self):
+        self.frames_decoded = 0
+        self.frames_encoded = 0
+        self.decode_time = 0.0
+        self.palette_time = 0.0
+        self.quantize_time = 0.0
+        self.encode_time = 0.0
+        self.frames_dropped = 0
+        self.cache_hit = None
+        self.size_budget = None  # 按目标大小转换时选定的设置和实际大小
+        self.stages = {}  # 阶段名 -> LatencyHistogram
+        self.counters = {}  # bytes_read、bytes_written 等
+        self.peak_rss = None
+        self.started = time.perf_counter()
+        self.wall_time = 0.0
+        self._events = []
+        self._events_dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage, start, end=None, tid=None):
+        """记录一段阶段耗时（start/end 为 time.perf_counter() 的值），返回结束时间
+
+        tid 为追踪事件所属的线程（或工作进程）编号，默认为当前线程。
+        """
+        if end is None:
+            end = time.perf_counter()
+        elapsed = end - start
+        with self._lock:
+            total = STAGE_TOTALS.get(stage)
+            if total:
+                setattr(self, total, getattr(self, total) + elapsed)
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.add(elapsed)
+            if len(self._events) < MAX_TRACE_EVENTS:
+                self._events.append((stage, start, elapsed, tid or threading.get_ident()))
+            else:
+                self._events_dropped += 1
+        return end
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stop(self):
+        self.wall_time = time.perf_counter() - self.started
+        self.peak_rss = peak_rss()
+
+    @property
+    def elapsed(self):
+        return self.wall_time or (time.perf_counter() - self.started)
+
+    @property
+    def fps(self):
+        elapsed = self.elapsed
+        return self.frames_encoded / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def time_saved(self):
+        """按已编码帧的平均耗时，估算去重节省的量化和编码时间"""
+        if not self.frames_encoded:
+            return 0.0
+        return (self.quantize_time + self.encode_time) / self.frames_encoded * self.frames_dropped
+
+    def summary(self):
+        text = (f"{self.frames_encoded} 帧, {self.fps:.1f} 帧/秒, "
+                f"解码 {self.decode_time:.2f}s, 调色板 {self.palette_time:.2f}s, "
+                f"量化 {self.quantize_time:.2f}s, "
+                f"编码 {self.encode_time:.2f}s, "
+                f"总计 {self.wall_time:.2f}s")
+        if self.frames_dropped:
+            text += f", 合并重复帧 {self.frames_dropped} 个（约节省 {self.time_saved:.2f}s）"
+        if self.cache_hit == CACHE_HIT_RESULT:
+            text += ", 命中结果缓存"
+        elif self.cache_hit == CACHE_HIT_FRAMES:
+            text += ", 复用缓存的解码帧"
+        if self.size_budget:
+            budget = self.size_budget
+            width, height = budget['size']
+            text += (f", 目标 {budget['target_bytes'] / 2**20:.2f} MB / 实际 {budget['actual_bytes'] / 2**20:.2f} MB"
+                     f"（{budget['fps']:g} fps, {width}×{height}, {budget['colors']} 色"
+                     f"{', 抖动' if budget['dither'] else ''}, 编码 {budget['passes']} 次）")
+        return text
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'frames_decoded': self.frames_decoded,
+                'frames_encoded': self.frames_encoded,
+                'frames_dropped': self.frames_dropped,
+                'fps': self.fps,
+                'wall_time': self.elapsed,
+                'decode_time': self.decode_time,
+                'palette_time': self.palette_time,
+                'quantize_time': self.quantize_time,
+                'encode_time': self.encode_time,
+                'cache_hit': self.cache_hit,
+                'size_budget': self.size_budget,
+                'peak_rss': self.peak_rss if self.peak_rss is not None else peak_rss(),
+                'counters': dict(self.counters),
+                'stages': {name: histogram.to_dict() for name, histogram in self.stages.items()},
+                'trace_events_dropped': self._events_dropped,
+            }
+
+    def trace_events(self):
+        """Chrome trace 事件列表（时间单位为微秒，以开始转换为零点）"""
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                'name': stage, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': (start - self.started) * 1e6, 'dur': elapsed * 1e6,
+            } for stage, start, elapsed, tid in self._events]
+        events.append({'name': 'conversion', 'cat': 'job', 'ph': 'X', 'pid': pid,
+                       'tid': threading.main_thread().ident, 'ts': 0, 'dur': self.elapsed * 1e6,
+                       'args': {'frames_encoded': self.frames_encoded}})
+        return events
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def write_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms',
+                       'otherData': self.to_dict()}, f, ensure_ascii=False)
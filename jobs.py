@@ -0,0 +1,235 @@
+"""转换任务队列：并发上限、优先级、暂停/继续和协作式取消
+
+不依赖 Qt。转换器在帧循环中调用 JobControl.check()：
+已取消时抛出 JobCancelled，暂停时阻塞直到继续。
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+
+
+# 任务状态
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_PAUSED = 'paused'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+STATE_CANCELLED = 'cancelled'
+
+FINISHED_STATES = (STATE_DONE, STATE_FAILED, STATE_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """任务被取消"""
+
+
+class JobControl:
+    """取消与暂停标志，在转换线程和界面线程之间共享"""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # 唤醒暂停中的任务，让它尽快退出
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def check(self):
+        """在帧循环中调用：暂停时等待继续，已取消时抛出 JobCancelled"""
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise JobCancelled("任务已取消")
+
+
+def default_concurrency():
+    """默认同时运行的任务数：每个任务内部的解码和编码也会占用多个核心，取核心数的一半"""
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+
+class Job:
+    """一个转换任务
+
+    factory(progress=..., control=...) 返回带 run() 方法的转换器，
+    例如 functools.partial(VideoToGifConverter, video_path, output_path, fps, speed_factor)。
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name, factory, priority=0, output_path=None):
+        self.id = next(self._ids)
+        self.name = name
+        self.factory = factory
+        self.priority = priority
+        self.output_path = output_path
+        self.state = STATE_QUEUED
+        self.progress = 0
+        self.error = None
+        self.stats = None
+        self.converter = None  # 运行期间可读取 converter.stats 查看实时统计
+        self.started = None
+        self.control = JobControl()
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def live_stats(self):
+        """运行中转换器的统计（尚未开始或已结束时返回 None）"""
+        converter = self.converter
+        return getattr(converter, 'stats', None) if converter else None
+
+    def eta(self):
+        """按已用时间和进度估算剩余秒数，无法估算时返回 None"""
+        if self.started is None or self.finished or not 0 < self.progress < 100:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed * (100 - self.progress) / self.progress
+
+
+class JobScheduler:
+    """按优先级调度任务，同时运行的任务数不超过 max_workers
+
+    状态变化时调用 listener(job)，可能在转换线程中调用。
+    """
+
+    def __init__(self, max_workers=None, listener=None):
+        self.max_workers = max_workers or default_concurrency()
+        self.listener = listener
+        self.jobs = []
+        self._queue = []  # (-优先级, 提交顺序, 任务)
+        self._order = itertools.count()
+        self._running = set()
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+
+    def _notify(self, job):
+        if self.listener:
+            self.listener(job)
+
+    def submit(self, job):
+        with self._lock:
+            self.jobs.append(job)
+            heapq.heappush(self._queue, (-job.priority, next(self._order), job))
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def set_max_workers(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self._dispatch()
+
+    def set_priority(self, job, priority):
+        """修改排队中任务的优先级（运行中的任务只记录新值）"""
+        with self._lock:
+            job.priority = priority
+            entries = [entry for entry in self._queue if entry[2] is not job]
+            if len(entries) != len(self._queue):
+                entries.append((-priority, next(self._order), job))
+                heapq.heapify(entries)
+                self._queue = entries
+        self._notify(job)
+
+    def cancel(self, job):
+        with self._lock:
+            if job.finished:
+                return
+            job.control.cancel()
+            if job not in self._running:
+                # 还没开始的任务直接移出队列
+                self._queue = [entry for entry in self._queue if entry[2] is not job]
+                heapq.heapify(self._queue)
+                job.state = STATE_CANCELLED
+                self._idle.notify_all()
+        self._notify(job)
+        self._dispatch()
+
+    def pause(self, job):
+        """暂停运行中的任务，或让排队中的任务暂不启动"""
+        with self._lock:
+            if job.finished:
+                return
+            job.control.pause()
+            job.state = STATE_PAUSED
+        self._notify(job)
+
+    def resume(self, job):
+        with self._lock:
+            if job.state != STATE_PAUSED:
+                return
+            job.control.resume()
+            job.state = STATE_RUNNING if job in self._running else STATE_QUEUED
+        self._notify(job)
+        self._dispatch()
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if not job.finished]
+
+    def _dispatch(self):
+        """在并发上限内启动优先级最高且未暂停的任务"""
+        started = []
+        with self._lock:
+            held = []
+            while self._queue and len(self._running) < self.max_workers:
+                entry = heapq.heappop(self._queue)
+                job = entry[2]
+                if job.state == STATE_PAUSED:
+                    held.append(entry)
+                    continue
+                job.state = STATE_RUNNING
+                self._running.add(job)
+                started.append(job)
+            for entry in held:
+                heapq.heappush(self._queue, entry)
+
+        for job in started:
+            self._notify(job)
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        def report(value):
+            job.progress = value
+            self._notify(job)
+
+        try:
+            job.started = time.monotonic()
+            job.converter = job.factory(progress=report, control=job.control)
+            job.stats = job.converter.run()
+            job.state = STATE_DONE
+            job.progress = 100
+        except JobCancelled:
+            job.state = STATE_CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.state = STATE_FAILED
+        finally:
+            job.converter = None
+            with self._lock:
+                self._running.discard(job)
+                self._idle.notify_all()
+            self._notify(job)
+            self._dispatch()
+
+    def wait(self, timeout=None):
+        """等待队列中的任务全部结束（用于命令行和测试），超时返回 False"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._queue and not self._running, timeout)
@@ -0,0 +1,33 @@
+"""转换选项的取值常量
+
+只包含常量，不依赖 numpy、Pillow、moviepy，界面启动时可以直接导入。
+"""
+
+# 调色板模式：每帧单独量化 / 全局共享 / 按场景切换
+PALETTE_PER_FRAME = 'per-frame'
+PALETTE_GLOBAL = 'global'
+PALETTE_SCENE = 'scene'
+PALETTE_MODES = (PALETTE_GLOBAL, PALETTE_SCENE, PALETTE_PER_FRAME)
+
+# 缩放方式：拉伸到指定尺寸 / 保持比例缩放到指定尺寸之内 / 保持比例填满后居中裁剪
+RESIZE_STRETCH = 'stretch'
+RESIZE_FIT = 'fit'
+RESIZE_FILL = 'fill'
+RESIZE_MODES = (RESIZE_STRETCH, RESIZE_FIT, RESIZE_FILL)
+
+# 输出格式：GIF / 动画 WebP / APNG / H.264 MP4，以及各格式的默认扩展名
+FORMAT_GIF = 'gif'
+FORMAT_WEBP = 'webp'
+FORMAT_APNG = 'apng'
+FORMAT_MP4 = 'mp4'
+OUTPUT_FORMATS = (FORMAT_GIF, FORMAT_WEBP, FORMAT_APNG, FORMAT_MP4)
+FORMAT_EXTENSIONS = {FORMAT_GIF: '.gif', FORMAT_WEBP: '.webp', FORMAT_APNG: '.png', FORMAT_MP4: '.mp4'}
+
+# 编码速度：越快文件越大（对应 WebP 的 method、PNG 的压缩级别、x264 的 preset）
+SPEED_FAST = 'fast'
+SPEED_BALANCED = 'balanced'
+SPEED_SMALL = 'small'
+ENCODE_SPEEDS = (SPEED_FAST, SPEED_BALANCED, SPEED_SMALL)
+
+# 画质 0~100（WebP 的 quality，换算为 x264 的 CRF；APNG 和 GIF 不使用）
+DEFAULT_QUALITY = 80
@@ -0,0 +1,359 @@
+"""动画输出格式的编码后端：GIF（内置编码器）、动画 WebP（libwebp）、APNG（内置容器 + Pillow 压缩）、
+H.264 MP4（ffmpeg）
+
+除 GIF 外的后端都实现相同的接口：write_frame(帧, 时长毫秒) 逐帧写入，close() 完成文件，
+abort() 放弃写入；各后端都逐帧编码，内存占用与帧数无关（WebP 退回 Pillow 公开接口时除外）；write_timed_frames 按输出格式选择后端，GIF 仍走原来的共享调色板编码器。
+"""
+import functools
+import io
+import struct
+import time
+import zlib
+from fractions import Fraction
+
+import numpy as np
+from PIL import Image
+
+from frame_pipeline import FfmpegPipeWriter
+from gif_writer import frame_size, write_timed_gif_frames
+from options import (DEFAULT_QUALITY, FORMAT_APNG, FORMAT_EXTENSIONS, FORMAT_GIF, FORMAT_MP4, FORMAT_WEBP,
+                     SPEED_BALANCED, SPEED_FAST, SPEED_SMALL)
+from palette import to_rgb_array
+
+
+# 编码速度对应的各格式参数
+WEBP_METHODS = {SPEED_FAST: 0, SPEED_BALANCED: 4, SPEED_SMALL: 6}
+PNG_COMPRESS_LEVELS = {SPEED_FAST: 1, SPEED_BALANCED: 6, SPEED_SMALL: 9}
+X264_PRESETS = {SPEED_FAST: 'veryfast', SPEED_BALANCED: 'medium', SPEED_SMALL: 'slow'}
+
+# 画质 0~100 线性换算为 x264 的 CRF（数值越小画质越高）
+CRF_RANGE = (38, 14)
+
+
+def format_for_path(path, default=FORMAT_GIF):
+    """按输出文件的扩展名判断格式（.apng 也视为 APNG）"""
+    ext = path.lower().rsplit('.', 1)[-1] if '.' in path else ''
+    if ext == 'apng':
+        return FORMAT_APNG
+    for fmt, extension in FORMAT_EXTENSIONS.items():
+        if extension == '.' + ext:
+            return fmt
+    return default
+
+
+def x264_crf(quality):
+    low, high = CRF_RANGE
+    return round(low + (high - low) * min(max(quality, 0), 100) / 100)
+
+
+def pillow_frame(frame):
+    """转为 Pillow 图像：带透明通道的帧保留为 RGBA，其余转为 RGB"""
+    if isinstance(frame, np.ndarray):
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            return Image.fromarray(np.ascontiguousarray(frame, dtype=np.uint8), 'RGBA')
+        return Image.fromarray(to_rgb_array(frame))
+    if frame.mode in ('RGBA', 'LA', 'PA') or 'transparency' in frame.info:
+        return frame.convert('RGBA')
+    return frame if frame.mode == 'RGB' else frame.convert('RGB')
+
+
+class AnimationWriterBase:
+    """WebP、APNG 编码器的公共部分：帧到达即编码，内存只保留参考帧和已压缩的数据
+
+    输出的颜色模式由第一帧决定（RGB 或 RGBA），之后的帧转换为相同模式。
+    """
+
+    def __init__(self, output_path, size):
+        self.output_path = output_path
+        self.size = tuple(size)
+        self.mode = None
+        self.frame_count = 0
+
+    def convert(self, frame):
+        image = pillow_frame(frame)
+        if image.size != self.size:
+            raise ValueError(f"帧尺寸 {image.size} 与输出尺寸 {self.size} 不一致")
+        if self.mode is None:
+            self.mode = image.mode
+        return image if image.mode == self.mode else image.convert(self.mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def incremental_webp_supported():
+    """Pillow 内部的 _webp.WebPAnimEncoder 是否可用，且接口与 Pillow 11 起的一致
+
+    这是私有接口，用一个 1x1 的动画试编码一次来确认；不可用时 WebP 改走公开的 save(save_all=True)。
+    """
+    try:
+        from PIL import _webp
+        encoder = _webp.WebPAnimEncoder((1, 1), 0, 0, False, 3, 5, False, False)
+        encoder.add(Image.new('RGB', (1, 1)).getim(), 0, False, DEFAULT_QUALITY, 100, 0)
+        encoder.add(None, 100, False, DEFAULT_QUALITY, 100, 0)
+        return isinstance(encoder.assemble(b"", b"", b""), bytes)
+    except Exception:
+        return False
+
+
+class WebpAnimationWriter(AnimationWriterBase):
+    """动画 WebP（有损）：逐帧送入 libwebp 的动画编码器，编码器自行做帧间差分
+
+    Pillow 的 save(save_all=True) 需要一次拿到全部帧，这里优先使用它内部的 _webp.WebPAnimEncoder；
+    当前 Pillow 的内部接口不一致时退回公开接口，在 close() 时一次保存（内存占用随帧数增长）。
+    """
+
+    def __init__(self, output_path, size, loop=0, quality=None, speed=None):
+        super().__init__(output_path, size)
+        from PIL import features
+        if not features.check('webp'):
+            raise ValueError("当前的 Pillow 不支持 WebP 编码")
+        self.loop = loop
+        self.quality = DEFAULT_QUALITY if quality is None else quality
+        self.method = WEBP_METHODS[speed or SPEED_BALANCED]
+        self.minimize_size = speed == SPEED_SMALL
+        self._closed = False
+        self._encoder = None
+        self._frames = []  # 退回公开接口时暂存的 (图像, 时长毫秒)
+        if incremental_webp_supported():
+            from PIL import _webp
+            # 背景色（透明）、循环次数、minimize_size、关键帧间隔 kmin/kmax（与 Pillow 的有损默认值相同）、
+            # allow_mixed、verbose
+            self._encoder = _webp.WebPAnimEncoder(self.size, 0, loop, self.minimize_size, 3, 5, False, False)
+        self._timestamp = 0.0
+
+    def _add(self, image):
+        self._encoder.add(None if image is None else image.getim(), round(self._timestamp), False,
+                          self.quality, 100, self.method)
+
+    def write_frame(self, frame, duration_ms):
+        image = self.convert(frame)
+        if self._encoder is None:
+            self._frames.append((image, duration_ms))
+        else:
+            self._add(image)
+        self._timestamp += duration_ms
+        self.frame_count += 1
+
+    def close(self):
+        if self._closed:
+            return
+        if not self.frame_count:
+            raise ValueError("没有可写入的帧")
+        self._closed = True
+        if self._encoder is None:
+            images = [image for image, _ in self._frames]
+            durations = [duration_ms for _, duration_ms in self._frames]
+            self._frames = []
+            images[0].save(self.output_path, 'WEBP', save_all=True, append_images=images[1:],
+                           duration=durations, loop=self.loop, lossless=False, quality=self.quality,
+                           method=self.method, minimize_size=self.minimize_size)
+            return
+        # 空帧表示结束，时间戳即最后一帧的结束时间
+        self._add(None)
+        data = self._encoder.assemble(b"", b"", b"")
+        self._encoder = None
+        if data is None:
+            raise ValueError("WebP 编码失败")
+        with open(self.output_path, 'wb') as f:
+            f.write(data)
+
+    def abort(self):
+        self._closed = True
+        self._encoder = None
+        self._frames = []
+
+
+def _png_chunk(chunk_type, data):
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def _png_image_data(image, compress_level):
+    """用 Pillow 的 PNG 编码器压缩图像，返回合并后的 IDAT 数据（已滤波并 zlib 压缩）"""
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', compress_level=compress_level)
+    data = buffer.getvalue()
+    pos = 8  # 跳过 PNG 签名
+    parts = []
+    while pos < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        if chunk_type == b"IDAT":
+            parts.append(data[pos + 8:pos + 8 + length])
+        pos += 12 + length
+    return b"".join(parts)
+
+
+class ApngWriter(AnimationWriterBase):
+    """APNG（无损）增量编码器：帧到达即写出，不像 Pillow 那样在保存前保留全部帧
+
+    每帧只写出与上一帧不同的矩形区域（dispose_op 为 NONE，blend_op 为 SOURCE），
+    与上一帧完全相同的帧合并到上一帧的时长中。为此最后一帧在下一帧到达前暂存（已压缩）；
+    帧数在 close() 时回写到 acTL 中。
+    """
+
+    def __init__(self, output_path, size, loop=0, speed=None):
+        super().__init__(output_path, size)
+        self.loop = loop
+        self.compress_level = PNG_COMPRESS_LEVELS[speed or SPEED_BALANCED]
+        self._fp = open(output_path, 'w+b')
+        self._actl_pos = None
+        self._sequence = 0
+        self._written = 0  # 已写入文件的帧数（合并后）
+        self._previous = None  # 上一帧的像素，用于计算变化区域
+        self._pending = None  # 暂存的 [区域, 压缩数据, 时长毫秒]
+
+    def write_frame(self, frame, duration_ms):
+        image = self.convert(frame)
+        pixels = np.asarray(image)
+        if self._previous is None:
+            self._write_header()
+            box = (0, 0) + self.size
+        else:
+            changed = (pixels != self._previous).any(axis=2)
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows) == 0:
+                self._pending[2] += duration_ms
+                self.frame_count += 1
+                return
+            cols = np.flatnonzero(changed.any(axis=0))
+            box = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+        self._previous = pixels
+        region = image if box == (0, 0) + self.size else image.crop(box)
+        data = _png_image_data(region, self.compress_level)
+        self._flush()
+        self._pending = [box, data, duration_ms]
+        self.frame_count += 1
+
+    def _write_header(self):
+        color_type = 6 if self.mode == 'RGBA' else 2
+        self._fp.write(b"\x89PNG\r\n\x1a\n")
+        self._fp.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", *self.size, 8, color_type, 0, 0, 0)))
+        self._actl_pos = self._fp.tell()
+        self._fp.write(_png_chunk(b"acTL", struct.pack(">II", 0, self.loop or 0)))
+
+    def _flush(self):
+        """写出暂存的帧：fcTL，第一帧用 IDAT，其余帧用 fdAT"""
+        if self._pending is None:
+            return
+        (left, top, right, bottom), data, duration_ms = self._pending
+        self._pending = None
+        delay = Fraction(max(duration_ms, 0) / 1000).limit_denominator(0xFFFF)
+        numerator, denominator = min(delay.numerator, 0xFFFF), delay.denominator
+        self._fp.write(_png_chunk(b"fcTL", struct.pack(">IIIIIHHBB", self._sequence, right - left, bottom - top,
+                                                       left, top, numerator, denominator, 0, 0)))
+        self._sequence += 1
+        if self._written == 0:
+            self._fp.write(_png_chunk(b"IDAT", data))
+        else:
+            self._fp.write(_png_chunk(b"fdAT", struct.pack(">I", self._sequence) + data))
+            self._sequence += 1
+        self._written += 1
+
+    def close(self):
+        if self._fp.closed:
+            return
+        if not self.frame_count:
+            self.abort()
+            raise ValueError("没有可写入的帧")
+        self._flush()
+        self._fp.write(_png_chunk(b"IEND", b""))
+        # 回写合并后的帧数
+        self._fp.seek(self._actl_pos)
+        self._fp.write(_png_chunk(b"acTL", struct.pack(">II", self._written, self.loop or 0)))
+        self._fp.close()
+
+    def abort(self):
+        self._pending = None
+        self._fp.close()
+
+
+class FfmpegVideoWriter(FfmpegPipeWriter):
+    """通过 ffmpeg 编码为 H.264 MP4
+
+    视频帧率固定为 1000 / frame_duration_ms（标称帧间隔，不是第一帧合并后的时长）；
+    时长不同的帧（例如合并了重复帧）按时长重复写入，
+    重复的帧在 H.264 中几乎不占空间。奇数宽高补齐为偶数（yuv420p 的要求）。
+    """
+
+    def __init__(self, output_path, size, frame_duration_ms, quality=None, speed=None, ffmpeg_binary=None):
+        fps = 1000.0 / frame_duration_ms
+        output_args = ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                       '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+                       '-preset', X264_PRESETS[speed or SPEED_BALANCED],
+                       '-crf', str(x264_crf(DEFAULT_QUALITY if quality is None else quality)),
+                       '-movflags', '+faststart']
+        super().__init__(output_path, size, fps, output_args, ffmpeg_binary)
+        self.frame_duration_ms = frame_duration_ms
+        self.frames_written = 0  # 写入 ffmpeg 的帧数（含重复）
+        self._elapsed_ms = 0.0
+
+    def write_frame(self, frame, duration_ms):
+        # 按累计时长计算应写出的帧数，不累积舍入误差；每个输入帧至少写出一次
+        self._elapsed_ms += duration_ms
+        target = max(round(self._elapsed_ms / self.frame_duration_ms), self.frames_written + 1)
+        rgb = to_rgb_array(frame)
+        count = self.frame_count
+        for _ in range(target - self.frames_written):
+            super().write_frame(rgb)
+        self.frames_written = target
+        self.frame_count = count + 1
+
+
+def open_writer(output_format, output_path, size, frame_duration_ms, loop=0, quality=None, speed=None):
+    """除 GIF 外的输出格式的编码器"""
+    if output_format == FORMAT_WEBP:
+        return WebpAnimationWriter(output_path, size, loop, quality, speed)
+    if output_format == FORMAT_APNG:
+        return ApngWriter(output_path, size, loop, speed)
+    if output_format == FORMAT_MP4:
+        return FfmpegVideoWriter(output_path, size, frame_duration_ms, quality, speed)
+    raise ValueError(f"未知的输出格式：{output_format}")
+
+
+def write_timed_frames(timed_frames, output_path, output_format=FORMAT_GIF, loop=0, progress=None, stats=None,
+                       quantizer=None, optimize=True, quality=None, speed=None, workers=1, frame_ms=None):
+    """把 (帧, 时长毫秒) 迭代器写为指定格式的动画，返回写入的帧数
+
+    GIF 使用内置编码器（quantizer、optimize、workers 只对 GIF 有效）；quality、speed 只对其他格式有效。
+    frame_ms 为合并重复帧之前的标称帧间隔，决定 MP4 的帧率；None 时取第一帧的时长（只适用于没有合并的序列）。
+    """
+    if output_format == FORMAT_GIF:
+        return write_timed_gif_frames(timed_frames, output_path, loop, progress, stats, quantizer, optimize,
+                                      workers=workers)
+
+    timed_frames = iter(timed_frames)
+    first = next(timed_frames, None)
+    if first is None:
+        raise ValueError("没有可写入的帧")
+
+    writer = open_writer(output_format, output_path, frame_size(first[0]), frame_ms or first[1], loop,
+                         quality, speed)
+    try:
+        item = first
+        while item is not None:
+            frame, duration_ms = item
+            start = time.perf_counter()
+            writer.write_frame(frame, duration_ms)
+            if stats:
+                stats.record('encode', start)
+                stats.frames_encoded += 1
+            if progress:
+                progress(writer.frame_count)
+            item = next(timed_frames, None)
+    except BaseException:
+        writer.abort()
+        raise
+    # WebP 在结束时组装文件，APNG 写出最后一帧
+    start = time.perf_counter()
+    writer.close()
+    if stats:
+        stats.record('encode', start)
+    return writer.frame_count
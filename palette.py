@@ -0,0 +1,241 @@
+import numpy as np
+from PIL import Image
+
+from options import PALETTE_GLOBAL, PALETTE_PER_FRAME, PALETTE_SCENE
+
+# 颜色直方图与查找表的精度：每个通道 5 位，共 32×32×32 个格子
+LUT_BITS = 5
+LUT_SHIFT = 8 - LUT_BITS
+LUT_SIZE = 1 << (3 * LUT_BITS)
+
+# 取样时每个方向的像素步长
+SAMPLE_STRIDE = 4
+
+# 生成全局调色板时最多取样的帧数
+PALETTE_SAMPLE_FRAMES = 16
+
+# 8×8 Bayer 有序抖动矩阵，归一化到 [-0.5, 0.5)
+_BAYER_8 = np.array([
+    [0, 32, 8, 40, 2, 34, 10, 42],
+    [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38],
+    [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41],
+    [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37],
+    [63, 31, 55, 23, 61, 29, 53, 21],
+], dtype=np.float32) / 64.0 - 0.5
+
+
+def to_rgb_array(frame):
+    """把 PIL 图像或数组统一为 HxWx3 的 uint8 数组"""
+    if isinstance(frame, np.ndarray):
+        if frame.ndim == 2:
+            return np.repeat(frame[:, :, None], 3, axis=2).astype(np.uint8, copy=False)
+        return np.ascontiguousarray(frame[:, :, :3], dtype=np.uint8)
+    if frame.mode != 'RGB':
+        frame = frame.convert('RGB')
+    return np.asarray(frame)
+
+
+def _bin_keys(rgb):
+    """RGB 像素映射到 32×32×32 直方图格子的编号"""
+    q = (rgb >> LUT_SHIFT).astype(np.uint16)
+    return (q[..., 0] << (2 * LUT_BITS)) | (q[..., 1] << LUT_BITS) | q[..., 2]
+
+
+def _bin_centers():
+    keys = np.arange(LUT_SIZE)
+    mask = (1 << LUT_BITS) - 1
+    channels = np.stack([keys >> (2 * LUT_BITS), (keys >> LUT_BITS) & mask, keys & mask], axis=1)
+    return (channels << LUT_SHIFT) + (1 << (LUT_SHIFT - 1))
+
+
+def color_histogram(frames, stride=SAMPLE_STRIDE):
+    """对一组帧做子采样，统计 32×32×32 颜色直方图
+
+    返回 (各格子的像素数, 各格子内像素的 R/G/B 之和)，调色板颜色取格子内真实像素的平均值，
+    而不是格子中心（否则纯黑、纯白等颜色会偏移半个格子）。
+    """
+    hist = np.zeros(LUT_SIZE, dtype=np.int64)
+    sums = np.zeros((LUT_SIZE, 3), dtype=np.float64)
+    for frame in frames:
+        rgb = to_rgb_array(frame)[::stride, ::stride]
+        keys = _bin_keys(rgb).ravel()
+        hist += np.bincount(keys, minlength=LUT_SIZE)
+        pixels = rgb.reshape(-1, 3)
+        for c in range(3):
+            sums[:, c] += np.bincount(keys, weights=pixels[:, c], minlength=LUT_SIZE)
+    return hist, sums
+
+
+def median_cut(hist, colors=256, refine=2, sums=None):
+    """对颜色直方图做加权中位切分，再用少量 k-means 迭代微调，返回 Kx3 调色板
+
+    sums 为各格子内像素的 R/G/B 之和，不提供时以格子中心代表格子内的颜色。
+    """
+    keys = np.flatnonzero(hist)
+    if len(keys) == 0:
+        return np.zeros((1, 3), dtype=np.uint8)
+    weights = hist[keys].astype(np.float64)
+    if sums is None:
+        points = _bin_centers()[keys].astype(np.float32)
+    else:
+        points = (sums[keys] / weights[:, None]).astype(np.float32)
+
+    def score(idx):
+        if len(idx) < 2:
+            return -1.0
+        spread = points[idx].max(axis=0) - points[idx].min(axis=0)
+        return float(spread.max()) * weights[idx].sum()
+
+    boxes = [np.arange(len(keys))]
+    scores = [score(boxes[0])]
+    while len(boxes) < colors:
+        i = int(np.argmax(scores))
+        if scores[i] <= 0:
+            break
+        idx = boxes[i]
+        box = points[idx]
+        channel = int(np.argmax(box.max(axis=0) - box.min(axis=0)))
+        order = idx[np.argsort(box[:, channel], kind='stable')]
+        cumulative = np.cumsum(weights[order])
+        cut = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        cut = min(max(cut, 1), len(order) - 1)
+        boxes[i], scores[i] = order[:cut], score(order[:cut])
+        boxes.append(order[cut:])
+        scores.append(score(order[cut:]))
+
+    palette = np.array([np.average(points[idx], axis=0, weights=weights[idx]) for idx in boxes])
+
+    # 加权 k-means 微调
+    for _ in range(refine):
+        assignment = _nearest(points, palette)
+        totals = np.bincount(assignment, weights=weights, minlength=len(palette))
+        used = totals > 0
+        for c in range(3):
+            sums = np.bincount(assignment, weights=weights * points[:, c], minlength=len(palette))
+            palette[used, c] = sums[used] / totals[used]
+
+    return np.clip(np.rint(palette), 0, 255).astype(np.uint8)
+
+
+def _nearest(points, palette, chunk=4096):
+    """向量化计算每个点最近的调色板颜色"""
+    palette = palette.astype(np.float32)
+    palette_norm = (palette ** 2).sum(axis=1)
+    result = np.empty(len(points), dtype=np.intp)
+    for start in range(0, len(points), chunk):
+        block = points[start:start + chunk].astype(np.float32)
+        # |a-b|^2 = |a|^2 - 2ab + |b|^2，|a|^2 对比较结果无影响
+        distance = palette_norm[None, :] - 2.0 * block @ palette.T
+        result[start:start + chunk] = np.argmin(distance, axis=1)
+    return result
+
+
+class PaletteQuantizer:
+    """固定调色板量化器：用 32×32×32 查找表把 RGB 映射为调色板索引"""
+
+    def __init__(self, palette, dither=False, dither_spread=None):
+        self.palette = np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        self.palette_bytes = self.palette.tobytes()
+        self.lut = _nearest(_bin_centers(), self.palette).astype(np.uint8)
+        self.dither = dither
+        # 抖动幅度约为调色板中相邻颜色的平均间距
+        self.dither_spread = dither_spread or 255.0 / np.cbrt(len(self.palette))
+        self._threshold_cache = {}
+
+    @classmethod
+    def from_frames(cls, frames, colors=256, dither=False):
+        hist, sums = color_histogram(frames)
+        return cls(median_cut(hist, colors, sums=sums), dither=dither)
+
+    def _threshold(self, shape):
+        """按帧尺寸平铺的抖动阈值矩阵（缓存复用）"""
+        threshold = self._threshold_cache.get(shape)
+        if threshold is None:
+            reps = (shape[0] // 8 + 1, shape[1] // 8 + 1)
+            threshold = (np.tile(_BAYER_8, reps)[:shape[0], :shape[1], None] * self.dither_spread)
+            self._threshold_cache = {shape: threshold}
+        return threshold
+
+    def indices(self, frame):
+        rgb = to_rgb_array(frame)
+        if self.dither:
+            rgb = np.clip(rgb + self._threshold(rgb.shape[:2]), 0, 255).astype(np.uint8)
+        return self.lut[_bin_keys(rgb)]
+
+    def quantize(self, frame):
+        """返回使用本调色板的 P 模式图像"""
+        indexed = Image.fromarray(self.indices(frame), 'P')
+        indexed.putpalette(self.palette_bytes)
+        return indexed
+
+    def error(self, frame, stride=SAMPLE_STRIDE):
+        """子采样估计量化后的均方误差"""
+        rgb = to_rgb_array(frame)[::stride, ::stride]
+        mapped = self.palette[self.lut[_bin_keys(rgb)]]
+        return float(np.mean((rgb.astype(np.float32) - mapped) ** 2))
+
+
+class ScenePaletteQuantizer:
+    """以全局调色板为主，误差过大时为当前场景单独生成调色板"""
+
+    def __init__(self, base, threshold, colors=256):
+        self.base = base
+        self.current = base
+        self.palette = base.palette
+        self.palette_bytes = base.palette_bytes
+        self.threshold = threshold
+        self.colors = colors
+        self.scene_count = 0
+
+    def quantize(self, frame):
+        rgb = to_rgb_array(frame)
+        if self.current.error(rgb) > self.threshold:
+            if self.current is not self.base and self.base.error(rgb) <= self.threshold:
+                self.current = self.base
+            else:
+                # 新场景：用当前帧生成局部调色板，后续帧沿用直到误差再次超限
+                self.current = PaletteQuantizer.from_frames([rgb], self.colors, self.base.dither)
+                self.scene_count += 1
+        return self.current.quantize(rgb)
+
+
+def sample_evenly(items, count):
+    """从序列中均匀取 count 个元素"""
+    if len(items) <= count:
+        return list(items)
+    positions = np.linspace(0, len(items) - 1, count).round().astype(int)
+    return [items[i] for i in positions]
+
+
+def thin_samples(frames, count=PALETTE_SAMPLE_FRAMES, stride=SAMPLE_STRIDE):
+    """从长度未知的帧流中保留约 count 帧均匀分布的缩略图（按 stride 子采样）"""
+    kept = []
+    step = 1
+    for i, frame in enumerate(frames):
+        if i % step:
+            continue
+        kept.append(to_rgb_array(frame)[::stride, ::stride].copy())
+        # 超过两倍数量时隔一丢一，取样间隔加倍
+        if len(kept) >= 2 * count:
+            kept = kept[::2]
+            step *= 2
+    return kept
+
+
+def build_quantizer(sample_frames, mode=PALETTE_GLOBAL, colors=256, dither=False, scene_ratio=2.0):
+    """根据取样帧构建量化器；逐帧模式或没有取样帧时返回 None"""
+    if mode == PALETTE_PER_FRAME:
+        return None
+    thumbnails = thin_samples(sample_frames)
+    if not thumbnails:
+        return None
+    hist, sums = color_histogram(thumbnails, stride=1)
+    quantizer = PaletteQuantizer(median_cut(hist, colors, sums=sums), dither=dither)
+    if mode == PALETTE_SCENE:
+        # 误差阈值：取样帧平均误差的若干倍，并设置下限避免静态画面频繁切换
+        baseline = np.mean([quantizer.error(thumbnail, stride=1) for thumbnail in thumbnails])
+        return ScenePaletteQuantizer(quantizer, max(baseline * scene_ratio, 30.0), colors)
+    return quantizer
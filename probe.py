@@ -0,0 +1,181 @@
+"""媒体文件的元数据探测与磁盘缓存
+
+只读取文件头信息（不解码像素），结果按 路径+修改时间+大小 缓存到磁盘，
+重复选择同一文件或重复执行批量任务时无需再次探测。
+本模块不依赖 numpy、moviepy，界面启动时可以直接导入。
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+
+from options import RESIZE_STRETCH
+from sizing import clip_region, output_size
+
+
+# 缓存格式版本，探测结果的字段变化时递增
+PROBE_CACHE_VERSION = 3
+
+# 缓存最多保留的条目数，超出后丢弃最早写入的条目
+PROBE_CACHE_ENTRIES = 4096
+
+KIND_VIDEO = 'video'
+KIND_IMAGE = 'image'
+
+
+def default_cache_dir():
+    """缓存目录：环境变量 GIF_CONVERTER_CACHE_DIR，否则为 ~/.cache/gif_converter"""
+    path = os.environ.get('GIF_CONVERTER_CACHE_DIR')
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'gif_converter')
+    return path
+
+
+def file_key(path):
+    """以绝对路径、修改时间和文件大小作为缓存键"""
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+class ProbeCache:
+    """探测结果的磁盘缓存（JSON 文件），可在多个线程和进程间共享"""
+
+    def __init__(self, path=None, max_entries=PROBE_CACHE_ENTRIES):
+        self.path = path or os.path.join(default_cache_dir(), 'probe.json')
+        self.max_entries = max_entries
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != PROBE_CACHE_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def get(self, key):
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._read()
+            return self._entries.get(key)
+
+    def put(self, key, info):
+        with self._lock:
+            # 先合并其他进程写入的条目，再整体原子替换
+            entries = self._read()
+            entries.update(self._entries or {})
+            entries.pop(key, None)
+            entries[key] = info
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+            self._entries = entries
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'version': PROBE_CACHE_VERSION, 'entries': entries}, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # 缓存写入失败不影响探测结果
+                pass
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ProbeCache()
+    return _default_cache
+
+
+def _probe_video(path):
+    from frame_pipeline import probe_video
+    return probe_video(path)
+
+
+def _probe_image(path):
+    from PIL import Image
+    with Image.open(path) as img:
+        return {
+            'size': img.size,
+            'mode': img.mode,
+            'format': img.format,
+            'frame_count': getattr(img, 'n_frames', 1),
+            'transparency': 'transparency' in img.info,  # 调色板 / 灰度图片的透明色（tRNS）
+        }
+
+
+_PROBES = {
+    KIND_VIDEO: _probe_video,
+    KIND_IMAGE: _probe_image,
+}
+
+
+def probe(path, kind, cache=None):
+    """探测文件元数据，优先使用缓存；cache 为 False 时不读写缓存"""
+    if cache is False:
+        return _PROBES[kind](path)
+    cache = cache or get_default_cache()
+    key = f"{kind}|{file_key(path)}"
+    info = cache.get(key)
+    if info is None:
+        info = _PROBES[kind](path)
+        cache.put(key, info)
+    # JSON 中的元组会变成列表
+    info = dict(info)
+    info['size'] = tuple(info['size'])
+    return info
+
+
+def video_info(path, cache=None):
+    """视频的尺寸、时长、帧率、帧数和旋转角度"""
+    return probe(path, KIND_VIDEO, cache)
+
+
+def image_info(path, cache=None):
+    """图片的尺寸、颜色模式、格式、帧数和是否有透明色"""
+    return probe(path, KIND_IMAGE, cache)
+
+
+def clip_time_range(start, end, duration):
+    """把截取范围限制在视频时长之内，返回 (开始, 结束) 秒"""
+    start = min(max(0.0, start or 0.0), duration)
+    end = duration if end is None else min(max(0.0, end), duration)
+    if end <= start:
+        raise ValueError(f"结束时间（{end:g} 秒）必须晚于开始时间（{start:g} 秒）")
+    return start, end
+
+
+def estimate_video_output(info, fps, speed_factor=1.0, resize=None, resize_mode=RESIZE_STRETCH,
+                          start=None, end=None, crop=None):
+    """转换前估算输出 GIF 的帧数、尺寸和播放时长"""
+    start, end = clip_time_range(start, end, info['duration'])
+    region = clip_region(crop, info['size'])
+    # 与 frame_pipeline.count_sampled_frames 的取样方式一致
+    frames = max(0, math.ceil((end - start) / (1.0 / fps)))
+    return {
+        'frames': frames,
+        'size': output_size(region[2:] if region else info['size'], resize, resize_mode),
+        'duration': frames / (fps * speed_factor),
+    }
+
+
+def estimate_images_output(paths, first_info, duration_ms, resize=None, resize_mode=RESIZE_STRETCH):
+    """转换前估算图片序列输出 GIF 的帧数、尺寸和播放时长"""
+    return {
+        'frames': len(paths),
+        'size': output_size(first_info['size'], resize, resize_mode),
+        'duration': len(paths) * duration_ms / 1000.0,
+    }
+
+
+def describe_estimate(estimate):
+    width, height = estimate['size']
+    return f"预计输出 {estimate['frames']} 帧，{width}×{height}，时长 {estimate['duration']:.1f} 秒"
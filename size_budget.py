@@ -0,0 +1,380 @@
+"""按目标文件大小选择帧率、尺寸、调色板颜色数和抖动
+
+1. 在截取范围内均匀取几段连续帧，按最高帧率和基准尺寸解码一次；
+2. 把取样帧缩小一半，按每种颜色数和抖动设置编码到内存，得到首帧和差分帧字节数的表；
+   再编码几组原尺寸的取样帧，拟合字节数随像素数变化的指数 a（按颜色位数线性插值）：
+   每帧字节 = 表[颜色数, 抖动] × (像素数 / 缩小后的像素数) ** a；
+   不同帧率对帧间差分的影响直接按取样帧的间隔测量；
+3. 在帧率、缩放比例、颜色数和抖动的网格中，选出预计不超过目标大小、画质评分最高的设置；
+4. 完整编码一次；实际大小超出目标或明显偏小时，按实际结果校准模型，最多再编码一次。
+"""
+import io
+import math
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from cache import remove_file
+from frame_pipeline import SAMPLER_SEQUENTIAL, checked_frames, count_sampled_frames, read_video_frames
+from gif_core import VideoToGifConverter
+from gif_writer import GifWriter, frame_size
+from palette import PaletteQuantizer, build_quantizer
+from options import PALETTE_GLOBAL, PALETTE_PER_FRAME
+
+
+# 取样：均匀分布的最多段数，每段在每个候选帧率下参与编码的帧数，
+# 以及各段合计最多占截取时长的比例（较短的视频少取几段）
+SAMPLE_WINDOWS = 4
+WINDOW_FRAMES = 6
+SAMPLE_FRACTION = 0.3
+
+# 候选帧率为设置帧率除以这些系数；最低帧率决定每段需要解码的时长
+FPS_DIVISORS = (1, 1.5, 2, 3, 4)
+SCALE_STEPS = tuple(round(1.0 - 0.05 * i, 2) for i in range(19))  # 1.0 ~ 0.1
+COLOR_STEPS = (256, 128, 64, 32, 16)
+MIN_SIDE = 16  # 缩放后的最短边
+
+# 测量颜色数、抖动和帧率影响时取样帧的缩放比例；
+# 用这几种设置的原尺寸取样帧拟合像素数指数：(颜色数, 抖动)
+REFERENCE_SCALE = 0.5
+EXPONENT_ANCHORS = ((256, False), (16, False), (256, True))
+EXPONENT_RANGE = (0.3, 1.2)
+
+# 画质评分：缩放比例、帧率每减半、颜色位数每少一位扣的分；颜色较少时抖动加分
+SCALE_WEIGHT = 2.0
+FPS_WEIGHT = 1.0
+COLOR_WEIGHT = 0.25
+DITHER_BONUS = 0.2
+DITHER_MAX_COLORS = 64
+
+# 预测值留出的余量；实际大小低于目标的这个比例时尝试提高画质
+SAFETY_MARGIN = 0.95
+UNDERSHOOT = 0.75
+
+SAMPLE_PROGRESS = 10  # 取样和拟合占总进度的百分比
+
+
+def gif_overhead(colors):
+    """文件头、全局颜色表、循环扩展和结束符的字节数"""
+    bits = max(1, int(colors - 1).bit_length())
+    return 13 + 3 * (1 << bits) + 19 + 1
+
+
+def scaled_size(size, scale):
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def sample_steps(base_fps):
+    """各候选帧率在设置帧率下的取帧间隔"""
+    return {fps: base_fps / fps for fps in fps_candidates(base_fps)}
+
+
+def step_indices(step, count=WINDOW_FRAMES):
+    """按 step 的间隔从一段连续帧中取 count 帧的下标"""
+    return [int(round(j * step)) for j in range(count)]
+
+
+class SizeModel:
+    """由取样帧拟合的输出大小模型"""
+
+    def __init__(self, frame_table, exponents, reference_size, base_size, fps_ratios, duration,
+                 calibration=1.0):
+        self.frame_table = frame_table  # (颜色数, 抖动) -> 缩小取样帧的 (首帧, 差分帧) 字节数
+        self.exponents = exponents  # 256 色、16 色的像素数指数，以及抖动时指数的增量
+        self.reference_size = reference_size  # 缩小取样帧的尺寸
+        self.base_size = base_size  # 不缩放时的输出尺寸
+        self.fps_ratios = fps_ratios  # 帧率 -> 与设置帧率相比差分帧字节数的倍数
+        self.duration = duration
+        self.calibration = calibration
+
+    def exponent(self, colors, dither):
+        many, few, dither_delta = self.exponents
+        exponent = many + (few - many) * (8 - math.log2(colors)) / 4
+        return exponent + dither_delta if dither else exponent
+
+    def predict(self, fps, scale, colors, dither):
+        width, height = scaled_size(self.base_size, scale)
+        pixels = width * height / (self.reference_size[0] * self.reference_size[1])
+        key, delta = self.frame_table[colors, dither]
+        frames = count_sampled_frames(self.duration, fps)
+        body = (key + max(frames - 1, 0) * delta * self.fps_ratios[fps]) * pixels ** self.exponent(colors, dither)
+        return gif_overhead(colors) + body * self.calibration
+
+    def calibrated(self, plan, actual):
+        """按某个设置的实际输出大小校准，返回新的模型"""
+        ratio = (actual - gif_overhead(plan.colors)) / max(plan.predicted - gif_overhead(plan.colors), 1.0)
+        return SizeModel(self.frame_table, self.exponents, self.reference_size, self.base_size,
+                         self.fps_ratios, self.duration, self.calibration * max(ratio, 1e-3))
+
+
+class SizePlan:
+    """选定的输出设置和预计大小"""
+
+    def __init__(self, fps, scale, size, colors, dither, predicted, score):
+        self.fps = fps
+        self.scale = scale
+        self.size = size
+        self.colors = colors
+        self.dither = dither
+        self.predicted = predicted
+        self.score = score
+
+    def describe(self):
+        width, height = self.size
+        text = f"{self.fps:g} fps, {width}×{height}, {self.colors} 色"
+        return text + ", 抖动" if self.dither else text
+
+
+def quality_score(fps, base_fps, scale, colors, dither):
+    score = SCALE_WEIGHT * math.log2(scale) + FPS_WEIGHT * math.log2(fps / base_fps)
+    score -= COLOR_WEIGHT * (8 - math.log2(colors))
+    if dither and colors <= DITHER_MAX_COLORS:
+        score += DITHER_BONUS
+    return score
+
+
+def fps_candidates(base_fps):
+    return sorted({max(1, round(base_fps / d)) for d in FPS_DIVISORS} | {base_fps}, reverse=True)
+
+
+def choose_plan(model, base_fps, target_bytes):
+    """在候选网格中选出预计不超过目标大小、画质评分最高的设置
+
+    没有设置能满足目标时返回预计最小的设置。
+    """
+    best = None
+    smallest = None
+    budget = target_bytes * SAFETY_MARGIN
+    for fps in model.fps_ratios:
+        for scale in SCALE_STEPS:
+            size = scaled_size(model.base_size, scale)
+            if min(size) < MIN_SIDE and scale < 1.0:
+                continue
+            for colors in COLOR_STEPS:
+                for dither in (False, True):
+                    predicted = model.predict(fps, scale, colors, dither)
+                    plan = SizePlan(fps, scale, size, colors, dither, predicted,
+                                    quality_score(fps, base_fps, scale, colors, dither))
+                    if smallest is None or predicted < smallest.predicted:
+                        smallest = plan
+                    if predicted <= budget and (best is None or (plan.score, -predicted) >
+                                                (best.score, -best.predicted)):
+                        best = plan
+    return best or smallest
+
+
+def encoded_frame_bytes(windows, quantizer, optimize=True):
+    """用 quantizer 把各段取样帧分别编码到内存，返回 (首帧平均字节数, 其余各帧平均字节数)
+
+    每段的首帧是完整画面，其余帧只写出帧间差分，两者分开统计；
+    完整编码时只有第一帧是完整画面。
+    """
+    key_total = delta_total = 0
+    key_count = delta_count = 0
+    for window in windows:
+        if not window:
+            continue
+        buffer = io.BytesIO()
+        with GifWriter(buffer, frame_size(window[0]), palette=quantizer.palette_bytes,
+                       optimize=optimize) as writer:
+            for frame in window:
+                before = buffer.tell()
+                writer.write_frame(quantizer.quantize(frame), 100)
+                if writer.frame_count == 1:
+                    key_total += buffer.tell() - before
+                    key_count += 1
+                else:
+                    delta_total += buffer.tell() - before
+                    delta_count += 1
+    key = key_total / max(key_count, 1)
+    return key, delta_total / delta_count if delta_count else key
+
+
+class TargetSizeVideoConverter:
+    """按目标文件大小把视频转为 GIF：fps 和 resize 为上限，由取样结果选择实际设置
+
+    其余参数与 VideoToGifConverter 相同；调色板固定为全局（或按场景）共享调色板，
+    颜色数和抖动由本转换器决定。
+    """
+
+    def __init__(self, video_path, output_path, target_bytes, fps, speed_factor, resize=None,
+                 progress=None, control=None, **options):
+        self.video_path = video_path
+        self.output_path = output_path
+        self.target_bytes = target_bytes  # 目标文件大小（字节）
+        self.fps = fps  # 最高帧率
+        self.speed_factor = speed_factor
+        self.resize = resize  # 最大输出尺寸，None 表示原尺寸
+        self.progress = progress
+        self.control = control
+        options.pop('dither', None)
+        options.pop('colors', None)
+        if options.get('palette_mode', PALETTE_GLOBAL) == PALETTE_PER_FRAME:
+            options['palette_mode'] = PALETTE_GLOBAL
+        options.update(streaming=True, sampler=SAMPLER_SEQUENTIAL)
+        self.options = options
+        self.model = None
+        self.plan = None
+        self.current = None  # 正在执行的 VideoToGifConverter
+        self.final_stats = None
+
+    @property
+    def stats(self):
+        """当前编码的统计；供任务队列显示实时帧率"""
+        if self.final_stats is not None:
+            return self.final_stats
+        return self.current.stats if self.current else None
+
+    def converter(self, output_path, fps, resize, colors, dither, progress=None):
+        return VideoToGifConverter(self.video_path, output_path, fps, self.speed_factor, resize,
+                                   dither=dither, colors=colors, progress=progress, control=self.control,
+                                   **self.options)
+
+    def emit_progress(self, value):
+        if self.progress:
+            self.progress(value)
+
+    def pass_progress(self, value):
+        self.emit_progress(SAMPLE_PROGRESS + value * (100 - SAMPLE_PROGRESS) // 100)
+
+    def read_samples(self):
+        """在截取范围内均匀取几段连续帧
+
+        返回 (各段开头的原尺寸帧, 各段按下标保存的缩小帧, 截取时长)；
+        只保留拟合模型用得到的帧，缩小帧用于测量帧率的影响。
+        """
+        template = self.converter(self.output_path, self.fps, self.resize, 256, False)
+        start, end = template.time_range()
+        duration = end - start
+        scaled, crop = template.resize_plan()
+        region = template.region()
+        needed = {index for step in sample_steps(self.fps).values() for index in step_indices(step)}
+        span = min(duration, (max(needed) + 1) / self.fps)
+        count = max(1, min(SAMPLE_WINDOWS, int(duration * SAMPLE_FRACTION // span)))
+        heads, reduced = [], []
+        for i in range(count):
+            offset = start + (duration - span) * (i / (count - 1) if count > 1 else 0.5)
+            frames = read_video_frames(self.video_path, self.fps, scaled, crop=crop, region=region,
+                                       start=offset or None, end=offset + span)
+            head, small = [], {}
+            for index, frame in enumerate(checked_frames(frames, self.control)):
+                if index < WINDOW_FRAMES:
+                    head.append(frame)
+                if index in needed:
+                    size = scaled_size((frame.shape[1], frame.shape[0]), REFERENCE_SCALE)
+                    small[index] = np.asarray(Image.fromarray(frame).resize(size, Image.LANCZOS))
+            if head:
+                heads.append(head)
+                reduced.append(small)
+            self.emit_progress(SAMPLE_PROGRESS * (i + 1) // (count + 1))
+        if not heads:
+            raise ValueError("视频中没有可转换的帧")
+        return heads, reduced, duration
+
+    def fit_model(self):
+        """编码取样帧并拟合输出大小模型"""
+        heads, reduced, duration = self.read_samples()
+        optimize = self.options.get('optimize', True)
+
+        palettes = {}
+
+        def reduced_windows(step=1):
+            return [[small[i] for i in step_indices(step) if i in small] for small in reduced]
+
+        def measure(windows, colors, dither):
+            # 同一组取样帧、同样颜色数的调色板只生成一次，抖动与否共用
+            key = (id(windows[0][0]), colors)
+            if key not in palettes:
+                frames = [frame for window in windows for frame in window]
+                palettes[key] = build_quantizer(frames, PALETTE_GLOBAL, colors=colors).palette
+            return encoded_frame_bytes(windows, PaletteQuantizer(palettes[key], dither), optimize)
+
+        windows = reduced_windows()
+        frame_table = {(colors, dither): measure(windows, colors, dither)
+                       for colors in COLOR_STEPS for dither in (False, True)}
+
+        # 原尺寸与缩小后差分帧字节数之比，换算为像素数的指数
+        base_size = frame_size(heads[0][0])
+        reference_size = frame_size(windows[0][0])
+        pixel_ratio = base_size[0] * base_size[1] / (reference_size[0] * reference_size[1])
+        exponents = (1.0, 1.0, 0.0)
+        if pixel_ratio > 1.5:
+            measured = []
+            for colors, dither in EXPONENT_ANCHORS:
+                full = measure(heads, colors, dither)[1]
+                exponent = math.log(max(full, 1.0) / max(frame_table[colors, dither][1], 1.0))
+                measured.append(min(max(exponent / math.log(pixel_ratio), EXPONENT_RANGE[0]),
+                                    EXPONENT_RANGE[1]))
+            many, few, dithered = measured
+            exponents = (many, few, dithered - many)
+
+        # 帧率越低，相邻帧差别越大，帧间差分能省下的越少
+        reference = frame_table[256, False][1]
+        fps_ratios = {}
+        for fps, step in sample_steps(self.fps).items():
+            if fps == self.fps:
+                fps_ratios[fps] = 1.0
+            else:
+                per_frame = measure(reduced_windows(step), 256, False)[1]
+                fps_ratios[fps] = per_frame / max(reference, 1.0)
+        return SizeModel(frame_table, exponents, reference_size, base_size, fps_ratios, duration)
+
+    def encode(self, plan, output_path):
+        # 不缩小时沿用原来的尺寸设置，输出与普通转换一致
+        resize = self.resize if plan.scale == 1.0 else plan.size
+        converter = self.converter(output_path, plan.fps, resize, plan.colors, plan.dither,
+                                   progress=self.pass_progress)
+        self.current = converter
+        stats = converter.run()
+        return stats, os.path.getsize(output_path)
+
+    def run(self):
+        """执行转换，返回最后一次编码的耗时统计（附带 size_budget 信息）"""
+        started = time.perf_counter()
+        self.model = self.fit_model()
+        sampled = time.perf_counter()
+        self.emit_progress(SAMPLE_PROGRESS)
+
+        self.plan = choose_plan(self.model, self.fps, self.target_bytes)
+        stats, actual = self.encode(self.plan, self.output_path)
+        plan = self.plan
+        passes = 1
+
+        # 最多一次校正：超出目标时缩小，明显偏小时尝试提高画质
+        if actual > self.target_bytes or actual < self.target_bytes * UNDERSHOOT:
+            first_done = time.perf_counter()
+            retry = choose_plan(self.model.calibrated(plan, actual), self.fps, self.target_bytes)
+            if (retry.fps, retry.size, retry.colors, retry.dither) != (plan.fps, plan.size, plan.colors,
+                                                                     plan.dither):
+                retry_path = self.output_path + '.retry.gif'
+                try:
+                    retry_stats, retry_actual = self.encode(retry, retry_path)
+                    passes = 2
+                    fits = retry_actual <= self.target_bytes
+                    if fits or (actual > self.target_bytes and retry_actual < actual):
+                        os.replace(retry_path, self.output_path)
+                        retry_stats.record('budget_first_pass', sampled, first_done)
+                        stats, actual, plan = retry_stats, retry_actual, retry
+                finally:
+                    remove_file(retry_path)
+
+        # 统计从取样开始计时
+        stats.started = started
+        stats.record('budget_sample', started, sampled)
+        stats.size_budget = {
+            'target_bytes': self.target_bytes,
+            'actual_bytes': actual,
+            'predicted_bytes': round(plan.predicted),
+            'fps': plan.fps,
+            'size': list(plan.size),
+            'colors': plan.colors,
+            'dither': plan.dither,
+            'passes': passes,
+        }
+        stats.stop()
+        self.plan = plan
+        self.final_stats = stats
+        self.emit_progress(100)
+        return stats
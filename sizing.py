@@ -0,0 +1,73 @@
+"""输出尺寸的计算：拉伸、保持比例（适应）和填充裁剪
+
+只做整数运算，不依赖 numpy、Pillow，界面估算输出时可以直接导入。
+"""
+from options import RESIZE_FILL, RESIZE_FIT, RESIZE_STRETCH
+
+
+def valid_resize(resize):
+    """resize 为有效的 (宽, 高) 时返回元组，否则返回 None"""
+    if resize and resize[0] > 0 and resize[1] > 0:
+        return tuple(resize)
+    return None
+
+
+def clip_region(region, source_size):
+    """把裁剪区域 (左, 上, 宽, 高) 限制在画面之内；region 为空时返回 None"""
+    if not region:
+        return None
+    width, height = source_size
+    left, top, region_width, region_height = (int(v) for v in region)
+    left = min(max(0, left), width - 1)
+    top = min(max(0, top), height - 1)
+    region_width = min(region_width, width - left)
+    region_height = min(region_height, height - top)
+    if region_width <= 0 or region_height <= 0:
+        raise ValueError(f"裁剪区域无效：{tuple(region)}")
+    if (left, top, region_width, region_height) == (0, 0, width, height):
+        return None
+    return left, top, region_width, region_height
+
+
+def fit_size(source_size, box, mode=RESIZE_STRETCH):
+    """计算缩放尺寸和之后的裁剪区域
+
+    返回 (缩放尺寸, 裁剪区域)，裁剪区域为缩放后画面上的 (左, 上, 宽, 高)，不需要裁剪时为 None。
+    拉伸：直接缩放到 box；适应：等比缩放到 box 之内；填充：等比缩放到覆盖 box，再居中裁剪。
+    """
+    box_width, box_height = box
+    if mode == RESIZE_STRETCH:
+        return (box_width, box_height), None
+    width, height = source_size
+    if mode == RESIZE_FIT:
+        scale = min(box_width / width, box_height / height)
+        return (min(box_width, max(1, round(width * scale))),
+                min(box_height, max(1, round(height * scale)))), None
+    if mode != RESIZE_FILL:
+        raise ValueError(f"未知的缩放方式：{mode}")
+    scale = max(box_width / width, box_height / height)
+    scaled = (max(box_width, round(width * scale)), max(box_height, round(height * scale)))
+    if scaled == (box_width, box_height):
+        return scaled, None
+    return scaled, ((scaled[0] - box_width) // 2, (scaled[1] - box_height) // 2, box_width, box_height)
+
+
+def source_box(source_size, box, mode=RESIZE_FILL):
+    """填充模式下参与缩放的原图区域 (左, 上, 右, 下)，可直接传给 PIL 的 resize(box=...)"""
+    width, height = source_size
+    scaled, crop = fit_size(source_size, box, mode)
+    if crop is None:
+        return None
+    scale_x = width / scaled[0]
+    scale_y = height / scaled[1]
+    left, top, crop_width, crop_height = crop
+    return (left * scale_x, top * scale_y, (left + crop_width) * scale_x, (top + crop_height) * scale_y)
+
+
+def output_size(source_size, resize=None, mode=RESIZE_STRETCH):
+    """缩放（和裁剪）之后的输出尺寸"""
+    resize = valid_resize(resize)
+    if not resize:
+        return tuple(source_size)
+    scaled, crop = fit_size(source_size, resize, mode)
+    return tuple(crop[2:]) if crop else scaled
@@ -0,0 +1,23 @@
+import os
+
+from cache import ConversionCache
+
+
+def test_cached_result_is_independent_of_output(tmp_path):
+    """缓存条目与输出文件互不影响：修改输出不会改写缓存，命中时不改动其他输出的修改时间"""
+    cache = ConversionCache(root=str(tmp_path / 'cache'))
+    first = tmp_path / 'first.gif'
+    first.write_bytes(b'GIF89a result')
+    cache.store_result('key', str(first))
+    os.utime(first, (0, 0))
+
+    second = tmp_path / 'second.gif'
+    assert cache.fetch_result('key', str(second))
+    assert second.read_bytes() == b'GIF89a result'
+    assert os.stat(first).st_mtime == 0
+
+    with open(second, 'ab') as f:
+        f.write(b' edited')
+    third = tmp_path / 'third.gif'
+    assert cache.fetch_result('key', str(third))
+    assert third.read_bytes() == b'GIF89a result'
@@ -0,0 +1,27 @@
+import time
+
+from frame_pipeline import buffered_frames, checked_frames
+from jobs import JobControl
+
+
+def test_buffered_frames_closes_while_paused():
+    """任务暂停时消费方提前退出，解码线程被唤醒并关闭帧源"""
+    closed = []
+
+    def source():
+        try:
+            for index in range(100):
+                yield index
+        finally:
+            closed.append(True)
+
+    control = JobControl()
+    frames = buffered_frames(checked_frames(source(), control), window=2, control=control)
+    assert next(frames) == 0
+    control.pause()
+    # 等解码线程填满队列并停在 control.check() 中
+    time.sleep(0.1)
+    start = time.perf_counter()
+    frames.close()
+    assert time.perf_counter() - start < 1
+    assert closed == [True]
@@ -0,0 +1,13 @@
+import pytest
+
+from gif_core import ImagesToGifConverter
+
+
+def test_empty_image_list_is_an_error(tmp_path):
+    """没有图片时报错，不生成输出，也不改动已有的文件"""
+    output = tmp_path / 'existing.gif'
+    output.write_bytes(b'old')
+    with pytest.raises(ValueError, match='没有可转换的图片'):
+        ImagesToGifConverter([], str(output), 100, 0).run()
+    assert output.read_bytes() == b'old'
+    assert [path.name for path in tmp_path.iterdir()] == ['existing.gif']
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+import output_formats
+from options import FORMAT_APNG, FORMAT_WEBP
+from output_formats import write_timed_frames
+
+
+def solid(color, size=(32, 24)):
+    return np.full((size[1], size[0], 3), color, dtype=np.uint8)
+
+
+def read_back(path):
+    """用 Pillow 读回动画，返回 [(RGB 像素, 时长毫秒)] 和循环次数"""
+    with Image.open(path) as image:
+        frames = [(np.asarray(frame.convert('RGB')), frame.info.get('duration'))
+                  for frame in ImageSequence.Iterator(image)]
+        return frames, image.info.get('loop')
+
+
+def test_apng_round_trip(tmp_path):
+    """APNG 无损：只写变化区域，相同的帧合并到上一帧的时长中"""
+    partial = solid((0, 0, 255))
+    partial[4:10, 6:20] = (255, 255, 0)
+    timed = [(solid((255, 0, 0)), 100), (partial, 50), (partial, 50), (solid((0, 255, 0)), 200)]
+    output = tmp_path / 'out.png'
+    assert write_timed_frames(timed, str(output), FORMAT_APNG, loop=3) == 4
+
+    frames, loop = read_back(output)
+    assert loop == 3
+    assert [duration for _, duration in frames] == [100, 100, 200]
+    for (pixels, _), expected in zip(frames, (timed[0][0], partial, timed[3][0])):
+        assert np.array_equal(pixels, expected)
+
+
+@pytest.mark.parametrize('incremental', [True, False])
+def test_webp_round_trip(tmp_path, monkeypatch, incremental):
+    """逐帧编码和退回公开接口两条路径的帧数、时长一致"""
+    if incremental and not output_formats.incremental_webp_supported():
+        pytest.skip("当前的 Pillow 不支持逐帧 WebP 编码")
+    monkeypatch.setattr(output_formats, 'incremental_webp_supported', lambda: incremental)
+    timed = [(solid((255, 0, 0)), 100), (solid((0, 0, 255)), 50), (solid((0, 255, 0)), 200)]
+    output = tmp_path / 'out.webp'
+    assert write_timed_frames(timed, str(output), FORMAT_WEBP, loop=2) == 3
+
+    frames, loop = read_back(output)
+    assert loop == 2
+    assert [duration for _, duration in frames] == [100, 50, 200]
+    for (pixels, _), (expected, _) in zip(frames, timed):
+        assert np.abs(pixels.astype(int) - expected).max() < 16